@@ -1,18 +1,34 @@
+import functools
 import logging
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator
 
 # Suppress noisy LiteLLM proxy import warnings (we don't use the proxy)
 logging.getLogger("LiteLLM").setLevel(logging.WARNING)
 os.environ.setdefault("LITELLM_LOG", "WARNING")
 
-from crewai import Agent, LLM
+import metrics
+
+# CrewAI and LiteLLM take seconds to import, so they are imported where
+# first used (or up front by load_stack) rather than here.
+if TYPE_CHECKING:
+    from crewai import LLM, Agent, Crew
+
+
+def load_stack() -> None:
+    """Import CrewAI, LiteLLM, the tools and yfinance now instead of on first use.
+
+    The gunicorn config calls this in the master when GUNICORN_PRELOAD=1, so
+    forked workers share the loaded modules copy-on-write.
+    """
+    import litellm  # noqa: F401
+    import yfinance  # noqa: F401
+    import tools  # noqa: F401
 
-from tools import (
-    FetchStockDataTool,
-    TechnicalAnalysisTool,
-    FetchNewsTool,
-    PortfolioDataTool,
-)
 
 # ── LLM Configuration ──────────────────────────────────────────
 
@@ -37,7 +53,8 @@ _PROVIDER_DEFAULTS = {
 }
 
 
-def get_llm() -> LLM:
+def llm_kwargs() -> dict:
+    """Model settings shared by CrewAI agents and direct LiteLLM calls."""
     provider = LLM_PROVIDER.lower()
     prefix = _PROVIDER_PREFIX.get(provider, "")
     model = LLM_MODEL or _PROVIDER_DEFAULTS.get(provider, "qwen2.5:7b")
@@ -49,7 +66,13 @@ def get_llm() -> LLM:
     if provider == "ollama":
         kwargs["base_url"] = OLLAMA_URL
 
-    return LLM(**kwargs)
+    return kwargs
+
+
+def get_llm() -> "LLM":
+    from crewai import LLM
+
+    return LLM(**llm_kwargs())
 
 
 def get_provider_info() -> dict:
@@ -61,16 +84,27 @@ def get_provider_info() -> dict:
 
 # ── Tool instances ──────────────────────────────────────────────
 
-fetch_stock_data = FetchStockDataTool()
-technical_analysis = TechnicalAnalysisTool()
-fetch_news = FetchNewsTool()
-portfolio_data = PortfolioDataTool()
+
+@functools.cache
+def _tools() -> dict:
+    """Shared tool instances, created on first use."""
+    from tools import FetchNewsTool, FetchStockDataTool, PortfolioDataTool, TechnicalAnalysisTool
+
+    return {
+        "fetch_stock_data": FetchStockDataTool(),
+        "technical_analysis": TechnicalAnalysisTool(),
+        "fetch_news": FetchNewsTool(),
+        "portfolio_data": PortfolioDataTool(),
+    }
 
 
 # ── Agent definitions ───────────────────────────────────────────
 
 
-def market_data_analyst() -> Agent:
+def market_data_analyst() -> "Agent":
+    from crewai import Agent
+
+    tools = _tools()
     return Agent(
         role="Market Data Analyst",
         goal=(
@@ -82,14 +116,16 @@ def market_data_analyst() -> Agent:
             "and processing raw market data. You pull OHLCV data, compute technical "
             "indicators, and assess portfolio positions with precision."
         ),
-        tools=[fetch_stock_data, technical_analysis, portfolio_data],
+        tools=[tools["fetch_stock_data"], tools["technical_analysis"], tools["portfolio_data"]],
         llm=get_llm(),
         max_iter=3,
         verbose=True,
     )
 
 
-def news_analyst() -> Agent:
+def news_analyst() -> "Agent":
+    from crewai import Agent
+
     return Agent(
         role="News Analyst",
         goal=(
@@ -101,27 +137,236 @@ def news_analyst() -> Agent:
             "earnings reports, and market-moving events. You distill headlines "
             "into concise summaries with clear sentiment assessments."
         ),
-        tools=[fetch_news],
+        tools=[_tools()["fetch_news"]],
         llm=get_llm(),
         max_iter=3,
         verbose=True,
     )
 
 
-def strategy_reporter() -> Agent:
+REPORTER_ROLE = "Strategy Reporter"
+REPORTER_GOAL = (
+    "Synthesize market data and news into actionable insights. Produce "
+    "clear, concise summaries with buy/hold/sell signals and reasoning."
+)
+REPORTER_BACKSTORY = (
+    "You are a senior investment strategist who combines technical analysis "
+    "with fundamental news to form well-reasoned market views. You communicate "
+    "complex analysis in plain English that any investor can understand."
+)
+
+
+def strategy_reporter() -> "Agent":
+    from crewai import Agent
+
     return Agent(
-        role="Strategy Reporter",
-        goal=(
-            "Synthesize market data and news into actionable insights. Produce "
-            "clear, concise summaries with buy/hold/sell signals and reasoning."
-        ),
-        backstory=(
-            "You are a senior investment strategist who combines technical analysis "
-            "with fundamental news to form well-reasoned market views. You communicate "
-            "complex analysis in plain English that any investor can understand."
-        ),
+        role=REPORTER_ROLE,
+        goal=REPORTER_GOAL,
+        backstory=REPORTER_BACKSTORY,
         tools=[],
         llm=get_llm(),
         max_iter=2,
         verbose=True,
     )
+
+
+class ReporterPool:
+    """Pre-built Strategy Reporter crews, each used by one kickoff at a time.
+
+    Building an Agent, its LLM client, a Task and a Crew costs tens of
+    milliseconds, so `size` crews are built up front (one per llm executor
+    worker) and reused: the task text is a `{description}` /
+    `{expected_output}` template filled in through `kickoff(inputs=...)`.
+    Extra concurrent callers get a crew built on demand; a crew whose
+    kickoff raised is discarded rather than returned.
+
+    CrewAI reports a crew's token usage as a running total over the life of
+    its LLM, so each run records only the growth since that crew's last run.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._token_totals: dict[int, dict] = {}  # id(crew) -> usage after its last kickoff
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._built = 0
+        self._build_seconds = 0.0
+        self._last_build = 0.0
+        self._checkouts = 0
+        self._misses = 0
+
+    def _build(self) -> "Crew":
+        from crewai import Crew, Process, Task
+
+        start = time.perf_counter()
+        reporter = strategy_reporter()
+        task = Task(
+            description="{description}",
+            expected_output="{expected_output}",
+            agent=reporter,
+        )
+        crew = Crew(
+            agents=[reporter],
+            tasks=[task],
+            process=Process.sequential,
+            verbose=True,
+        )
+        elapsed = time.perf_counter() - start
+        metrics.record("reporter.build", elapsed)
+        with self._lock:
+            self._built += 1
+            self._build_seconds += elapsed
+            self._last_build = elapsed
+        return crew
+
+    def warm(self) -> None:
+        """Build crews until `size` are idle."""
+        while self._idle.qsize() < self.size:
+            self._idle.put(self._build())
+
+    def warm_in_background(self) -> None:
+        """Run warm() on a daemon thread; requests arriving first build their own crew."""
+        threading.Thread(target=self.warm, name="reporter-warmup", daemon=True).start()
+
+    @contextmanager
+    def checkout(self):
+        try:
+            crew = self._idle.get_nowait()
+            miss = False
+        except queue.Empty:
+            crew = self._build()
+            miss = True
+        with self._lock:
+            self._checkouts += 1
+            self._misses += miss
+        try:
+            yield crew
+        except BaseException:
+            self._token_totals.pop(id(crew), None)
+            raise
+        if self._idle.qsize() < self.size:
+            self._idle.put(crew)
+        else:
+            self._token_totals.pop(id(crew), None)
+
+    def run(self, description: str, expected_output: str) -> str:
+        """Kick off a pooled reporter crew on one task. Blocking."""
+        with self.checkout() as crew:
+            with metrics.timer("llm.kickoff"):
+                output = crew.kickoff(inputs={"description": description, "expected_output": expected_output})
+            metrics.record_tokens(self._new_tokens(crew, getattr(output, "token_usage", None)))
+        return str(output)
+
+    def _new_tokens(self, crew, usage) -> dict | None:
+        """Tokens this kickoff used: the crew's cumulative usage minus what earlier runs reported."""
+        if usage is None:
+            return None
+        total = {
+            kind: (usage.get(kind) if isinstance(usage, dict) else getattr(usage, kind, None)) or 0
+            for kind in ("prompt_tokens", "completion_tokens")
+        }
+        previous = self._token_totals.get(id(crew), {})
+        self._token_totals[id(crew)] = total
+        return {kind: max(value - previous.get(kind, 0), 0) for kind, value in total.items()}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "idle": self._idle.qsize(),
+                "built": self._built,
+                "avg_build_ms": round(self._build_seconds / self._built * 1000, 2) if self._built else None,
+                "last_build_ms": round(self._last_build * 1000, 2),
+                "checkouts": self._checkouts,
+                "misses": self._misses,
+            }
+
+
+# One crew per llm executor worker
+reporter_pool = ReporterPool(int(os.environ.get("REPORTER_POOL_SIZE", os.environ.get("LLM_WORKERS", "2"))))
+
+# When to build the pool (and so import CrewAI): "startup" before serving,
+# "background" right after startup, "off" on the first AI request
+REPORTER_WARMUP = os.environ.get("REPORTER_WARMUP", "background")
+
+
+def stream_reporter(description: str, expected_output: str) -> Iterator[str]:
+    """Yield the Strategy Reporter's answer token by token.
+
+    The reporter has no tools, so a single streamed completion with the same
+    persona and task text replaces the crew round-trip. Blocking — iterate
+    it on the llm executor.
+    """
+    messages = [
+        {
+            "role": "system",
+            "content": f"You are {REPORTER_ROLE}. {REPORTER_BACKSTORY}\nYour personal goal is: {REPORTER_GOAL}",
+        },
+        {
+            "role": "user",
+            "content": (
+                f"Current Task: {description}\n\n"
+                f"This is the expected criteria for your final answer: {expected_output}\n"
+                f"You MUST return the actual complete content as the final answer, not a summary."
+            ),
+        },
+    ]
+    import litellm
+
+    start = time.perf_counter()
+    first = True
+    for chunk in litellm.completion(messages=messages, stream=True, **llm_kwargs()):
+        metrics.record_tokens(getattr(chunk, "usage", None))
+        text = chunk.choices[0].delta.content if chunk.choices else None
+        if text:
+            if first:
+                metrics.record("llm.first_token", time.perf_counter() - start)
+                first = False
+            yield text
+    metrics.record("llm.stream", time.perf_counter() - start)
+
+
+# ── Reporter task templates ─────────────────────────────────────
+
+# name -> (description, expected_output); filled with str.format(**fields)
+REPORT_TEMPLATES = {
+    "briefing": (
+        "You are given real market data below. Do NOT invent any prices, "
+        "percentages, or news headlines. Use ONLY the data provided.\n\n"
+        "Here is the REAL market data. Use ONLY these numbers:\n\n"
+        "{context}\n"
+        "Write a morning briefing that includes for each symbol:\n"
+        "1) Current price and daily change\n"
+        "2) Key technical signals interpretation\n"
+        "3) News highlights (only from the data above, or say 'No recent news')\n"
+        "4) Brief outlook (bullish/bearish/neutral with reasoning)\n"
+        "End with a short market overview.",
+        "A morning briefing using only the provided data.",
+    ),
+    "analysis": (
+        "You are given real market data below. Do NOT invent any prices, "
+        "percentages, or news headlines. Use ONLY the data provided.\n\n"
+        "{context}\n\n"
+        "Produce a full analysis for {symbol}:\n"
+        "1) Price summary with key levels\n"
+        "2) Technical indicator interpretation\n"
+        "3) News impact assessment (only from data above)\n"
+        "4) Clear buy/hold/sell recommendation with reasoning\n\n"
+        "End your response with a single line starting with 'RECOMMENDATION:' "
+        "followed by BUY, HOLD, or SELL and a one-sentence reason.",
+        "Analysis and recommendation for {symbol} using only provided data.",
+    ),
+    "portfolio": (
+        "You are given real portfolio data below. Use ONLY these numbers.\n\n"
+        "{context}\n\n"
+        "Write a brief portfolio summary: total value, daily P&L, "
+        "top movers, and any positions needing attention.",
+        "Brief portfolio summary using only provided data.",
+    ),
+}
+
+
+def report_task(name: str, **fields: str) -> tuple[str, str]:
+    """(description, expected_output) for a reporter template."""
+    description, expected_output = REPORT_TEMPLATES[name]
+    return description.format(**fields), expected_output.format(**fields)
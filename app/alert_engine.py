@@ -0,0 +1,187 @@
+"""Background price-alert evaluation.
+
+Active alerts are indexed per symbol in two sorted threshold arrays, so a
+price tick finds every triggered alert with one binary search per side
+instead of scanning all alerts. Thresholds are stored so that triggered
+alerts always form a suffix, which makes removing them O(fired).
+"""
+
+import asyncio
+import logging
+import os
+import time
+from bisect import bisect_left
+from collections import deque
+
+import database
+import market_data
+from executors import ExecutorSaturated, io_executor
+
+logger = logging.getLogger(__name__)
+
+ALERT_ENGINE = os.environ.get("ALERT_ENGINE", "1") != "0"
+ALERT_POLL_SECONDS = float(os.environ.get("ALERT_POLL_SECONDS", "60"))
+
+# Triggered alerts kept for /stats
+_RECENT = 50
+
+
+class AlertIndex:
+    """Per-symbol sorted thresholds for `above` and `below` alerts.
+
+    `above` stores -price so both sides fire as a suffix:
+    price >= target  <=>  -target >= -price.
+    """
+
+    def __init__(self, alerts: list[dict] = ()):
+        self._sides: dict[str, dict[str, tuple[list, list]]] = {}
+        self.size = 0
+        for alert in sorted(alerts, key=lambda a: a["id"]):
+            self.add(alert)
+
+    def add(self, alert: dict) -> None:
+        sides = self._sides.setdefault(alert["symbol"].upper(), {"above": ([], []), "below": ([], [])})
+        keys, entries = sides[alert["condition"]]
+        key = -alert["price"] if alert["condition"] == "above" else alert["price"]
+        pos = bisect_left(keys, key)
+        keys.insert(pos, key)
+        entries.insert(pos, alert)
+        self.size += 1
+
+    def symbols(self) -> list[str]:
+        return list(self._sides)
+
+    def pop_triggered(self, symbol: str, price: float) -> list[dict]:
+        """Remove and return every alert on `symbol` that `price` satisfies."""
+        sides = self._sides.get(symbol.upper())
+        if sides is None:
+            return []
+        fired = []
+        for condition, probe in (("above", -price), ("below", price)):
+            keys, entries = sides[condition]
+            cut = bisect_left(keys, probe)
+            if cut < len(keys):
+                fired.extend(entries[cut:])
+                del keys[cut:], entries[cut:]
+        self.size -= len(fired)
+        if not sides["above"][0] and not sides["below"][0]:
+            del self._sides[symbol.upper()]
+        return fired
+
+
+class AlertEngine:
+    """Polls quotes for every symbol with an active alert and fires matches.
+
+    The index is rebuilt only when the active-alert set changes, detected
+    cheaply from (MAX(id), active count). Ticks from the background loop and
+    from POST /check-alerts are serialized.
+    """
+
+    def __init__(self, interval: float = ALERT_POLL_SECONDS):
+        self.interval = interval
+        self._index = AlertIndex()
+        self._version = None
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._recent: deque = deque(maxlen=_RECENT)
+        self._ticks = 0
+        self._fired = 0
+        self._last_tick = None
+
+    def _refresh_index(self) -> None:
+        version = database.get_alerts_version()
+        if version != self._version:
+            self._index = AlertIndex(database.get_alerts(active_only=True))
+            self._version = version
+
+    def _evaluate(self) -> list[dict]:
+        self._refresh_index()
+        symbols = self._index.symbols()
+        if not symbols:
+            return []
+        try:
+            quotes = market_data.get_quotes(symbols)
+        except Exception:
+            # Like the per-symbol fetches before it: no prices, no triggers this tick
+            logger.warning("Quote download for %d alert symbols failed", len(symbols), exc_info=True)
+            return []
+
+        candidates = {}
+        for sym in symbols:
+            quote = quotes.get(sym)
+            if not quote or not quote["price"]:
+                continue
+            for alert in self._index.pop_triggered(sym, quote["price"]):
+                candidates[alert["id"]] = (alert, quote["price"])
+        if not candidates:
+            return []
+
+        # Another worker may have fired some of these first; report only ours
+        try:
+            deactivated = database.deactivate_alerts(list(candidates))
+        except Exception:
+            self._version = None  # popped alerts are still active; rebuild next tick
+            raise
+        max_id, active = self._version
+        self._version = (max_id, active - len(deactivated))
+        triggered = []
+        for alert_id in sorted(deactivated):
+            alert, price = candidates[alert_id]
+            triggered.append({
+                "id": alert_id,
+                "symbol": alert["symbol"],
+                "condition": alert["condition"],
+                "target_price": alert["price"],
+                "current_price": round(price, 2),
+            })
+        return triggered
+
+    async def check(self) -> list[dict]:
+        """Run one evaluation now and return the alerts it fired."""
+        async with self._lock:
+            triggered = await io_executor.run(self._evaluate)
+            self._ticks += 1
+            self._fired += len(triggered)
+            self._last_tick = time.time()
+            self._recent.extend(triggered)
+            return triggered
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.check()
+            except asyncio.CancelledError:
+                raise
+            except ExecutorSaturated:
+                pass
+            except Exception:
+                logger.warning("Alert tick failed; retrying next interval", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "interval": self.interval,
+            "indexed": self._index.size,
+            "symbols": len(self._index.symbols()),
+            "ticks": self._ticks,
+            "fired": self._fired,
+            "last_tick": self._last_tick,
+            "recent": list(self._recent),
+        }
+
+
+engine = AlertEngine()
@@ -0,0 +1,220 @@
+"""Vectorized backtest of the technical signal rules over many symbols.
+
+Each rule votes every bar the way `indicators.signal_summary` reads it:
+RSI below 30 is +1 and above 70 is -1; MACD above its signal line is +1,
+otherwise -1; SMA50 above SMA200 (golden cross) is +1, otherwise -1; a
+close below the lower Bollinger Band is +1 and above the upper band -1.
+Indicators still warming up vote 0. The strategy goes long at a close
+where the votes sum to at least `buy_at`, goes flat where they sum to at
+most `sell_at`, and otherwise keeps its position; the position earns the
+next bar's return. Everything runs on (bars x symbols) arrays, so there
+is no per-bar Python loop.
+"""
+
+import os
+
+import numpy as np
+
+import indicators
+from metrics import timer
+
+# Most symbols one /backtest request may replay
+BACKTEST_MAX_SYMBOLS = int(os.environ.get("BACKTEST_MAX_SYMBOLS", "1000"))
+
+RULES = ["rsi", "macd", "cross", "bollinger"]
+TRADING_DAYS = 252
+
+
+# ── Signals ─────────────────────────────────────────────────────
+
+
+def rule_votes(close: np.ndarray, rules: list[str]) -> dict[str, np.ndarray]:
+    """Per-bar votes (+1 bullish, -1 bearish, 0 neutral) of each rule."""
+    votes = {}
+    with np.errstate(invalid="ignore"):
+        if "rsi" in rules:
+            rsi = indicators.rsi(close)
+            votes["rsi"] = np.where(rsi < 30, 1.0, np.where(rsi > 70, -1.0, 0.0))
+        if "macd" in rules:
+            line, signal, _ = indicators.macd(close)
+            votes["macd"] = np.where(line > signal, 1.0, np.where(line <= signal, -1.0, 0.0))
+        if "cross" in rules:
+            sma_50, sma_200 = indicators.sma(close, 50), indicators.sma(close, 200)
+            votes["cross"] = np.where(sma_50 > sma_200, 1.0, np.where(sma_50 <= sma_200, -1.0, 0.0))
+        if "bollinger" in rules:
+            upper, _, lower = indicators.bollinger(close)
+            votes["bollinger"] = np.where(close < lower, 1.0, np.where(close > upper, -1.0, 0.0))
+    return votes
+
+
+def positions(score: np.ndarray, buy_at: float, sell_at: float) -> np.ndarray:
+    """1 while long, 0 while flat: enter at `buy_at`, exit at `sell_at`, hold in between."""
+    state = np.where(score >= buy_at, 1.0, np.where(score <= sell_at, 0.0, np.nan))
+    state[0] = np.nan_to_num(state[0])
+    # Carry the last decided state forward through the undecided bars
+    rows = np.arange(state.shape[0])[:, None]
+    idx = np.where(np.isnan(state), 0, rows)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return state[idx, np.arange(state.shape[1])]
+
+
+# ── Statistics ──────────────────────────────────────────────────
+
+
+def _performance(returns: np.ndarray, valid: np.ndarray) -> dict[str, np.ndarray]:
+    """Return, CAGR, volatility, Sharpe and max drawdown per column of daily returns."""
+    bars = valid.sum(axis=0)
+    years = np.maximum(bars, 1) / TRADING_DAYS
+    equity = np.cumprod(1.0 + returns, axis=0)
+    final = equity[-1]
+    drawdown = (equity / np.maximum.accumulate(equity, axis=0) - 1.0).min(axis=0)
+    n = np.maximum(bars, 1)
+    mean = returns.sum(axis=0) / n
+    std = np.sqrt(np.maximum((returns * returns).sum(axis=0) / n - mean * mean, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(TRADING_DAYS), 0.0)
+    return {
+        "total_return": final - 1.0,
+        "cagr": np.power(np.maximum(final, 0.0), 1.0 / years) - 1.0,
+        "volatility": std * np.sqrt(TRADING_DAYS),
+        "sharpe": sharpe,
+        "max_drawdown": drawdown,
+    }
+
+
+def _trades(held: np.ndarray, entries: np.ndarray, returns: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(trades, winning trades) per column; a trade still open at the end counts at its last close."""
+    cols = held.shape[1]
+    # Bars held after the k-th entry belong to trade k (1-based)
+    trade_id = np.zeros_like(held, dtype=np.int64)
+    trade_id[1:] = np.cumsum(entries, axis=0)[:-1]
+    trade_id = np.where(held > 0, trade_id, 0)
+    width = int(trade_id.max()) + 1
+    key = (trade_id + np.arange(cols) * width).ravel()
+    growth = np.bincount(key, weights=np.log1p(held * returns).ravel(), minlength=cols * width)
+    seen = np.bincount(key, weights=held.ravel(), minlength=cols * width)
+    growth, seen = growth.reshape(cols, width)[:, 1:], seen.reshape(cols, width)[:, 1:]
+    return (seen > 0).sum(axis=1), ((seen > 0) & (growth > 0)).sum(axis=1)
+
+
+def _trading_dates(histories: dict, rows: int) -> tuple[np.ndarray, np.ndarray]:
+    """Union of the histories' bar dates, and each panel cell's position in it.
+
+    The panel right-aligns histories by bar position, so a cell's date is
+    its symbol's own bar date; padding cells get -1. Dates are exchange
+    local, so bars from different time zones meet on the same day.
+    """
+    days = []
+    for hist in histories.values():
+        index = hist.index
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        days.append(index.values.astype("datetime64[D]"))
+    dates = np.unique(np.concatenate(days))
+    cells = np.full((rows, len(days)), -1, dtype=np.int64)
+    for col, own in enumerate(days):
+        cells[rows - len(own):, col] = np.searchsorted(dates, own)
+    return dates, cells
+
+
+def _date_mean(values: np.ndarray, live: np.ndarray, cells: np.ndarray, dates: int) -> tuple[np.ndarray, np.ndarray]:
+    """Mean of the live cells on each date, and whether any symbol traded that date."""
+    rows, cols = np.nonzero(live)
+    where = cells[rows, cols]
+    counts = np.bincount(where, minlength=dates)
+    sums = np.bincount(where, weights=values[rows, cols], minlength=dates)
+    return np.where(counts > 0, sums / np.maximum(counts, 1), 0.0), counts > 0
+
+
+def _rounded(value: float, digits: int = 4) -> float | None:
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def run(
+    histories: dict,
+    rules: list[str] | None = None,
+    buy_at: float = 2,
+    sell_at: float = -2,
+    cost_bps: float = 5,
+) -> dict:
+    """Replay the rules over every history; per-symbol and equal-weight results.
+
+    `histories` are DataFrames or bar_columns.BarColumns. `cost_bps` is
+    charged on each change of position. Returns fractions
+    (0.12 = 12%); `turnover` is position changes per year (a round trip
+    is 2) and `exposure` the share of bars spent long. The summary's
+    equal-weight book is aligned by date, so symbols with missing bars
+    or other trading calendars are averaged with the same day's returns.
+    """
+    rules = rules or RULES
+    usable = {sym: h for sym, h in histories.items() if len(h) > 1}
+    if not usable:
+        return {"summary": None, "symbols": []}
+
+    with timer("indicator.panel"):
+        close = indicators.build_panel(usable, "Close")
+    with timer("backtest.signals"):
+        votes = rule_votes(close, rules)
+        score = sum(votes.values())
+        pos = positions(score, buy_at, sell_at)
+
+    with timer("backtest.replay"):
+        valid = ~np.isnan(close)
+        pos[~valid] = 0.0
+        returns = np.zeros_like(close)
+        with np.errstate(invalid="ignore"):
+            returns[1:] = close[1:] / close[:-1] - 1.0
+        returns[np.isnan(returns)] = 0.0  # padding and the first bar of each symbol
+        held = np.zeros_like(pos)
+        held[1:] = pos[:-1]
+        changes = np.abs(np.diff(pos, axis=0, prepend=0.0))
+        strategy = held * returns - changes * cost_bps / 10_000
+
+        bars = valid.sum(axis=0)
+        years = np.maximum(bars, 1) / TRADING_DAYS
+        per_symbol = _performance(strategy, valid)
+        first = valid.argmax(axis=0)
+        buy_hold = close[-1] / close[first, np.arange(close.shape[1])] - 1.0
+        entries = np.diff(pos, axis=0, prepend=0.0) > 0
+        trades, wins = _trades(held, entries, returns)
+        exposure = held.sum(axis=0) / np.maximum(bars, 1)
+        turnover = changes.sum(axis=0) / years
+
+        # Equal-weight book: the mean of each date's returns over the symbols
+        # with a bar (and a previous bar) on that date
+        live = valid.copy()
+        live[1:] &= valid[:-1]
+        dates, cells = _trading_dates(usable, close.shape[0])
+        book, traded = _date_mean(strategy, live, cells, len(dates))
+        book_hold, _ = _date_mean(returns, live, cells, len(dates))
+        book_stats = _performance(book[:, None], traded[:, None])
+        hold_stats = _performance(book_hold[:, None], traded[:, None])
+
+    symbols = []
+    for col, (sym, hist) in enumerate(usable.items()):
+        symbols.append({
+            "symbol": sym,
+            "from": hist.index[0].strftime("%Y-%m-%d"),
+            "to": hist.index[-1].strftime("%Y-%m-%d"),
+            "bars": int(bars[col]),
+            **{key: _rounded(values[col]) for key, values in per_symbol.items()},
+            "buy_hold_return": _rounded(buy_hold[col]),
+            "trades": int(trades[col]),
+            "hit_rate": _rounded(wins[col] / trades[col]) if trades[col] else None,
+            "exposure": _rounded(exposure[col]),
+            "turnover": _rounded(turnover[col]),
+            "final_position": int(pos[-1, col]),
+        })
+
+    total_trades = int(trades.sum())
+    summary = {
+        "symbols": len(usable),
+        **{key: _rounded(values[0]) for key, values in book_stats.items()},
+        "buy_hold_return": _rounded(hold_stats["total_return"][0]),
+        "buy_hold_max_drawdown": _rounded(hold_stats["max_drawdown"][0]),
+        "trades": total_trades,
+        "hit_rate": _rounded(wins.sum() / total_trades) if total_trades else None,
+        "exposure": _rounded(exposure.mean()),
+        "turnover": _rounded(turnover.mean()),
+    }
+    return {"summary": summary, "symbols": symbols}
@@ -0,0 +1,176 @@
+"""Columnar, memory-mapped copy of the daily bar store.
+
+Every symbol with stored bars also gets one file under BAR_COLUMNS_DIR
+holding a fixed-width column per field: `ts` (int64 epoch seconds),
+`open` / `high` / `low` / `close` (float32) and `volume` (float64), after
+a 64-byte header with the bar count and timezone. Reads map the file once
+and hand out NumPy views of the columns, so a scan over hundreds of
+multi-year histories builds no DataFrames, copies nothing until the
+indicator panel is filled and touches only the pages it reads. SQLite
+stays the source of truth; a symbol's file is rewritten whenever its
+stored bars change.
+
+Files are written to a uniquely named temporary file in the same
+directory and moved into place with os.replace, so concurrent writers
+never share a file and readers see either the old or the new series,
+never a partial one. A file too short for the bar count in its header
+reads as missing, so the caller re-exports it.
+"""
+
+import os
+import struct
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import database
+from metrics import timer
+
+BAR_COLUMNS = os.environ.get("BAR_COLUMNS", "1") == "1"
+BAR_COLUMNS_DIR = os.environ.get("BAR_COLUMNS_DIR", os.path.join(os.path.dirname(database.DB_PATH), "bars"))
+
+# Magic, bar count, timezone name (NUL padded)
+_HEADER = struct.Struct("<8sq48s")
+_MAGIC = b"SBBARS2\0"
+_HEADER_SIZE = 64
+
+# DataFrame column -> dtype, in file order after `ts`
+FIELDS = {
+    "Open": np.float32,
+    "High": np.float32,
+    "Low": np.float32,
+    "Close": np.float32,
+    "Volume": np.float64,
+}
+
+
+# Bytes per bar across `ts` and every field
+_BAR_BYTES = 8 + sum(np.dtype(dtype).itemsize for dtype in FIELDS.values())
+
+
+class BarColumns:
+    """One symbol's bars as memory-mapped columns.
+
+    Quacks like the OHLCV DataFrames the indicator code takes: `bars["Close"]`,
+    `len(bars)`, `.empty` and a DatetimeIndex `.index`.
+    """
+
+    def __init__(self, ts: np.ndarray, tz: str, columns: dict[str, np.ndarray]):
+        self.ts = ts
+        self.tz = tz
+        self._columns = columns
+        self._index = None
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self._columns[field]
+
+    @property
+    def empty(self) -> bool:
+        return len(self.ts) == 0
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        if self._index is None:
+            self._index = pd.to_datetime(self.ts, unit="s", utc=True).tz_convert(self.tz)
+        return self._index
+
+    def last_time(self) -> pd.Timestamp:
+        return pd.Timestamp(int(self.ts[-1]), unit="s", tz="UTC").tz_convert(self.tz)
+
+    def since(self, start_ts: int) -> "BarColumns":
+        """Bars with ts > start_ts, as views of the same map."""
+        first = int(np.searchsorted(self.ts, start_ts, side="right"))
+        return self.tail(len(self.ts) - first)
+
+    def tail(self, n: int) -> "BarColumns":
+        first = max(len(self.ts) - n, 0)
+        return BarColumns(self.ts[first:], self.tz, {k: v[first:] for k, v in self._columns.items()})
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({k: np.asarray(v, dtype=float) for k, v in self._columns.items()}, index=self.index)
+
+
+def _path(symbol: str) -> str:
+    symbol = symbol.upper()
+    if not symbol or os.sep in symbol or symbol.startswith("."):
+        raise ValueError(f"Invalid symbol {symbol!r}")
+    return os.path.join(BAR_COLUMNS_DIR, f"{symbol}.bars")
+
+
+# ── Writes ──────────────────────────────────────────────────────
+
+
+def write(symbol: str, ts: np.ndarray, tz: str, values: dict[str, np.ndarray]) -> None:
+    """Replace a symbol's file; `values` maps DataFrame column names to arrays."""
+    path = _path(symbol)
+    os.makedirs(BAR_COLUMNS_DIR, exist_ok=True)
+    with timer("columns.write"):
+        fd, tmp = tempfile.mkstemp(dir=BAR_COLUMNS_DIR, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, len(ts), tz.encode()).ljust(_HEADER_SIZE, b"\0"))
+                f.write(np.ascontiguousarray(ts, dtype=np.int64).tobytes())
+                for field, dtype in FIELDS.items():
+                    f.write(np.ascontiguousarray(values[field], dtype=dtype).tobytes())
+            os.chmod(tmp, 0o644)  # mkstemp creates it owner-only
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+def export(symbol: str, interval: str) -> None:
+    """Rewrite a symbol's file from its bars in SQLite."""
+    rows = database.get_bars(symbol, interval)
+    if not rows:
+        remove(symbol)
+        return
+    write(
+        symbol,
+        np.fromiter((r["ts"] for r in rows), dtype=np.int64, count=len(rows)),
+        rows[-1]["tz"],
+        {field: np.fromiter((r[field.lower()] for r in rows), dtype=float, count=len(rows)) for field in FIELDS},
+    )
+
+
+def remove(symbol: str) -> None:
+    try:
+        os.remove(_path(symbol))
+    except FileNotFoundError:
+        pass
+
+
+# ── Reads ───────────────────────────────────────────────────────
+
+
+def read(symbol: str) -> BarColumns | None:
+    """A symbol's bars, memory-mapped; None if none are stored."""
+    try:
+        with timer("columns.read"):
+            raw = np.memmap(_path(symbol), dtype=np.uint8, mode="r")
+    except (FileNotFoundError, ValueError):
+        return None
+    if raw.size < _HEADER_SIZE:
+        return None
+    magic, n, tz = _HEADER.unpack_from(raw[:_HEADER.size].tobytes())
+    if magic != _MAGIC or n < 0 or raw.size < _HEADER_SIZE + n * _BAR_BYTES:
+        return None  # torn, truncated or an older format
+    ts = np.frombuffer(raw, dtype=np.int64, count=n, offset=_HEADER_SIZE)
+    offset = _HEADER_SIZE + ts.nbytes
+    columns = {}
+    for field, dtype in FIELDS.items():
+        columns[field] = np.frombuffer(raw, dtype=dtype, count=n, offset=offset)
+        offset += columns[field].nbytes
+    return BarColumns(ts, tz.rstrip(b"\0").decode(), columns)
+
+
+def stats() -> dict:
+    try:
+        symbols = sum(1 for name in os.listdir(BAR_COLUMNS_DIR) if name.endswith(".bars"))
+    except FileNotFoundError:
+        symbols = 0
+    return {"enabled": BAR_COLUMNS, "dir": BAR_COLUMNS_DIR, "symbols": symbols}
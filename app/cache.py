@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+import pandas as pd
+
+
+def _sizeof(value: Any) -> int:
+    """Rough in-memory size of a cached value, in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 1024
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key runs `fn`; callers arriving while it is in
+    flight block until it finishes and get the same result (or exception).
+    Nothing is remembered afterwards — pair it with a cache for that.
+    """
+
+    def __init__(self):
+        self._calls: dict = {}
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict[str, int]] = {}
+        os.register_at_fork(after_in_child=self._reset_lock)
+
+    def _reset_lock(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: tuple, fn: Callable[[], Any]) -> Any:
+        """Run `fn` once per concurrent burst of `key`. Keys are tuples whose first item is the kind."""
+        with self._lock:
+            counters = self._stats.setdefault(key[0], {"calls": 0, "coalesced": 0})
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                counters["calls"] += 1
+                leader = True
+            else:
+                counters["coalesced"] += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+            return call.value
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "kinds": {k: dict(v) for k, v in self._stats.items()},
+            }
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry and entry/byte bounds.
+
+    Each gunicorn worker holds its own instance; the lock only guards
+    threads inside one process and is rebuilt after a fork. Concurrent
+    misses on the same key in get_or_fetch share a single fetch.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: OrderedDict = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict[str, int]] = {}
+        self._flight = SingleFlight()
+        os.register_at_fork(after_in_child=self._reset_lock)
+
+    def _reset_lock(self):
+        self._lock = threading.Lock()
+
+    def _count(self, kind: str, field: str, n: int = 1):
+        counters = self._stats.setdefault(
+            kind, {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        )
+        counters[field] += n
+
+    def _drop(self, key) -> None:
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def get(self, key: tuple) -> tuple[bool, Any]:
+        """Return (hit, value). Keys are tuples whose first item is the kind."""
+        kind = key[0]
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._count(kind, "misses")
+                return False, None
+            if entry[0] <= time.monotonic():
+                self._drop(key)
+                self._count(kind, "expirations")
+                self._count(kind, "misses")
+                return False, None
+            self._data.move_to_end(key)
+            self._count(kind, "hits")
+            return True, entry[2]
+
+    def set(self, key: tuple, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (time.monotonic() + ttl, size, value)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                old_key = next(iter(self._data))
+                self._drop(old_key)
+                self._count(old_key[0], "evictions")
+
+    def _peek(self, key: tuple) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return False, None
+            return True, entry[2]
+
+    def get_or_fetch(self, key: tuple, ttl: float, fetch: Callable[[], Any]) -> Any:
+        hit, value = self.get(key)
+        if hit:
+            return value
+
+        def fetch_and_store():
+            # A fetch that finished just before this one started may already have stored it
+            hit, value = self._peek(key)
+            if hit:
+                return value
+            value = fetch()
+            self.set(key, value, ttl)
+            return value
+
+        return self._flight.do(key, fetch_and_store)
+
+    def invalidate(self, key: tuple) -> None:
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "kinds": {k: dict(v) for k, v in self._stats.items()},
+                "singleflight": self._flight.stats(),
+            }
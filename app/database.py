@@ -1,24 +1,102 @@
-import sqlite3
 import os
+import sqlite3
+import threading
+import weakref
 from datetime import datetime, timezone
 
+import metrics
+
 DB_PATH = os.environ.get("STOCKBOT_DB_PATH", "/app/data/stockbot.db")
 
+# Per-connection tuning; every thread keeps its connection for its lifetime
+SQLITE_CACHE_MB = int(os.environ.get("SQLITE_CACHE_MB", "16"))
+SQLITE_MMAP_MB = int(os.environ.get("SQLITE_MMAP_MB", "64"))
+
 DEFAULT_WATCHLIST = ["SLV", "QQQ"]
 
+# Host parameters per statement for IN (...) lists; SQLite's floor is 999
+_MAX_PARAMS = 900
+
+
+# ── Connections ─────────────────────────────────────────────────
+
+
+def _timed(fn):
+    """Time every call under the `db.<function name>` stage."""
+    return metrics.timed(f"db.{fn.__name__}")(fn)
+
+
+class _Connection(sqlite3.Connection):
+    """sqlite3.Connection that can be weakly referenced (for close_all)."""
+
+
+_local = threading.local()
+_open: "weakref.WeakSet[_Connection]" = weakref.WeakSet()
+_open_lock = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    # A forked worker must never reuse its parent's SQLite handles
+    global _local, _open, _open_lock
+    _local = threading.local()
+    _open = weakref.WeakSet()
+    _open_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
 
 def _get_conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
+    """This thread's connection, opened and configured on first use.
+
+    Connections persist so PRAGMAs run once and sqlite3's per-connection
+    statement cache keeps every query here prepared.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        return conn
+    conn = sqlite3.connect(
+        DB_PATH,
+        factory=_Connection,
+        check_same_thread=False,  # only the owning thread uses it; close_all may run elsewhere
+        cached_statements=256,
+    )
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
     conn.execute("PRAGMA foreign_keys=ON")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}")
+    _local.conn = conn
+    with _open_lock:
+        _open.add(conn)
     return conn
 
 
+def close_all() -> None:
+    """Close every thread's connection (application shutdown)."""
+    global _local
+    with _open_lock:
+        conns = list(_open)
+        _open.clear()
+    _local = threading.local()
+    for conn in conns:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+
+def connection_stats() -> dict:
+    with _open_lock:
+        return {"connections": len(_open)}
+
+
 def init_db():
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
     conn = _get_conn()
-    try:
+    with conn:
         conn.executescript("""
             CREATE TABLE IF NOT EXISTS portfolio (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -42,138 +120,419 @@ def init_db():
                 active INTEGER NOT NULL DEFAULT 1,
                 created_at TEXT NOT NULL DEFAULT (datetime('now'))
             );
+
+            CREATE INDEX IF NOT EXISTS idx_alerts_active ON alerts (active, symbol);
+
+            -- OHLCV bars; ts is the bar start in UTC epoch seconds
+            CREATE TABLE IF NOT EXISTS bars (
+                symbol TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                tz TEXT NOT NULL,
+                open REAL NOT NULL,
+                high REAL NOT NULL,
+                low REAL NOT NULL,
+                close REAL NOT NULL,
+                volume REAL NOT NULL,
+                PRIMARY KEY (symbol, interval, ts)
+            ) WITHOUT ROWID;
+
+            -- Widest period fully downloaded per series, and when it was last topped up
+            CREATE TABLE IF NOT EXISTS bar_sync (
+                symbol TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                period TEXT NOT NULL,
+                synced_at REAL NOT NULL,
+                PRIMARY KEY (symbol, interval)
+            );
+
+            -- Strategy Reporter outputs keyed by a hash of template, model and data
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                template TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_created ON llm_cache (created_at);
+
+            -- Background AI jobs; at most one queued/running job per dedupe_key
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL,
+                dedupe_key TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued'
+                    CHECK(status IN ('queued', 'running', 'done', 'failed')),
+                progress TEXT NOT NULL DEFAULT 'queued',
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active
+                ON jobs (dedupe_key) WHERE status IN ('queued', 'running');
         """)
         # Seed default watchlist
-        for symbol in DEFAULT_WATCHLIST:
-            conn.execute(
-                "INSERT OR IGNORE INTO watchlist (symbol) VALUES (?)",
-                (symbol,),
-            )
-        conn.commit()
-    finally:
-        conn.close()
+        conn.executemany(
+            "INSERT OR IGNORE INTO watchlist (symbol) VALUES (?)",
+            [(symbol,) for symbol in DEFAULT_WATCHLIST],
+        )
 
 
 # ── Portfolio CRUD ──────────────────────────────────────────────
 
 
+@_timed
 def get_portfolio() -> list[dict]:
     conn = _get_conn()
-    try:
-        rows = conn.execute("SELECT * FROM portfolio ORDER BY added_at DESC").fetchall()
-        return [dict(r) for r in rows]
-    finally:
-        conn.close()
+    rows = conn.execute("SELECT * FROM portfolio ORDER BY added_at DESC").fetchall()
+    return [dict(r) for r in rows]
 
 
+@_timed
 def add_holding(symbol: str, shares: float, avg_cost: float) -> dict:
     conn = _get_conn()
-    try:
+    with conn:
         cursor = conn.execute(
             "INSERT INTO portfolio (symbol, shares, avg_cost) VALUES (?, ?, ?)",
             (symbol.upper(), shares, avg_cost),
         )
-        conn.commit()
         row = conn.execute(
             "SELECT * FROM portfolio WHERE id = ?", (cursor.lastrowid,)
         ).fetchone()
         return dict(row)
-    finally:
-        conn.close()
 
 
+@_timed
 def remove_holding(symbol: str) -> int:
     conn = _get_conn()
-    try:
+    with conn:
         cursor = conn.execute(
             "DELETE FROM portfolio WHERE symbol = ?", (symbol.upper(),)
         )
-        conn.commit()
         return cursor.rowcount
-    finally:
-        conn.close()
+
+
+@_timed
+def get_portfolio_version() -> tuple[int, int]:
+    """(MAX(id), lot count) — changes whenever a lot is added or removed."""
+    conn = _get_conn()
+    row = conn.execute("SELECT COALESCE(MAX(id), 0), COUNT(*) FROM portfolio").fetchone()
+    return row[0], row[1]
+
+
+@_timed
+def add_holdings(holdings: list[tuple[str, float, float]]) -> int:
+    """Insert many (symbol, shares, avg_cost) holdings in one transaction."""
+    conn = _get_conn()
+    with conn:
+        conn.executemany(
+            "INSERT INTO portfolio (symbol, shares, avg_cost) VALUES (?, ?, ?)",
+            [(symbol.upper(), shares, avg_cost) for symbol, shares, avg_cost in holdings],
+        )
+        return len(holdings)
 
 
 # ── Watchlist CRUD ──────────────────────────────────────────────
 
 
+@_timed
 def get_watchlist() -> list[str]:
     conn = _get_conn()
-    try:
-        rows = conn.execute("SELECT symbol FROM watchlist ORDER BY added_at").fetchall()
-        return [r["symbol"] for r in rows]
-    finally:
-        conn.close()
+    rows = conn.execute("SELECT symbol FROM watchlist ORDER BY added_at").fetchall()
+    return [r["symbol"] for r in rows]
 
 
+@_timed
 def add_to_watchlist(symbol: str) -> bool:
     conn = _get_conn()
-    try:
+    with conn:
         conn.execute(
             "INSERT OR IGNORE INTO watchlist (symbol) VALUES (?)",
             (symbol.upper(),),
         )
-        conn.commit()
         return True
-    finally:
-        conn.close()
 
 
+@_timed
+def add_many_to_watchlist(symbols: list[str]) -> int:
+    """Add several symbols in one transaction; returns how many were new."""
+    conn = _get_conn()
+    with conn:
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO watchlist (symbol) VALUES (?)",
+            [(symbol.upper(),) for symbol in symbols],
+        )
+        return conn.total_changes - before
+
+
+@_timed
 def remove_from_watchlist(symbol: str) -> int:
     conn = _get_conn()
-    try:
+    with conn:
         cursor = conn.execute(
             "DELETE FROM watchlist WHERE symbol = ?", (symbol.upper(),)
         )
-        conn.commit()
         return cursor.rowcount
-    finally:
-        conn.close()
 
 
 # ── Alerts CRUD ─────────────────────────────────────────────────
 
 
+@_timed
 def get_alerts(active_only: bool = True) -> list[dict]:
     conn = _get_conn()
-    try:
-        if active_only:
-            rows = conn.execute(
-                "SELECT * FROM alerts WHERE active = 1 ORDER BY created_at DESC"
-            ).fetchall()
-        else:
-            rows = conn.execute(
-                "SELECT * FROM alerts ORDER BY created_at DESC"
-            ).fetchall()
-        return [dict(r) for r in rows]
-    finally:
-        conn.close()
-
-
+    if active_only:
+        rows = conn.execute(
+            "SELECT * FROM alerts WHERE active = 1 ORDER BY created_at DESC"
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT * FROM alerts ORDER BY created_at DESC"
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+@_timed
 def add_alert(symbol: str, condition: str, price: float) -> dict:
     conn = _get_conn()
-    try:
+    with conn:
         cursor = conn.execute(
             "INSERT INTO alerts (symbol, condition, price) VALUES (?, ?, ?)",
             (symbol.upper(), condition, price),
         )
-        conn.commit()
         row = conn.execute(
             "SELECT * FROM alerts WHERE id = ?", (cursor.lastrowid,)
         ).fetchone()
         return dict(row)
-    finally:
-        conn.close()
 
 
-def deactivate_alert(alert_id: int) -> int:
+@_timed
+def deactivate_alerts(alert_ids: list[int]) -> list[int]:
+    """Deactivate several alerts in one transaction; returns the ids this call changed."""
+    conn = _get_conn()
+    changed = []
+    with conn:
+        for i in range(0, len(alert_ids), _MAX_PARAMS):
+            chunk = alert_ids[i:i + _MAX_PARAMS]
+            rows = conn.execute(
+                "UPDATE alerts SET active = 0 "
+                f"WHERE active = 1 AND id IN ({','.join('?' * len(chunk))}) RETURNING id",
+                chunk,
+            ).fetchall()
+            changed.extend(r["id"] for r in rows)
+    return changed
+
+
+@_timed
+def get_alerts_version() -> tuple[int, int]:
+    """(MAX(id), active count) — changes whenever the active alert set does."""
+    conn = _get_conn()
+    row = conn.execute(
+        "SELECT COALESCE(MAX(id), 0), "
+        "(SELECT COUNT(*) FROM alerts WHERE active = 1) FROM alerts"
+    ).fetchone()
+    return row[0], row[1]
+
+
+# ── Bars (OHLCV store) ──────────────────────────────────────────
+
+
+@_timed
+def get_bars(symbol: str, interval: str, start_ts: int | None = None) -> list[dict]:
+    """Bars for a series in time order, optionally from `start_ts` onwards."""
+    conn = _get_conn()
+    rows = conn.execute(
+        "SELECT ts, tz, open, high, low, close, volume FROM bars "
+        "WHERE symbol = ? AND interval = ? AND ts >= ? ORDER BY ts",
+        (symbol.upper(), interval, start_ts if start_ts is not None else -(2**62)),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+@_timed
+def get_last_bars(symbol: str, interval: str, limit: int) -> list[dict]:
+    """The newest `limit` bars of a series, oldest first."""
+    conn = _get_conn()
+    rows = conn.execute(
+        "SELECT ts, tz, open, high, low, close, volume FROM bars "
+        "WHERE symbol = ? AND interval = ? ORDER BY ts DESC LIMIT ?",
+        (symbol.upper(), interval, limit),
+    ).fetchall()
+    return [dict(r) for r in reversed(rows)]
+
+
+def _write_bars(conn: sqlite3.Connection, symbol: str, interval: str, rows: list[tuple]) -> None:
+    conn.executemany(
+        "INSERT OR REPLACE INTO bars "
+        "(symbol, interval, ts, tz, open, high, low, close, volume) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(symbol.upper(), interval, *row) for row in rows],
+    )
+
+
+def _write_bar_sync(conn: sqlite3.Connection, symbol: str, interval: str, period: str, synced_at: float) -> None:
+    conn.execute(
+        "INSERT OR REPLACE INTO bar_sync (symbol, interval, period, synced_at) "
+        "VALUES (?, ?, ?, ?)",
+        (symbol.upper(), interval, period, synced_at),
+    )
+
+
+@_timed
+def upsert_bars(symbol: str, interval: str, rows: list[tuple], period: str, synced_at: float) -> int:
+    """Insert or replace bars given as (ts, tz, open, high, low, close, volume) and mark the series synced."""
+    conn = _get_conn()
+    with conn:
+        _write_bars(conn, symbol, interval, rows)
+        _write_bar_sync(conn, symbol, interval, period, synced_at)
+        return len(rows)
+
+
+@_timed
+def replace_bars(symbol: str, interval: str, rows: list[tuple], period: str, synced_at: float) -> int:
+    """Swap a series for freshly downloaded bars in one transaction.
+
+    Readers in other workers see either the old series or the new one with
+    its sync row, never an empty or unsynced series in between.
+    """
+    conn = _get_conn()
+    with conn:
+        conn.execute("DELETE FROM bars WHERE symbol = ? AND interval = ?", (symbol.upper(), interval))
+        _write_bars(conn, symbol, interval, rows)
+        _write_bar_sync(conn, symbol, interval, period, synced_at)
+        return len(rows)
+
+
+@_timed
+def get_bar_sync(symbol: str, interval: str) -> dict | None:
+    conn = _get_conn()
+    row = conn.execute(
+        "SELECT period, synced_at FROM bar_sync WHERE symbol = ? AND interval = ?",
+        (symbol.upper(), interval),
+    ).fetchone()
+    return dict(row) if row else None
+
+
+@_timed
+def set_bar_sync(symbol: str, interval: str, period: str, synced_at: float) -> None:
+    conn = _get_conn()
+    with conn:
+        _write_bar_sync(conn, symbol, interval, period, synced_at)
+
+
+# ── LLM response cache ──────────────────────────────────────────
+
+
+@_timed
+def get_llm_response(key: str, now: float) -> str | None:
+    conn = _get_conn()
+    row = conn.execute(
+        "SELECT response FROM llm_cache WHERE key = ? AND expires_at > ?",
+        (key, now),
+    ).fetchone()
+    return row["response"] if row else None
+
+
+@_timed
+def put_llm_response(
+    key: str, template: str, response: str, created_at: float, expires_at: float, max_entries: int
+) -> None:
+    """Store a response, dropping expired entries and the oldest beyond `max_entries`."""
+    conn = _get_conn()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, template, response, created_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, template, response, created_at, expires_at),
+        )
+        conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (created_at,))
+        conn.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            "SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (max_entries,),
+        )
+
+
+@_timed
+def count_llm_responses() -> int:
+    conn = _get_conn()
+    return conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+# ── Jobs ────────────────────────────────────────────────────────
+
+_JOB_FIELDS = {"status", "progress", "result", "error", "started_at", "finished_at"}
+
+
+@_timed
+def get_job(job_id: str) -> dict | None:
+    conn = _get_conn()
+    row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return dict(row) if row else None
+
+
+@_timed
+def find_active_job(dedupe_key: str, stale_before: float) -> dict | None:
+    """The queued or running job with this key, unless it is older than `stale_before`."""
+    conn = _get_conn()
+    row = conn.execute(
+        "SELECT * FROM jobs WHERE dedupe_key = ? AND status IN ('queued', 'running') "
+        "AND created_at > ?",
+        (dedupe_key, stale_before),
+    ).fetchone()
+    return dict(row) if row else None
+
+
+@_timed
+def create_job(
+    job_id: str, kind: str, params: str, dedupe_key: str, created_at: float, stale_before: float
+) -> tuple[str, bool]:
+    """Insert a queued job; returns (id, True), or (existing id, False) if one with
+    the same key is already in flight. Stale in-flight jobs are marked failed first."""
+    conn = _get_conn()
+    with conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'Abandoned', finished_at = ? "
+            "WHERE dedupe_key = ? AND status IN ('queued', 'running') AND created_at <= ?",
+            (created_at, dedupe_key, stale_before),
+        )
+        try:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, params, dedupe_key, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, kind, params, dedupe_key, created_at),
+            )
+            return job_id, True
+        except sqlite3.IntegrityError:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE dedupe_key = ? AND status IN ('queued', 'running')",
+                (dedupe_key,),
+            ).fetchone()
+            return row["id"], False
+
+
+@_timed
+def update_job(job_id: str, **fields) -> None:
+    unknown = set(fields) - _JOB_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown job fields: {sorted(unknown)}")
+    conn = _get_conn()
+    with conn:
+        conn.execute(
+            f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?",
+            (*fields.values(), job_id),
+        )
+
+
+@_timed
+def purge_jobs(finished_before: float) -> int:
     conn = _get_conn()
-    try:
+    with conn:
         cursor = conn.execute(
-            "UPDATE alerts SET active = 0 WHERE id = ? AND active = 1",
-            (alert_id,),
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+            (finished_before,),
         )
-        conn.commit()
         return cursor.rowcount
-    finally:
-        conn.close()
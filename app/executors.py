@@ -0,0 +1,93 @@
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when an executor already holds as many tasks as it may queue."""
+
+
+class BoundedExecutor:
+    """Thread pool with a hard cap on running + waiting tasks.
+
+    Blocking work (yfinance, crew.kickoff) is pushed here so async handlers
+    never stall the event loop. Once `max_workers + max_queue` tasks are in
+    flight, submit() fails fast with ExecutorSaturated instead of letting
+    the backlog grow without bound.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._in_flight = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def _release(self, _future: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def submit(self, fn: Callable, *args: Any, **kwargs: Any) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise ExecutorSaturated(f"{self.name} executor is saturated ({self.capacity} tasks in flight)")
+        with self._lock:
+            self._in_flight += 1
+        try:
+            # Carry the caller's context (e.g. per-request timings) onto the pool thread
+            future = self._pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run `fn` on this pool and await its result from async code."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "capacity": self.capacity,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ── Shared executors ────────────────────────────────────────────
+
+# Market data and other short blocking I/O
+io_executor = BoundedExecutor(
+    "io",
+    max_workers=int(os.environ.get("IO_WORKERS", "16")),
+    max_queue=int(os.environ.get("IO_QUEUE", "64")),
+)
+
+# crew.kickoff() — long-running LLM calls, kept apart so they never starve I/O
+llm_executor = BoundedExecutor(
+    "llm",
+    max_workers=int(os.environ.get("LLM_WORKERS", "2")),
+    max_queue=int(os.environ.get("LLM_QUEUE", "4")),
+)
+
+
+def executor_stats() -> dict:
+    return {"io": io_executor.stats(), "llm": llm_executor.stats()}
+
+
+def shutdown_executors() -> None:
+    io_executor.shutdown()
+    llm_executor.shutdown()
@@ -0,0 +1,19 @@
+"""Gunicorn settings, read from the working directory (/app in the image).
+
+Command-line flags in the Dockerfile still take precedence. With
+GUNICORN_PRELOAD=1 the master imports the app and the CrewAI / LiteLLM /
+yfinance stack once before forking, so workers start without paying for
+those imports and share their memory copy-on-write. Left off, each worker
+imports the stack itself in the background after it starts serving.
+"""
+
+import os
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "0") == "1"
+
+
+def on_starting(server):
+    if preload_app:
+        import agents
+
+        agents.load_stack()
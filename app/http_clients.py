@@ -0,0 +1,101 @@
+"""Process-wide HTTP clients, created once per worker and reused by every call.
+
+`async_client()` serves the health probe and Ollama checks; `yf_session()`
+is handed to every yfinance call so market-data requests share keep-alive
+connections instead of re-handshaking. Both are created lazily inside the
+worker process (never before a gunicorn fork) and closed from `lifespan`.
+"""
+
+import importlib.util
+import os
+import threading
+
+import httpx
+
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", "10"))
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("HTTP_MAX_KEEPALIVE", "10"))
+
+# HTTP/2 needs the optional `h2` package (pip install httpx[http2])
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+_lock = threading.Lock()
+_async_client: httpx.AsyncClient | None = None
+_yf_session = None
+_stats = {"requests": 0, "server_errors": 0}
+
+
+async def _count_request(request: httpx.Request) -> None:
+    _stats["requests"] += 1
+
+
+async def _count_response(response: httpx.Response) -> None:
+    if response.status_code >= 500:
+        _stats["server_errors"] += 1
+
+
+def async_client() -> httpx.AsyncClient:
+    """Shared pooled AsyncClient (keep-alive, HTTP/2 when available)."""
+    global _async_client
+    with _lock:
+        if _async_client is None or _async_client.is_closed:
+            _async_client = httpx.AsyncClient(
+                http2=_HTTP2,
+                timeout=HTTP_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                ),
+                event_hooks={"request": [_count_request], "response": [_count_response]},
+            )
+        return _async_client
+
+
+def yf_session():
+    """Shared session for yfinance, or None to let yfinance use its default.
+
+    yfinance requires a curl_cffi session (one of its own dependencies);
+    curl_cffi keeps a connection cache per thread, so the session is safe
+    to share across the io executor threads.
+    """
+    global _yf_session
+    if _yf_session is not None:
+        return _yf_session
+    try:
+        from curl_cffi import requests as curl_requests
+    except ImportError:
+        return None
+    with _lock:
+        if _yf_session is None:
+            _yf_session = curl_requests.Session(impersonate="chrome", timeout=HTTP_TIMEOUT)
+        return _yf_session
+
+
+async def close() -> None:
+    global _async_client, _yf_session
+    with _lock:
+        client, _async_client = _async_client, None
+        session, _yf_session = _yf_session, None
+    if client is not None:
+        await client.aclose()
+    if session is not None:
+        session.close()
+
+
+def pool_stats() -> dict:
+    """Request counters plus live connection counts from the shared AsyncClient."""
+    stats = {
+        "http2": _HTTP2,
+        "max_connections": HTTP_MAX_CONNECTIONS,
+        "max_keepalive": HTTP_MAX_KEEPALIVE,
+        "requests": _stats["requests"],
+        "server_errors": _stats["server_errors"],
+        "yf_session": _yf_session is not None,
+    }
+    client = _async_client
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is not None:
+        stats["connections"] = len(connections)
+        stats["idle_connections"] = sum(1 for c in connections if c.is_idle())
+    return stats
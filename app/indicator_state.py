@@ -0,0 +1,275 @@
+"""Incremental (streaming) versions of the TechnicalAnalysisTool indicators.
+
+An IndicatorState is seeded once from history and then advanced one bar at
+a time in O(1): Wilder averages for RSI and ATR, EMA states for MACD, and
+running sums over a 200-bar ring buffer for the SMAs and Bollinger Bands.
+Values match the `ta` library (and indicators.py) to within 1e-9 relative,
+which bench/check_indicators.py verifies; running sums are re-derived from
+the ring buffer every RESYNC_EVERY bars so floating-point drift cannot
+build up on long-lived states. The watchlist snapshots keep one state per
+symbol and advance it from the bars each history refresh adds.
+"""
+
+import threading
+
+import pandas as pd
+
+import indicators
+
+RESYNC_EVERY = 1000
+
+_RING = 200
+_SMA_WINDOWS = (20, 50, 200)
+_BB_WINDOW = 20
+_RSI_WINDOW = 14
+_ATR_WINDOW = 14
+_FAST, _SLOW, _SIGNAL = 12, 26, 9
+
+# Fields captured before each update so the latest bar can be revised
+_SCALARS = (
+    "bars", "prev_close", "avg_up", "avg_down", "ema_fast", "ema_slow",
+    "signal", "signal_bars", "tr_sum", "atr", "sums", "sq_sum", "base", "pos",
+)
+
+
+class IndicatorState:
+    __slots__ = _SCALARS + ("ring", "_undo", "_since_resync")
+
+    def __init__(self):
+        self.bars = 0
+        self.prev_close = None
+        self.avg_up = 0.0
+        self.avg_down = 0.0
+        self.ema_fast = None
+        self.ema_slow = None
+        self.signal = None
+        self.signal_bars = 0
+        self.tr_sum = 0.0
+        self.atr = None
+        self.sums = (0.0, 0.0, 0.0)
+        self.sq_sum = 0.0
+        self.base = None  # Bollinger variance is summed relative to this close
+        self.pos = 0
+        self.ring = [0.0] * _RING
+        self._undo = None
+        self._since_resync = 0
+
+    @classmethod
+    def from_history(cls, hist: pd.DataFrame) -> "IndicatorState":
+        """Replay an OHLCV history (oldest first) into a fresh state."""
+        state = cls()
+        for high, low, close in zip(hist["High"], hist["Low"], hist["Close"]):
+            state.update(float(high), float(low), float(close))
+        return state
+
+    # ── Bar updates ─────────────────────────────────────────────
+
+    def update(self, high: float, low: float, close: float) -> None:
+        """Append a completed or in-progress bar."""
+        self._undo = (tuple(getattr(self, f) for f in _SCALARS), self.ring[self.pos], self._since_resync)
+        n = self.bars
+
+        # RSI — the first bar contributes a zero change, like ta
+        change = 0.0 if self.prev_close is None else close - self.prev_close
+        self.avg_up += (max(change, 0.0) - self.avg_up) / _RSI_WINDOW
+        self.avg_down += (max(-change, 0.0) - self.avg_down) / _RSI_WINDOW
+
+        # MACD
+        if n == 0:
+            self.ema_fast = self.ema_slow = close
+        else:
+            self.ema_fast += 2.0 / (_FAST + 1) * (close - self.ema_fast)
+            self.ema_slow += 2.0 / (_SLOW + 1) * (close - self.ema_slow)
+        if n + 1 >= _SLOW:
+            line = self.ema_fast - self.ema_slow
+            if self.signal is None:
+                self.signal = line
+            else:
+                self.signal += 2.0 / (_SIGNAL + 1) * (line - self.signal)
+            self.signal_bars += 1
+
+        # ATR — seeded with the mean true range of the first window
+        if self.prev_close is None:
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        if n + 1 < _ATR_WINDOW:
+            self.tr_sum += tr
+        elif n + 1 == _ATR_WINDOW:
+            self.atr = (self.tr_sum + tr) / _ATR_WINDOW
+        else:
+            self.atr += (tr - self.atr) / _ATR_WINDOW
+
+        # SMAs and Bollinger — running sums over the ring buffer
+        if self.base is None:
+            self.base = close
+        sums = list(self.sums)
+        for i, window in enumerate(_SMA_WINDOWS):
+            sums[i] += close
+            if n >= window:
+                sums[i] -= self.ring[(self.pos - window) % _RING]
+        self.sums = tuple(sums)
+        dev = close - self.base
+        self.sq_sum += dev * dev
+        if n >= _BB_WINDOW:
+            old = self.ring[(self.pos - _BB_WINDOW) % _RING] - self.base
+            self.sq_sum -= old * old
+
+        self.ring[self.pos] = close
+        self.pos = (self.pos + 1) % _RING
+        self.prev_close = close
+        self.bars = n + 1
+
+        self._since_resync += 1
+        if self._since_resync >= RESYNC_EVERY:
+            self._resync()
+
+    def revise(self, high: float, low: float, close: float) -> None:
+        """Replace the most recent bar (e.g. an intraday bar still forming)."""
+        if self._undo is None:
+            raise ValueError("No bar to revise")
+        scalars, ring_value, since_resync = self._undo
+        for field, value in zip(_SCALARS, scalars):
+            setattr(self, field, value)
+        self.ring[self.pos] = ring_value
+        self._since_resync = since_resync
+        self.update(high, low, close)
+
+    def _resync(self) -> None:
+        """Recompute the running sums exactly, re-centring the variance on the last close."""
+        def last(k: int) -> list[float]:
+            k = min(k, self.bars)
+            return [self.ring[(self.pos - 1 - i) % _RING] for i in range(k)]
+
+        self.sums = tuple(sum(last(w)) for w in _SMA_WINDOWS)
+        self.base = self.prev_close
+        self.sq_sum = sum((x - self.base) ** 2 for x in last(_BB_WINDOW))
+        self._since_resync = 0
+
+    # ── Readout ─────────────────────────────────────────────────
+
+    def values(self) -> dict[str, float | None]:
+        """Unrounded indicator values keyed like TechnicalAnalysisTool; None until warmed up."""
+        n = self.bars
+        out = dict.fromkeys(indicators.INDICATOR_KEYS)
+        if n == 0:
+            return out
+
+        if n >= _RSI_WINDOW:
+            out["rsi_14"] = 100.0 if self.avg_down == 0 else 100.0 - 100.0 / (1.0 + self.avg_up / self.avg_down)
+        if n >= _SLOW:
+            out["macd"] = self.ema_fast - self.ema_slow
+        if self.signal_bars >= _SIGNAL:
+            out["macd_signal"] = self.signal
+            out["macd_histogram"] = out["macd"] - self.signal
+        for window, total in zip(_SMA_WINDOWS, self.sums):
+            if n >= window:
+                out[f"sma_{window}"] = total / window
+        if n >= _BB_WINDOW:
+            mean_dev = self.sums[0] / _BB_WINDOW - self.base
+            std = max(self.sq_sum / _BB_WINDOW - mean_dev * mean_dev, 0.0) ** 0.5
+            out["bollinger_middle"] = out["sma_20"]
+            out["bollinger_upper"] = out["sma_20"] + 2 * std
+            out["bollinger_lower"] = out["sma_20"] - 2 * std
+        if self.atr is not None:
+            out["atr_14"] = self.atr
+        return out
+
+    def previous_close(self) -> float | None:
+        """Close of the bar before the latest one."""
+        return self.ring[(self.pos - 2) % _RING] if self.bars >= 2 else None
+
+    def snapshot(self, symbol: str) -> dict:
+        """technical_snapshot-shaped dict for the current state."""
+        if self.bars == 0:
+            return {"error": f"No data found for {symbol}"}
+        current_price = round(self.prev_close, 2)
+        ind = {k: None if v is None else round(v, 2) for k, v in self.values().items()}
+        return {
+            "symbol": symbol.upper(),
+            "current_price": current_price,
+            "indicators": ind,
+            "signal_summary": indicators.signal_summary(current_price, ind),
+        }
+
+
+class IndicatorStates:
+    """Thread-safe per-symbol registry of IndicatorState objects."""
+
+    def __init__(self):
+        self._states: dict[str, IndicatorState] = {}
+        self._last_bar: dict[str, pd.Timestamp] = {}  # time of the newest bar each state has seen
+        self._lock = threading.Lock()
+        self._seeds = 0
+        self._bars = 0
+
+    def seed(self, symbol: str, hist: pd.DataFrame) -> IndicatorState:
+        state = IndicatorState.from_history(hist)
+        with self._lock:
+            self._states[symbol.upper()] = state
+            self._last_bar.pop(symbol.upper(), None)
+        return state
+
+    def get(self, symbol: str) -> IndicatorState | None:
+        with self._lock:
+            return self._states.get(symbol.upper())
+
+    def update(self, symbol: str, high: float, low: float, close: float, revise: bool = False) -> dict:
+        """Advance (or revise the last bar of) a seeded symbol and return its snapshot."""
+        with self._lock:
+            state = self._states[symbol.upper()]
+            if revise:
+                state.revise(high, low, close)
+            else:
+                state.update(high, low, close)
+            return state.snapshot(symbol)
+
+    def sync(self, symbol: str, hist: pd.DataFrame) -> dict:
+        """Bring a symbol's state up to date with its daily history and return its snapshot.
+
+        The newest bar the state has seen is revised (it may still have been
+        forming) and only the bars after it are applied, so a refresh costs
+        O(new bars). The state is reseeded from `hist` when that bar is gone
+        or the close before it changed (e.g. a dividend re-adjusted the series).
+        """
+        key = symbol.upper()
+        if hist.empty:
+            self.drop(key)
+            return {"error": f"No data found for {symbol}"}
+        index = hist.index
+        high, low, close = (hist[f].to_numpy(dtype=float) for f in ("High", "Low", "Close"))
+        with self._lock:
+            state = self._states.get(key)
+            start = self._resume_at(state, self._last_bar.get(key), index, close)
+            if start is None:
+                state = self._states[key] = IndicatorState.from_history(hist)
+                self._seeds += 1
+            else:
+                state.revise(high[start], low[start], close[start])
+                for i in range(start + 1, len(close)):
+                    state.update(high[i], low[i], close[i])
+                self._bars += len(close) - start
+            self._last_bar[key] = index[-1]
+            return state.snapshot(symbol)
+
+    @staticmethod
+    def _resume_at(state: IndicatorState | None, last_bar, index: pd.Index, close) -> int | None:
+        """Position in `index` of the state's newest bar, or None if it must be reseeded."""
+        if state is None or last_bar is None:
+            return None
+        pos = int(index.searchsorted(last_bar))
+        if pos >= len(index) or index[pos] != last_bar:
+            return None
+        prev = state.previous_close()
+        if prev is not None and (pos == 0 or abs(close[pos - 1] - prev) > 1e-9 * max(abs(prev), 1.0)):
+            return None
+        return pos
+
+    def drop(self, symbol: str) -> None:
+        with self._lock:
+            self._states.pop(symbol.upper(), None)
+            self._last_bar.pop(symbol.upper(), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"symbols": len(self._states), "seeds": self._seeds, "bars_applied": self._bars}
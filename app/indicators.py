@@ -0,0 +1,273 @@
+"""Vectorized technical indicators over many symbols at once.
+
+Every function works on a (bars x symbols) float64 panel. Symbols are
+right-aligned by bar position (newest bar in the last row) and shorter
+histories are padded with NaN at the top, so each column produces exactly
+what the per-symbol `ta` calls in TechnicalAnalysisTool produce — the
+recursions are computed once per block of bars for all columns together.
+"""
+
+import numpy as np
+import pandas as pd
+
+from metrics import timer
+
+# Bars per closed-form EMA block; keeps decay**-k well inside float64 range
+_EMA_BLOCK = 64
+
+INDICATOR_KEYS = [
+    "rsi_14",
+    "macd",
+    "macd_signal",
+    "macd_histogram",
+    "sma_20",
+    "sma_50",
+    "sma_200",
+    "bollinger_upper",
+    "bollinger_middle",
+    "bollinger_lower",
+    "atr_14",
+]
+
+
+# ── Panel helpers ───────────────────────────────────────────────
+
+
+def build_panel(histories: dict, field: str, bars: int | None = None) -> np.ndarray:
+    """Right-align one OHLCV field from several histories into a (bars x symbols) array.
+
+    Histories are DataFrames or memory-mapped bar_columns.BarColumns; each
+    column is read straight into the panel.
+    """
+    length = max((len(h) for h in histories.values()), default=0)
+    if bars is not None:
+        length = min(length, bars)
+    panel = np.full((length, len(histories)), np.nan)
+    for col, hist in enumerate(histories.values()):
+        values = np.asarray(hist[field])[-length:] if length else []
+        if len(values):
+            panel[length - len(values):, col] = values
+    return panel
+
+
+def _first_valid(x: np.ndarray) -> np.ndarray:
+    valid = ~np.isnan(x)
+    return np.where(valid.any(axis=0), valid.argmax(axis=0), x.shape[0])
+
+
+def _fill(x: np.ndarray, start: np.ndarray) -> np.ndarray:
+    """Back-fill rows above `start` with the value at `start`, forward-fill gaps below."""
+    rows = np.arange(x.shape[0])[:, None]
+    cols = np.arange(x.shape[1])
+    seed = x[np.minimum(start, x.shape[0] - 1), cols]
+    out = np.where(rows < start, seed, x)
+    idx = np.where(np.isnan(out), 0, rows)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return out[idx, cols]
+
+
+def _scan(x: np.ndarray, alpha: float) -> np.ndarray:
+    """y[t] = (1 - alpha) * y[t-1] + alpha * x[t], with y[0] = x[0]; x has no NaNs."""
+    decay = 1.0 - alpha
+    out = np.empty_like(x)
+    prev = x[0]
+    for start in range(0, x.shape[0], _EMA_BLOCK):
+        block = x[start:start + _EMA_BLOCK]
+        k = np.arange(block.shape[0])[:, None]
+        powers = decay ** k
+        acc = np.cumsum(block / powers, axis=0)
+        out[start:start + block.shape[0]] = decay * powers * prev + alpha * powers * acc
+        prev = out[start + block.shape[0] - 1]
+    return out
+
+
+def _ewm(x: np.ndarray, alpha: float, min_periods: int) -> np.ndarray:
+    """Column-wise `Series.ewm(alpha=alpha, adjust=False, min_periods=...).mean()`."""
+    if x.shape[0] == 0:
+        return x.copy()
+    start = _first_valid(x)
+    y = _scan(_fill(x, start), alpha)
+    rows = np.arange(x.shape[0])[:, None]
+    y[rows - start + 1 < min_periods] = np.nan
+    y[rows < start] = np.nan
+    return y
+
+
+def _rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    """Trailing sum over `window` bars; NaN until the window is full of data."""
+    valid = ~np.isnan(x)
+    cs = np.cumsum(np.where(valid, x, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+    out = cs.copy()
+    out[window:] -= cs[:-window]
+    n = counts.copy()
+    n[window:] -= counts[:-window]
+    out[n < window] = np.nan
+    return out
+
+
+# ── Indicators ──────────────────────────────────────────────────
+
+
+def sma(close: np.ndarray, window: int) -> np.ndarray:
+    return _rolling_sum(close, window) / window
+
+
+def rsi(close: np.ndarray, window: int = 14) -> np.ndarray:
+    diff = np.full_like(close, np.nan)
+    diff[1:] = close[1:] - close[:-1]
+    # Like ta, the undefined first change counts as 0; only padding stays NaN
+    pad = np.where(np.isnan(close), np.nan, 0.0)
+    with np.errstate(invalid="ignore"):
+        up = np.where(diff > 0, diff, pad)
+        down = np.where(diff < 0, -diff, pad)
+    ema_up = _ewm(up, 1.0 / window, window)
+    ema_down = _ewm(down, 1.0 / window, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(ema_down == 0, 100.0, 100.0 - 100.0 / (1.0 + ema_up / ema_down))
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(macd, signal, histogram) with ta's span-based EMAs."""
+    line = _ewm(close, 2.0 / (fast + 1), fast) - _ewm(close, 2.0 / (slow + 1), slow)
+    sig = _ewm(line, 2.0 / (signal + 1), signal)
+    return line, sig, line - sig
+
+
+def bollinger(close: np.ndarray, window: int = 20, window_dev: float = 2) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(upper, middle, lower) using the population std deviation, like ta."""
+    # Shift each column by its first value so the variance sums don't cancel
+    base = close[np.minimum(_first_valid(close), close.shape[0] - 1), np.arange(close.shape[1])]
+    shifted = close - base
+    mean = _rolling_sum(shifted, window) / window
+    var = _rolling_sum(shifted * shifted, window) / window - mean * mean
+    std = np.sqrt(np.maximum(var, 0.0))
+    middle = mean + base
+    return middle + window_dev * std, middle, middle - window_dev * std
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int = 14) -> np.ndarray:
+    """Wilder ATR seeded with the mean true range of the first `window` bars."""
+    prev_close = np.full_like(close, np.nan)
+    prev_close[1:] = close[:-1]
+    with np.errstate(invalid="ignore"):
+        tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+    rows = np.arange(tr.shape[0])[:, None]
+    seed_row = _first_valid(tr) + window - 1
+    seeds = _rolling_sum(tr, window)[np.minimum(seed_row, tr.shape[0] - 1), np.arange(tr.shape[1])] / window
+    x = np.where(rows == seed_row, seeds, tr)
+    out = _scan(_fill(x, seed_row), 1.0 / window)
+    out[rows < seed_row] = np.nan
+    out[:, seed_row >= tr.shape[0]] = np.nan
+    return out
+
+
+def compute_panel(close: np.ndarray, high: np.ndarray, low: np.ndarray) -> dict[str, np.ndarray]:
+    """All TechnicalAnalysisTool indicators as (bars x symbols) series."""
+    with timer("indicator.rsi"):
+        rsi_14 = rsi(close)
+    with timer("indicator.macd"):
+        macd_line, macd_sig, macd_hist = macd(close)
+    with timer("indicator.sma"):
+        sma_20, sma_50, sma_200 = sma(close, 20), sma(close, 50), sma(close, 200)
+    with timer("indicator.bollinger"):
+        bb_upper, bb_middle, bb_lower = bollinger(close)
+    with timer("indicator.atr"):
+        atr_14 = atr(high, low, close)
+    return {
+        "rsi_14": rsi_14,
+        "macd": macd_line,
+        "macd_signal": macd_sig,
+        "macd_histogram": macd_hist,
+        "sma_20": sma_20,
+        "sma_50": sma_50,
+        "sma_200": sma_200,
+        "bollinger_upper": bb_upper,
+        "bollinger_middle": bb_middle,
+        "bollinger_lower": bb_lower,
+        "atr_14": atr_14,
+    }
+
+
+# ── Signals ─────────────────────────────────────────────────────
+
+
+def signal_summary(current_price: float, ind: dict) -> str:
+    """Plain-English signals from rounded indicator values; None values are skipped."""
+    rsi_val = ind["rsi_14"]
+    signals = []
+    if rsi_val is not None:
+        if rsi_val > 70:
+            signals.append(f"RSI({rsi_val}) indicates OVERBOUGHT")
+        elif rsi_val < 30:
+            signals.append(f"RSI({rsi_val}) indicates OVERSOLD")
+        else:
+            signals.append(f"RSI({rsi_val}) is neutral")
+
+    if ind["macd"] is not None and ind["macd_signal"] is not None:
+        if ind["macd"] > ind["macd_signal"]:
+            signals.append("MACD is above signal line (bullish)")
+        else:
+            signals.append("MACD is below signal line (bearish)")
+
+    if ind["sma_50"] is not None and ind["sma_200"] is not None:
+        if ind["sma_50"] > ind["sma_200"]:
+            signals.append("Golden cross: SMA50 above SMA200 (bullish)")
+        else:
+            signals.append("Death cross: SMA50 below SMA200 (bearish)")
+
+    if ind["bollinger_upper"] is not None and ind["bollinger_lower"] is not None:
+        if current_price > ind["bollinger_upper"]:
+            signals.append("Price above upper Bollinger Band (overbought)")
+        elif current_price < ind["bollinger_lower"]:
+            signals.append("Price below lower Bollinger Band (oversold)")
+
+    return "; ".join(signals) if signals else "Insufficient data for signals"
+
+
+# ── Batch entry point ───────────────────────────────────────────
+
+
+def _rounded(value: float) -> float | None:
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+def batch_technicals(
+    histories: dict[str, pd.DataFrame], full: bool = False
+) -> dict[str, dict]:
+    """Latest indicators for every symbol in one vectorized pass.
+
+    Returns {symbol: technical_snapshot-shaped dict}. With `full=True` each
+    entry also carries "series", a DataFrame of every indicator indexed by
+    that symbol's own bar dates.
+    """
+    usable = {sym: h for sym, h in histories.items() if not h.empty}
+    results = {
+        sym: {"error": f"No data found for {sym}"}
+        for sym in histories
+        if sym not in usable
+    }
+    if not usable:
+        return results
+
+    with timer("indicator.panel"):
+        close, high, low = (build_panel(usable, field) for field in ("Close", "High", "Low"))
+    series = compute_panel(close, high, low)
+
+    for col, (sym, hist) in enumerate(usable.items()):
+        current_price = round(float(close[-1, col]), 2)
+        ind = {key: _rounded(series[key][-1, col]) for key in INDICATOR_KEYS}
+        results[sym] = {
+            "symbol": sym.upper(),
+            "current_price": current_price,
+            "indicators": ind,
+            "signal_summary": signal_summary(current_price, ind),
+        }
+        if full:
+            n = len(hist)
+            results[sym]["series"] = pd.DataFrame(
+                {key: series[key][-n:, col] for key in INDICATOR_KEYS},
+                index=hist.index[-n:],
+            )
+    return results
@@ -0,0 +1,145 @@
+"""Background jobs for the AI endpoints.
+
+Submitting returns a job id at once; the job runs in this worker's event
+loop, at most JOB_WORKERS at a time, and its status, progress and result
+are stored in the SQLite `jobs` table so any worker can answer
+GET /jobs/{id}. An identical job still queued or running (same kind and
+parameters, in any worker) is returned instead of starting another.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Awaitable, Callable
+
+import database
+from executors import ExecutorSaturated
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", os.environ.get("LLM_WORKERS", "2")))
+JOB_QUEUE = int(os.environ.get("JOB_QUEUE", "32"))
+JOB_TIMEOUT = float(os.environ.get("JOB_TIMEOUT", "900"))
+JOB_RETENTION = float(os.environ.get("JOB_RETENTION", "86400"))
+
+# Seconds between attempts while the llm/io executors are full
+_SATURATED_RETRY = 2.0
+
+# In-flight jobs older than this (queue wait + run) are treated as abandoned
+_STALE_AFTER = JOB_TIMEOUT * 2
+
+_current_job: contextvars.ContextVar[str | None] = contextvars.ContextVar("current_job", default=None)
+
+
+def report_progress(stage: str) -> None:
+    """Record the current job's stage; a no-op outside a job."""
+    job_id = _current_job.get()
+    if job_id is not None:
+        database.update_job(job_id, progress=stage)
+
+
+async def _call_with_backoff(handler: Callable[[dict], Awaitable[dict]], params: dict) -> dict:
+    """Run a handler, waiting (not failing) while the executors are saturated."""
+    while True:
+        try:
+            return await handler(params)
+        except ExecutorSaturated:
+            report_progress("waiting for capacity")
+            await asyncio.sleep(_SATURATED_RETRY)
+
+
+def _dedupe_key(kind: str, params: dict) -> str:
+    return hashlib.sha256(f"{kind}:{json.dumps(params, sort_keys=True)}".encode()).hexdigest()
+
+
+class JobQueue:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._handlers: dict[str, Callable[[dict], Awaitable[dict]]] = {}
+        self._slots = asyncio.Semaphore(workers)
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._submitted = 0
+        self._merged = 0
+        self._rejected = 0
+
+    def register(self, kind: str, handler: Callable[[dict], Awaitable[dict]]) -> None:
+        self._handlers[kind] = handler
+
+    def submit(self, kind: str, params: dict) -> tuple[dict, bool]:
+        """(job, merged) — merged is True when an identical in-flight job was reused.
+
+        Raises ExecutorSaturated when this worker already holds
+        `max_pending` queued or running jobs.
+        """
+        if kind not in self._handlers:
+            raise KeyError(kind)
+        key = _dedupe_key(kind, params)
+        now = time.time()
+
+        existing = database.find_active_job(key, now - _STALE_AFTER)
+        if existing is not None:
+            self._merged += 1
+            return existing, True
+        if len(self._tasks) >= self.max_pending:
+            self._rejected += 1
+            raise ExecutorSaturated(f"job queue is full ({self.max_pending} jobs pending)")
+
+        job_id, created = database.create_job(
+            uuid.uuid4().hex, kind, json.dumps(params), key, now, now - _STALE_AFTER
+        )
+        if not created:
+            # Another worker inserted the same job first
+            self._merged += 1
+            return database.get_job(job_id), True
+
+        self._submitted += 1
+        self._tasks[job_id] = asyncio.create_task(self._run(job_id, kind, params))
+        database.purge_jobs(now - JOB_RETENTION)
+        return database.get_job(job_id), False
+
+    async def _run(self, job_id: str, kind: str, params: dict) -> None:
+        _current_job.set(job_id)
+        try:
+            async with self._slots:
+                database.update_job(job_id, status="running", progress="started", started_at=time.time())
+                result = await asyncio.wait_for(
+                    _call_with_backoff(self._handlers[kind], params), timeout=JOB_TIMEOUT
+                )
+            database.update_job(
+                job_id, status="done", progress="done", result=json.dumps(result), finished_at=time.time()
+            )
+        except asyncio.CancelledError:
+            database.update_job(job_id, status="failed", progress="failed", error="Cancelled", finished_at=time.time())
+            raise
+        except asyncio.TimeoutError:
+            database.update_job(
+                job_id, status="failed", progress="failed", error=f"Timed out after {JOB_TIMEOUT:g}s", finished_at=time.time()
+            )
+        except Exception as exc:
+            error = getattr(exc, "detail", None) or str(exc) or type(exc).__name__
+            database.update_job(job_id, status="failed", progress="failed", error=str(error), finished_at=time.time())
+        finally:
+            self._tasks.pop(job_id, None)
+
+    async def shutdown(self) -> None:
+        """Cancel this worker's pending jobs; they are recorded as failed."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": len(self._tasks),
+            "submitted": self._submitted,
+            "merged": self._merged,
+            "rejected": self._rejected,
+        }
+
+
+job_queue = JobQueue(JOB_WORKERS, JOB_QUEUE)
@@ -0,0 +1,85 @@
+"""SQLite-backed cache of Strategy Reporter outputs.
+
+Keys hash the prompt template, the provider/model and the task fields with
+every number rounded to LLM_CACHE_DIGITS significant digits, so repeat
+requests over effectively unchanged data skip the LLM entirely. Entries
+live in the `llm_cache` table, shared by all workers and kept across
+restarts.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import database
+from agents import REPORT_TEMPLATES, get_provider_info
+
+LLM_CACHE = os.environ.get("LLM_CACHE", "1") != "0"
+LLM_CACHE_TTL = float(os.environ.get("LLM_CACHE_TTL", "900"))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "500"))
+LLM_CACHE_DIGITS = int(os.environ.get("LLM_CACHE_DIGITS", "3"))
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+_lock = threading.Lock()
+_counts = {"hits": 0, "misses": 0, "stores": 0}
+
+
+def _round_number(match: re.Match) -> str:
+    return f"{float(match.group()):.{LLM_CACHE_DIGITS}g}"
+
+
+def normalize(text: str) -> str:
+    """Round every number in `text` to LLM_CACHE_DIGITS significant digits."""
+    return _NUMBER.sub(_round_number, text)
+
+
+def cache_key(template: str, **fields: str) -> str:
+    info = get_provider_info()
+    payload = json.dumps(
+        {
+            "template": template,
+            "text": REPORT_TEMPLATES[template],
+            "provider": info["provider"],
+            "model": info["model"],
+            "fields": {k: normalize(v) for k, v in sorted(fields.items())},
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _count(name: str) -> None:
+    with _lock:
+        _counts[name] += 1
+
+
+def get(key: str) -> str | None:
+    if not LLM_CACHE:
+        return None
+    response = database.get_llm_response(key, time.time())
+    _count("hits" if response is not None else "misses")
+    return response
+
+
+def put(key: str, template: str, response: str) -> None:
+    if not LLM_CACHE or not response.strip():
+        return
+    now = time.time()
+    database.put_llm_response(key, template, response, now, now + LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES)
+    _count("stores")
+
+
+def stats() -> dict:
+    with _lock:
+        counts = dict(_counts)
+    return {
+        "enabled": LLM_CACHE,
+        "ttl": LLM_CACHE_TTL,
+        "max_entries": LLM_CACHE_MAX_ENTRIES,
+        "entries": database.count_llm_responses() if LLM_CACHE else 0,
+        **counts,
+    }
@@ -1,71 +1,133 @@
+import asyncio
+import contextvars
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from pathlib import Path
 
-import httpx
-import yfinance as yf
-from crewai import Crew, Task, Process
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
+import backtest
+import bar_columns
 import database
-from agents import strategy_reporter, get_provider_info, OLLAMA_URL, LLM_PROVIDER
-from tools import FetchStockDataTool, TechnicalAnalysisTool, FetchNewsTool
+import http_clients
+import indicators
+import llm_cache
+import market_data
+import metrics
+import portfolio
+import refresh_policy
+import screener
+from cache import SingleFlight
+from alert_engine import ALERT_ENGINE, engine as alert_engine
+from snapshots import SNAPSHOTS, snapshots
+from jobs import job_queue, report_progress
+from agents import (
+    REPORTER_WARMUP,
+    reporter_pool,
+    stream_reporter,
+    report_task,
+    get_provider_info,
+    OLLAMA_URL,
+    LLM_PROVIDER,
+)
+from executors import (
+    ExecutorSaturated,
+    executor_stats,
+    io_executor,
+    llm_executor,
+    shutdown_executors,
+)
+from snapshot_builders import price_snapshot, news_snapshot
 from models import (
     AnalysisResponse,
     AlertCheckResponse,
     AlertCreateRequest,
+    BacktestRequest,
+    BacktestResponse,
     BriefingResponse,
     HealthResponse,
+    JobResponse,
     PortfolioAddRequest,
     PortfolioRemoveRequest,
     PortfolioResponse,
+    ScreenRequest,
+    ScreenResponse,
     SymbolData,
     WatchlistModifyRequest,
 )
 
 load_dotenv()
 
-# ── Shared tool instances for direct data fetching ──────────────
+# ── Direct data fetching (no LLM) ───────────────────────────────
 
-_stock_tool = FetchStockDataTool()
-_ta_tool = TechnicalAnalysisTool()
-_news_tool = FetchNewsTool()
+# Symbols fetched at once by multi-symbol endpoints, and how long each may take
+FETCH_CONCURRENCY = int(os.environ.get("FETCH_CONCURRENCY", "8"))
+SYMBOL_FETCH_TIMEOUT = float(os.environ.get("SYMBOL_FETCH_TIMEOUT", "20"))
 
+# Two upstream calls (history + news) per in-flight symbol
+_fetch_pool = ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY * 2, thread_name_prefix="fetch")
 
-def _fetch_symbol_data(symbol: str, period: str = "1mo") -> SymbolData:
-    """Fetch real data for a symbol directly from tools (no LLM)."""
-    # Price data
+# Coalesces identical in-flight _fetch_symbol_data calls
+_symbol_flight = SingleFlight()
+
+
+def _download_symbol(symbol: str, period: str = "1mo") -> tuple:
+    """(price_hist, ta_hist, raw_news) for a symbol; failed parts come back None / [].
+
+    One history download feeds both the price view and the indicators, and
+    it runs in parallel with the news fetch. Must not be called from a
+    `_fetch_pool` thread (it submits to that pool).
+    """
+    hist_future = _fetch_pool.submit(contextvars.copy_context().run, market_data.history_views, symbol, period)
+    news_future = _fetch_pool.submit(contextvars.copy_context().run, market_data.get_news, symbol)
+
+    price_hist = ta_hist = None
+    try:
+        price_hist, ta_hist = hist_future.result()
+    except Exception:
+        pass
+
+    try:
+        raw_news = news_future.result()
+    except Exception:
+        raw_news = []
+
+    return price_hist, ta_hist, raw_news
+
+
+def _build_symbol_data(symbol: str, price_hist, ta_raw: dict | None, raw_news: list) -> SymbolData:
+    """Assemble SymbolData from downloaded parts and a technicals result."""
+    # Price data (.info is not needed for the fields SymbolData carries)
     price = None
     change_pct = None
     try:
-        stock_raw = json.loads(_stock_tool._run(symbol=symbol, period=period))
-        if "error" not in stock_raw:
-            price = stock_raw.get("current_price")
-            change_pct = stock_raw.get("change_pct")
+        if price_hist is not None:
+            stock_raw = price_snapshot(symbol, price_hist, {})
+            if "error" not in stock_raw:
+                price = stock_raw.get("current_price")
+                change_pct = stock_raw.get("change_pct")
     except Exception:
         pass
 
     # Technicals
     technicals = {}
     signal_summary = ""
-    try:
-        ta_raw = json.loads(_ta_tool._run(symbol=symbol))
-        if "error" not in ta_raw:
-            technicals = ta_raw.get("indicators", {})
-            signal_summary = ta_raw.get("signal_summary", "")
-    except Exception:
-        pass
+    if ta_raw and "error" not in ta_raw:
+        technicals = ta_raw.get("indicators", {})
+        signal_summary = ta_raw.get("signal_summary", "")
 
     # News
     news = []
     try:
-        news_raw = json.loads(_news_tool._run(symbol=symbol))
+        news_raw = news_snapshot(symbol, raw_news)
         if "error" not in news_raw:
             news = news_raw.get("articles", [])
     except Exception:
@@ -81,6 +143,89 @@ def _fetch_symbol_data(symbol: str, period: str = "1mo") -> SymbolData:
     )
 
 
+def _batch_technicals(ta_hists: dict) -> dict[str, dict]:
+    """Indicators for many symbols in one vectorized pass; {} on failure."""
+    ta_hists = {sym: h for sym, h in ta_hists.items() if h is not None}
+    try:
+        return indicators.batch_technicals(ta_hists)
+    except Exception:
+        return {}
+
+
+def _fetch_symbol_data(symbol: str, period: str = "1mo") -> SymbolData:
+    """Fetch real data for a symbol directly (no LLM).
+
+    Concurrent callers for the same symbol and period share one fetch.
+    """
+    def fetch() -> SymbolData:
+        price_hist, ta_hist, raw_news = _download_symbol(symbol, period)
+        ta_raw = _batch_technicals({symbol: ta_hist}).get(symbol)
+        return _build_symbol_data(symbol, price_hist, ta_raw, raw_news)
+
+    return _symbol_flight.do(("symbol", symbol.upper(), period), fetch)
+
+
+async def _fetch_many_symbol_data(symbols: list[str], period: str = "1mo") -> list[SymbolData]:
+    """Fetch several symbols concurrently, at most FETCH_CONCURRENCY at a time.
+
+    A symbol that exceeds SYMBOL_FETCH_TIMEOUT comes back empty instead of
+    holding up the rest. Indicators for all symbols are then computed in a
+    single batch. Results keep the input order.
+    """
+    sem = asyncio.Semaphore(FETCH_CONCURRENCY)
+
+    async def download_one(sym: str) -> tuple:
+        async with sem:
+            try:
+                return await asyncio.wait_for(
+                    io_executor.run(_download_symbol, sym, period),
+                    timeout=SYMBOL_FETCH_TIMEOUT,
+                )
+            except Exception:
+                return None, None, []
+
+    downloads = await asyncio.gather(*(download_one(sym) for sym in symbols))
+    ta_results = await io_executor.run(
+        _batch_technicals, {sym: d[1] for sym, d in zip(symbols, downloads)}
+    )
+    return [
+        _build_symbol_data(sym, price_hist, ta_results.get(sym), raw_news)
+        for sym, (price_hist, _, raw_news) in zip(symbols, downloads)
+    ]
+
+
+async def _iter_symbol_data(symbols: list[str], period: str = "1mo"):
+    """Yield each symbol's SymbolData as soon as it is ready (completion order).
+
+    Same concurrency and timeout as _fetch_many_symbol_data, but indicators
+    are computed per symbol so nothing waits for the slowest download.
+    """
+    sem = asyncio.Semaphore(FETCH_CONCURRENCY)
+
+    async def fetch_one(sym: str) -> SymbolData:
+        async with sem:
+            try:
+                return await asyncio.wait_for(
+                    io_executor.run(_fetch_symbol_data, sym, period),
+                    timeout=SYMBOL_FETCH_TIMEOUT,
+                )
+            except Exception:
+                return SymbolData(symbol=sym.upper())
+
+    for next_done in asyncio.as_completed([fetch_one(sym) for sym in symbols]):
+        yield await next_done
+
+
+async def _watchlist_data(symbols: list[str]) -> list[SymbolData]:
+    """Fresh watchlist snapshots where available, one concurrent live fetch for the rest."""
+    found = snapshots.get_many(symbols)
+    missing = [sym for sym in symbols if sym.upper() not in found]
+    if missing:
+        for data in await _fetch_many_symbol_data(missing):
+            found[data.symbol] = data
+    return [found[sym.upper()] for sym in symbols]
+
+
 def _symbol_data_to_text(data: SymbolData) -> str:
     """Convert SymbolData to plain text for LLM context."""
     lines = [f"## {data.symbol}"]
@@ -106,10 +251,108 @@ def _symbol_data_to_text(data: SymbolData) -> str:
     return "\n".join(lines)
 
 
+async def _stream_report(description: str, expected_output: str):
+    """Async iterator over the reporter's tokens, produced on the llm executor.
+
+    Raises ExecutorSaturated before the first token if the executor is full.
+    Stopping iteration early (client disconnect) stops the producer too.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def produce() -> None:
+        tokens = stream_reporter(description, expected_output)
+        try:
+            for text in tokens:
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, text)
+        except Exception as exc:
+            loop.call_soon_threadsafe(queue.put_nowait, exc)
+        finally:
+            tokens.close()
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    llm_executor.submit(produce)
+    try:
+        while (item := await queue.get()) is not None:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def _briefing_fields(all_data: list[SymbolData]) -> dict[str, str]:
+    with metrics.timer("context.build"):
+        return {"context": "".join(_symbol_data_to_text(d) + "\n\n" for d in all_data)}
+
+
+def _analysis_fields(symbol: str, data: SymbolData) -> dict[str, str]:
+    with metrics.timer("context.build"):
+        return {"symbol": symbol, "context": _symbol_data_to_text(data)}
+
+
+async def _report(template: str, **fields: str) -> str:
+    """Reporter output for a template, served from the LLM cache when possible."""
+    key = llm_cache.cache_key(template, **fields)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        return cached
+    result = await llm_executor.run(reporter_pool.run, *report_task(template, **fields))
+    llm_cache.put(key, template, result)
+    return result
+
+
+async def _stream_cached_report(template: str, **fields: str):
+    """Like _stream_report, but a cache hit arrives as a single chunk."""
+    key = llm_cache.cache_key(template, **fields)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+    parts = []
+    async for text in _stream_report(*report_task(template, **fields)):
+        parts.append(text)
+        yield text
+    llm_cache.put(key, template, "".join(parts))
+
+
+def _extract_recommendation(report_text: str) -> str:
+    for line in report_text.splitlines():
+        if line.strip().upper().startswith("RECOMMENDATION:"):
+            return line.strip()
+    return report_text.split("\n")[-1].strip()
+
+
+def _sse(event: str, data) -> str:
+    """One Server-Sent Events frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     database.init_db()
+    http_clients.async_client()
+    if REPORTER_WARMUP == "startup":
+        reporter_pool.warm()
+    elif REPORTER_WARMUP == "background":
+        reporter_pool.warm_in_background()
+    if ALERT_ENGINE:
+        alert_engine.start()
+    if SNAPSHOTS:
+        snapshots.start()
     yield
+    await job_queue.shutdown()
+    await alert_engine.stop()
+    await snapshots.stop()
+    shutdown_executors()
+    await http_clients.close()
+    database.close_all()
 
 
 app = FastAPI(
@@ -126,6 +369,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Added last so it is outermost and times the whole request
+app.add_middleware(metrics.TimingMiddleware)
+
+
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated(request: Request, exc: ExecutorSaturated):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
+
+
 # ── Static UI ─────────────────────────────────────────────────
 STATIC_DIR = Path(__file__).parent / "static"
 if STATIC_DIR.is_dir():
@@ -151,9 +403,8 @@ async def health():
 
     if provider == "ollama":
         try:
-            async with httpx.AsyncClient(timeout=5) as client:
-                resp = await client.get(f"{OLLAMA_URL}/api/tags")
-                llm_ok = resp.status_code == 200
+            resp = await http_clients.async_client().get(f"{OLLAMA_URL}/api/tags", timeout=5)
+            llm_ok = resp.status_code == 200
         except Exception:
             pass
     else:
@@ -174,6 +425,84 @@ async def health():
     }
 
 
+# ── Stats ───────────────────────────────────────────────────────
+
+
+@app.get("/stats")
+async def stats():
+    """Per-worker runtime statistics (each gunicorn worker has its own)."""
+    return {
+        "pid": os.getpid(),
+        "cache": market_data.cache_stats(),
+        "refresh": refresh_policy.stats(),
+        "bar_columns": bar_columns.stats(),
+        "symbol_fetches": _symbol_flight.stats(),
+        "executors": executor_stats(),
+        "http": http_clients.pool_stats(),
+        "sqlite": database.connection_stats(),
+        "alerts": alert_engine.stats(),
+        "snapshots": snapshots.stats(),
+        "llm_cache": llm_cache.stats(),
+        "reporters": reporter_pool.stats(),
+        "jobs": job_queue.stats(),
+    }
+
+
+def _runtime_samples():
+    """Gauges and counters kept by other modules, read when /metrics is scraped."""
+    cache = market_data.cache_stats()
+    yield "stockbot_cache_requests_total", "counter", "Market data cache lookups.", [
+        ({"kind": kind, "result": result}, counts[field])
+        for kind, counts in cache["kinds"].items()
+        for result, field in (("hit", "hits"), ("miss", "misses"))
+    ]
+    yield "stockbot_cache_evictions_total", "counter", "Market data cache evictions and expirations.", [
+        ({"kind": kind, "reason": field}, counts[field])
+        for kind, counts in cache["kinds"].items()
+        for field in ("evictions", "expirations")
+    ]
+    yield "stockbot_cache_bytes", "gauge", "Approximate bytes held by the market data cache.", [({}, cache["bytes"])]
+
+    flights = [("market_data", cache["singleflight"]), ("symbol", _symbol_flight.stats())]
+    yield "stockbot_singleflight_calls_total", "counter", "Coalesced fetches by outcome.", [
+        ({"flight": flight, "kind": kind, "result": result}, counts[result])
+        for flight, stats in flights
+        for kind, counts in stats["kinds"].items()
+        for result in ("calls", "coalesced")
+    ]
+
+    llm = llm_cache.stats()
+    yield "stockbot_llm_cache_requests_total", "counter", "Reporter output cache lookups.", [
+        ({"result": "hit"}, llm["hits"]),
+        ({"result": "miss"}, llm["misses"]),
+    ]
+
+    executors = executor_stats()
+    yield "stockbot_executor_in_flight", "gauge", "Tasks running or queued per executor.", [
+        ({"executor": name}, e["in_flight"]) for name, e in executors.items()
+    ]
+    yield "stockbot_executor_rejected_total", "counter", "Submissions refused with 503.", [
+        ({"executor": name}, e["rejected"]) for name, e in executors.items()
+    ]
+    snapshot = snapshots.stats()
+    yield "stockbot_snapshot_requests_total", "counter", "Watchlist snapshot lookups.", [
+        ({"result": "served"}, snapshot["served"]),
+        ({"result": "missed"}, snapshot["missed"]),
+    ]
+    yield "stockbot_jobs_pending", "gauge", "Background jobs queued or running in this worker.", [
+        ({}, job_queue.stats()["pending"])
+    ]
+
+
+metrics.register_collector(_runtime_samples)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus text format; per worker, like /stats."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # ── Briefing ────────────────────────────────────────────────────
 
 
@@ -183,59 +512,60 @@ async def briefing():
     if not symbols:
         raise HTTPException(status_code=400, detail="Watchlist is empty")
 
-    # 1. Fetch real data directly (no LLM)
-    all_data: list[SymbolData] = []
-    for sym in symbols:
-        all_data.append(_fetch_symbol_data(sym))
-
-    # 2. Build context text for the LLM
-    context = "Here is the REAL market data. Use ONLY these numbers:\n\n"
-    for d in all_data:
-        context += _symbol_data_to_text(d) + "\n\n"
-
-    # 3. Run only the Reporter agent to interpret the data
-    reporter = strategy_reporter()
-
-    task_report = Task(
-        description=(
-            f"You are given real market data below. Do NOT invent any prices, "
-            f"percentages, or news headlines. Use ONLY the data provided.\n\n"
-            f"{context}\n"
-            f"Write a morning briefing that includes for each symbol:\n"
-            f"1) Current price and daily change\n"
-            f"2) Key technical signals interpretation\n"
-            f"3) News highlights (only from the data above, or say 'No recent news')\n"
-            f"4) Brief outlook (bullish/bearish/neutral with reasoning)\n"
-            f"End with a short market overview."
-        ),
-        expected_output="A morning briefing using only the provided data.",
-        agent=reporter,
-    )
-
-    crew = Crew(
-        agents=[reporter],
-        tasks=[task_report],
-        process=Process.sequential,
-        verbose=True,
-    )
+    # 1. Fetch real data directly (no LLM), all symbols concurrently
+    report_progress("fetching market data")
+    all_data = await _watchlist_data(symbols)
 
-    result = crew.kickoff()
+    # 2. Run only the Reporter agent to interpret the data
+    report_progress("running reporter")
+    result = await _report("briefing", **_briefing_fields(all_data))
 
     return BriefingResponse(
-        ai_summary=str(result),
+        ai_summary=result,
         watchlist_data=all_data,
         timestamp=datetime.now(timezone.utc),
     )
 
 
+@app.post("/briefing/stream")
+async def briefing_stream():
+    """Server-Sent Events: a `symbol` event per watchlist symbol as it arrives,
+    then `token` events from the reporter, then `done` (or `error`)."""
+    symbols = database.get_watchlist()
+    if not symbols:
+        raise HTTPException(status_code=400, detail="Watchlist is empty")
+
+    async def events():
+        yield _sse("start", {"symbols": symbols})
+        fetched = snapshots.get_many(symbols)
+        for data in fetched.values():
+            yield _sse("symbol", data.model_dump())
+        async for data in _iter_symbol_data([sym for sym in symbols if sym.upper() not in fetched]):
+            fetched[data.symbol] = data
+            yield _sse("symbol", data.model_dump())
+        all_data = [fetched[sym.upper()] for sym in symbols]
+
+        try:
+            async for text in _stream_cached_report("briefing", **_briefing_fields(all_data)):
+                yield _sse("token", {"text": text})
+        except Exception as exc:
+            yield _sse("error", {"detail": str(exc)})
+            return
+        yield _sse("done", {"timestamp": datetime.now(timezone.utc).isoformat()})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=_SSE_HEADERS)
+
+
 # ── Quick Data (no AI, instant for UI) ──────────────────────────
 
 
 @app.get("/quote/{symbol}")
 async def quote(symbol: str):
     """Fast data-only endpoint for UI — no LLM, returns instantly."""
-    data = _fetch_symbol_data(symbol.upper())
-    return data
+    data = snapshots.get(symbol)
+    if data is not None:
+        return data
+    return await io_executor.run(_fetch_symbol_data, symbol.upper())
 
 
 # ── Single Stock Analysis (with AI) ─────────────────────────────
@@ -246,47 +576,12 @@ async def analyze(symbol: str):
     symbol = symbol.upper()
 
     # 1. Fetch real data directly
-    data = _fetch_symbol_data(symbol, period="3mo")
-    context = _symbol_data_to_text(data)
+    report_progress("fetching market data")
+    data = await io_executor.run(_fetch_symbol_data, symbol, "3mo")
 
     # 2. Run only the Reporter to interpret
-    reporter = strategy_reporter()
-
-    task_report = Task(
-        description=(
-            f"You are given real market data below. Do NOT invent any prices, "
-            f"percentages, or news headlines. Use ONLY the data provided.\n\n"
-            f"{context}\n\n"
-            f"Produce a full analysis for {symbol}:\n"
-            f"1) Price summary with key levels\n"
-            f"2) Technical indicator interpretation\n"
-            f"3) News impact assessment (only from data above)\n"
-            f"4) Clear buy/hold/sell recommendation with reasoning\n\n"
-            f"End your response with a single line starting with 'RECOMMENDATION:' "
-            f"followed by BUY, HOLD, or SELL and a one-sentence reason."
-        ),
-        expected_output=f"Analysis and recommendation for {symbol} using only provided data.",
-        agent=reporter,
-    )
-
-    crew = Crew(
-        agents=[reporter],
-        tasks=[task_report],
-        process=Process.sequential,
-        verbose=True,
-    )
-
-    result = crew.kickoff()
-    report_text = str(result)
-
-    # Extract recommendation line
-    recommendation = ""
-    for line in report_text.splitlines():
-        if line.strip().upper().startswith("RECOMMENDATION:"):
-            recommendation = line.strip()
-            break
-    if not recommendation:
-        recommendation = report_text.split("\n")[-1].strip()
+    report_progress("running reporter")
+    report_text = await _report("analysis", **_analysis_fields(symbol, data))
 
     return AnalysisResponse(
         symbol=symbol,
@@ -296,18 +591,47 @@ async def analyze(symbol: str):
         signal_summary=data.signal_summary,
         news=data.news,
         ai_analysis=report_text,
-        ai_recommendation=recommendation,
+        ai_recommendation=_extract_recommendation(report_text),
     )
 
 
+@app.get("/analyze/{symbol}/stream")
+async def analyze_stream(symbol: str):
+    """Server-Sent Events: the `symbol` data first, then reporter `token`
+    events, then `done` with the recommendation (or `error`)."""
+    symbol = symbol.upper()
+
+    async def events():
+        try:
+            data = await io_executor.run(_fetch_symbol_data, symbol, "3mo")
+        except Exception as exc:
+            yield _sse("error", {"detail": str(exc)})
+            return
+        yield _sse("symbol", data.model_dump())
+
+        parts = []
+        try:
+            async for text in _stream_cached_report("analysis", **_analysis_fields(symbol, data)):
+                parts.append(text)
+                yield _sse("token", {"text": text})
+        except Exception as exc:
+            yield _sse("error", {"detail": str(exc)})
+            return
+        yield _sse("done", {"ai_recommendation": _extract_recommendation("".join(parts))})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=_SSE_HEADERS)
+
+
 # ── Portfolio ───────────────────────────────────────────────────
 
 
 @app.get("/portfolio", response_model=PortfolioResponse)
 async def get_portfolio():
-    holdings = database.get_portfolio()
+    # 1. Value every position directly (lots aggregated per symbol)
+    report_progress("fetching market data")
+    valuation = await io_executor.run(portfolio.value_portfolio)
 
-    if not holdings:
+    if not valuation["positions"]:
         return PortfolioResponse(
             holdings=[],
             total_value=0.0,
@@ -315,78 +639,22 @@ async def get_portfolio():
             ai_summary="Portfolio is empty. Add holdings with POST /portfolio.",
         )
 
-    # 1. Compute real values directly
-    total_value = 0.0
-    daily_pnl = 0.0
-    enriched = []
-    context_lines = ["Portfolio positions:"]
-
-    for h in holdings:
-        try:
-            info = yf.Ticker(h["symbol"]).info
-            price = info.get("regularMarketPrice") or info.get("previousClose", 0)
-            prev = info.get("previousClose", price)
-        except Exception:
-            price = 0
-            prev = 0
-        val = price * h["shares"]
-        pnl = (price - prev) * h["shares"]
-        unrealized = (price - h["avg_cost"]) * h["shares"]
-        total_value += val
-        daily_pnl += pnl
-        enriched.append({
-            "symbol": h["symbol"],
-            "shares": h["shares"],
-            "avg_cost": h["avg_cost"],
-            "current_price": round(price, 2),
-            "value": round(val, 2),
-            "daily_pnl": round(pnl, 2),
-            "unrealized_pnl": round(unrealized, 2),
-        })
-        context_lines.append(
-            f"- {h['symbol']}: {h['shares']} shares @ avg ${h['avg_cost']}, "
-            f"now ${round(price, 2)}, value ${round(val, 2)}, "
-            f"daily P&L ${round(pnl, 2)}, unrealized ${round(unrealized, 2)}"
-        )
-
-    context_lines.append(f"\nTotal Value: ${round(total_value, 2)}")
-    context_lines.append(f"Daily P&L: ${round(daily_pnl, 2)}")
-    context = "\n".join(context_lines)
-
     # 2. Run Reporter for summary
-    reporter = strategy_reporter()
-
-    task_report = Task(
-        description=(
-            f"You are given real portfolio data below. Use ONLY these numbers.\n\n"
-            f"{context}\n\n"
-            f"Write a brief portfolio summary: total value, daily P&L, "
-            f"top movers, and any positions needing attention."
-        ),
-        expected_output="Brief portfolio summary using only provided data.",
-        agent=reporter,
-    )
-
-    crew = Crew(
-        agents=[reporter],
-        tasks=[task_report],
-        process=Process.sequential,
-        verbose=True,
-    )
-
-    result = crew.kickoff()
+    report_progress("running reporter")
+    result = await _report("portfolio", context=valuation["context"])
 
     return PortfolioResponse(
-        holdings=enriched,
-        total_value=round(total_value, 2),
-        daily_pnl=round(daily_pnl, 2),
-        ai_summary=str(result),
+        holdings=valuation["positions"],
+        total_value=valuation["total_value"],
+        daily_pnl=valuation["daily_pnl"],
+        ai_summary=result,
     )
 
 
 @app.post("/portfolio")
 async def modify_portfolio(req: PortfolioAddRequest):
     holding = database.add_holding(req.symbol, req.shares, req.avg_cost)
+    portfolio.book.add_lot(holding)
     return {"status": "added", "holding": holding}
 
 
@@ -395,6 +663,7 @@ async def delete_portfolio(symbol: str):
     removed = database.remove_holding(symbol)
     if removed == 0:
         raise HTTPException(status_code=404, detail=f"{symbol} not found in portfolio")
+    portfolio.book.remove(symbol, removed)
     return {"status": "removed", "symbol": symbol.upper()}
 
 
@@ -409,6 +678,7 @@ async def get_watchlist():
 @app.post("/watchlist")
 async def add_watchlist(req: WatchlistModifyRequest):
     database.add_to_watchlist(req.symbol)
+    snapshots.wake()
     return {"status": "added", "symbol": req.symbol.upper()}
 
 
@@ -417,6 +687,7 @@ async def remove_watchlist(symbol: str):
     removed = database.remove_from_watchlist(symbol)
     if removed == 0:
         raise HTTPException(status_code=404, detail=f"{symbol} not in watchlist")
+    snapshots.drop(symbol)
     return {"status": "removed", "symbol": symbol.upper()}
 
 
@@ -436,47 +707,141 @@ async def create_alert(req: AlertCreateRequest):
 
 @app.post("/check-alerts", response_model=AlertCheckResponse)
 async def check_alerts():
-    alerts = database.get_alerts(active_only=True)
-
-    if not alerts:
-        return AlertCheckResponse(triggered=[], message="No active alerts.")
-
-    # Group alerts by symbol to minimize API calls
-    symbols = list({a["symbol"] for a in alerts})
-    prices = {}
-    for sym in symbols:
-        try:
-            info = yf.Ticker(sym).info
-            prices[sym] = info.get("regularMarketPrice") or info.get("previousClose", 0)
-        except Exception:
-            prices[sym] = 0
-
-    triggered = []
-    for alert in alerts:
-        sym = alert["symbol"]
-        price = prices.get(sym, 0)
-        if price == 0:
-            continue
-
-        fired = False
-        if alert["condition"] == "above" and price >= alert["price"]:
-            fired = True
-        elif alert["condition"] == "below" and price <= alert["price"]:
-            fired = True
-
-        if fired:
-            database.deactivate_alert(alert["id"])
-            triggered.append({
-                "id": alert["id"],
-                "symbol": sym,
-                "condition": alert["condition"],
-                "target_price": alert["price"],
-                "current_price": round(price, 2),
-            })
+    """Evaluate active alerts now instead of waiting for the next engine tick."""
+    triggered = await alert_engine.check()
 
     if triggered:
         message = f"{len(triggered)} alert(s) triggered."
+    elif alert_engine.stats()["indexed"] == 0:
+        message = "No active alerts."
     else:
         message = "No alerts triggered. All conditions still pending."
 
     return AlertCheckResponse(triggered=triggered, message=message)
+
+
+# ── Screener (no AI) ────────────────────────────────────────────
+
+
+def _universe(symbols: list[str], limit: int) -> list[str]:
+    """Requested symbols (deduplicated, upper-case), else the watchlist; 400 if none or too many."""
+    universe = list(dict.fromkeys(sym.strip().upper() for sym in symbols if sym.strip()))
+    if not universe:
+        universe = [sym.upper() for sym in database.get_watchlist()]
+    if not universe:
+        raise HTTPException(status_code=400, detail="No symbols given and the watchlist is empty")
+    if len(universe) > limit:
+        raise HTTPException(status_code=400, detail=f"At most {limit} symbols per request")
+    return universe
+
+
+@app.post("/screen", response_model=ScreenResponse)
+async def screen(req: ScreenRequest):
+    """Scan a symbol universe (default: the watchlist) for an indicator rule."""
+    try:
+        tree = screener.parse(req.rule)
+    except screener.RuleError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if req.sort_by not in screener.SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of: {', '.join(screener.SORT_KEYS)}")
+
+    symbols = _universe(req.symbols, screener.SCREEN_MAX_SYMBOLS)
+
+    histories = await io_executor.run(market_data.get_bar_columns, symbols, market_data.BASE_PERIOD)
+    result = await io_executor.run(screener.screen, tree, histories, req.sort_by, req.descending, req.limit)
+    return ScreenResponse(
+        rule=req.rule,
+        missing=[sym for sym in symbols if sym not in histories],
+        timestamp=datetime.now(timezone.utc),
+        **result,
+    )
+
+
+# ── Backtest (no AI) ────────────────────────────────────────────
+
+
+@app.post("/backtest", response_model=BacktestResponse)
+async def run_backtest(req: BacktestRequest):
+    """Replay the technical signal rules over daily history (default: the watchlist, 10y)."""
+    unknown = [rule for rule in req.rules if rule not in backtest.RULES]
+    if unknown or not req.rules:
+        raise HTTPException(status_code=400, detail=f"rules must be a subset of: {', '.join(backtest.RULES)}")
+    if req.sell_at >= req.buy_at:
+        raise HTTPException(status_code=400, detail="sell_at must be below buy_at")
+    symbols = _universe(req.symbols, backtest.BACKTEST_MAX_SYMBOLS)
+
+    histories = await io_executor.run(market_data.get_bar_columns, symbols, req.period)
+    rules = list(dict.fromkeys(req.rules))
+    result = await io_executor.run(backtest.run, histories, rules, req.buy_at, req.sell_at, req.cost_bps)
+    return BacktestResponse(
+        period=req.period,
+        rules=rules,
+        buy_at=req.buy_at,
+        sell_at=req.sell_at,
+        cost_bps=req.cost_bps,
+        missing=[sym for sym in symbols if sym not in histories],
+        timestamp=datetime.now(timezone.utc),
+        **result,
+    )
+
+
+# ── Jobs (AI endpoints without holding the connection) ─────────
+
+
+def _job_response(job: dict, merged: bool = False) -> JobResponse:
+    def ts(value: float | None) -> datetime | None:
+        return None if value is None else datetime.fromtimestamp(value, timezone.utc)
+
+    return JobResponse(
+        id=job["id"],
+        kind=job["kind"],
+        status=job["status"],
+        progress=job["progress"],
+        merged=merged,
+        params=json.loads(job["params"]),
+        result=json.loads(job["result"]) if job["result"] else None,
+        error=job["error"],
+        created_at=ts(job["created_at"]),
+        started_at=ts(job["started_at"]),
+        finished_at=ts(job["finished_at"]),
+    )
+
+
+async def _briefing_job(params: dict) -> dict:
+    return (await briefing()).model_dump(mode="json")
+
+
+async def _analyze_job(params: dict) -> dict:
+    return (await analyze(params["symbol"])).model_dump(mode="json")
+
+
+async def _portfolio_job(params: dict) -> dict:
+    return (await get_portfolio()).model_dump(mode="json")
+
+
+job_queue.register("briefing", _briefing_job)
+job_queue.register("analyze", _analyze_job)
+job_queue.register("portfolio", _portfolio_job)
+
+
+@app.post("/jobs/briefing", response_model=JobResponse, status_code=202)
+async def submit_briefing_job():
+    return _job_response(*job_queue.submit("briefing", {}))
+
+
+@app.post("/jobs/analyze/{symbol}", response_model=JobResponse, status_code=202)
+async def submit_analyze_job(symbol: str):
+    return _job_response(*job_queue.submit("analyze", {"symbol": symbol.upper()}))
+
+
+@app.post("/jobs/portfolio", response_model=JobResponse, status_code=202)
+async def submit_portfolio_job():
+    return _job_response(*job_queue.submit("portfolio", {}))
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    job = database.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return _job_response(job)
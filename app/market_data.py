@@ -0,0 +1,541 @@
+import logging
+import os
+import time
+
+import pandas as pd
+
+import bar_columns
+import database
+import http_clients
+import metrics
+import refresh_policy
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# ── Periods ─────────────────────────────────────────────────────
+
+# Widest history the tools need by default: SMA(200) wants a year of bars.
+BASE_PERIOD = "1y"
+
+# yfinance periods from shortest to longest
+_PERIOD_ORDER = ["1d", "5d", "1mo", "3mo", "6mo", "ytd", "1y", "2y", "5y", "10y", "max"]
+
+# "Nd" periods are trading days, everything else is calendar based
+_TRADING_DAYS = {"1d": 1, "5d": 5}
+_PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+
+def covering_period(period: str) -> str:
+    """Return the period to download so one fetch serves both `period` and BASE_PERIOD."""
+    if period not in _PERIOD_ORDER:
+        return period
+    if _PERIOD_ORDER.index(period) <= _PERIOD_ORDER.index(BASE_PERIOD):
+        return BASE_PERIOD
+    return period
+
+
+def _period_rank(period: str) -> int:
+    return _PERIOD_ORDER.index(period) if period in _PERIOD_ORDER else -1
+
+
+def _period_start(last: pd.Timestamp, period: str) -> pd.Timestamp:
+    """Exclusive lower bound of a calendar-based period ending at bar `last`."""
+    if period == "ytd":
+        return last.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    return last - _PERIOD_OFFSETS[period]
+
+
+def slice_period(hist: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Cut a wider daily history down to what yfinance would return for `period`."""
+    if hist.empty or period == "max" or period not in _PERIOD_ORDER:
+        return hist
+    if period in _TRADING_DAYS:
+        return hist.tail(_TRADING_DAYS[period])
+    return hist[hist.index > _period_start(hist.index[-1], period)]
+
+
+# ── Cache ───────────────────────────────────────────────────────
+
+# Entries expire when refresh_policy says the data can have changed: on
+# each kind's cadence during a session, at the next open once closed.
+
+_cache = TTLCache(
+    max_entries=int(os.environ.get("CACHE_MAX_ENTRIES", "2000")),
+    max_bytes=int(os.environ.get("CACHE_MAX_MB", "128")) * 1024 * 1024,
+)
+
+
+def cache_stats() -> dict:
+    return _cache.stats()
+
+
+# ── Local bar store ─────────────────────────────────────────────
+# Daily bars persist in SQLite; after the first full download only the
+# missing tail is requested from Yahoo, and stored bars keep being served
+# when Yahoo is unavailable.
+
+BAR_STORE = os.environ.get("BAR_STORE", "1") == "1"
+
+_INTERVAL = "1d"
+_OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def _epochs(hist: pd.DataFrame) -> tuple:
+    """(epoch seconds, tz name) of a history's bar timestamps; naive ones are taken as UTC."""
+    index = hist.index if hist.index.tz is not None else hist.index.tz_localize("UTC")
+    return index.tz_convert("UTC").as_unit("s").asi8, str(index.tz)
+
+
+def _clean_bars(hist: pd.DataFrame) -> pd.DataFrame:
+    """Bars fit for the store, whose columns are all NOT NULL.
+
+    Yahoo sends NaN for bars it has no trades for (and sometimes for just
+    the volume): rows without a close are dropped, a missing open, high or
+    low falls back to the close and a missing volume counts as 0.
+    """
+    if hist.empty:
+        return hist
+    hist = hist[_OHLCV]
+    if not hist.isna().to_numpy().any():
+        return hist
+    hist = hist.dropna(subset=["Close"])
+    return hist.assign(
+        **{field: hist[field].fillna(hist["Close"]) for field in ("Open", "High", "Low")},
+        Volume=hist["Volume"].fillna(0.0),
+    )
+
+
+def _to_rows(hist: pd.DataFrame) -> list[tuple]:
+    hist = _clean_bars(hist)
+    epochs, tz = _epochs(hist)
+    values = hist[_OHLCV].to_numpy(dtype=float)
+    return [(int(ts), tz, *row) for ts, row in zip(epochs, values.tolist())]
+
+
+def _from_rows(rows: list[dict]) -> pd.DataFrame:
+    if not rows:
+        return pd.DataFrame(columns=_OHLCV, index=pd.DatetimeIndex([], tz="UTC"))
+    index = pd.to_datetime([r["ts"] for r in rows], unit="s", utc=True).tz_convert(rows[-1]["tz"])
+    return pd.DataFrame(
+        {col: [r[col.lower()] for r in rows] for col in _OHLCV},
+        index=index,
+    )
+
+
+def _yf():
+    # yfinance is imported on the first upstream call, keeping worker start-up light
+    import yfinance
+
+    return yfinance
+
+
+def _ticker(symbol: str):
+    return _yf().Ticker(symbol, session=http_clients.yf_session())
+
+
+def _yahoo_history(symbol: str, **kwargs) -> pd.DataFrame:
+    with metrics.timer("yahoo.history"):
+        return _ticker(symbol).history(**kwargs)
+
+
+def _yahoo_info(symbol: str) -> dict:
+    with metrics.timer("yahoo.info"):
+        return _ticker(symbol).info or {}
+
+
+def _yahoo_news(symbol: str) -> list:
+    with metrics.timer("yahoo.news"):
+        return _ticker(symbol).news or []
+
+
+def _write_columns(symbol: str, hist: pd.DataFrame | None = None) -> None:
+    """Refresh the symbol's memory-mapped columns from `hist`, or from SQLite."""
+    if not bar_columns.BAR_COLUMNS:
+        return
+    try:
+        if hist is None:
+            bar_columns.export(symbol, _INTERVAL)
+        else:
+            epochs, tz = _epochs(hist)
+            bar_columns.write(symbol, epochs, tz, {field: hist[field].to_numpy() for field in _OHLCV})
+    except (OSError, ValueError):
+        logger.warning("Could not write bar columns for %s", symbol, exc_info=True)
+
+
+def _store_full(symbol: str, period: str, hist: pd.DataFrame) -> None:
+    """Replace the stored series with a freshly downloaded `period` of bars."""
+    hist = _clean_bars(hist)
+    database.replace_bars(symbol, _INTERVAL, _to_rows(hist), period, time.time())
+    _write_columns(symbol, hist)
+
+
+def _download_full(symbol: str, period: str) -> pd.DataFrame:
+    hist = _clean_bars(_yahoo_history(symbol, period=period))
+    if not hist.empty:
+        _store_full(symbol, period, hist)
+    return hist
+
+
+def _top_up_start(symbol: str) -> tuple[dict, str] | None:
+    """(anchor bar, start date) of a top-up: the second-newest stored bar onwards."""
+    recent = database.get_last_bars(symbol, _INTERVAL, 2)
+    if not recent:
+        return None
+    anchor = recent[0]
+    start = pd.Timestamp(anchor["ts"], unit="s", tz="UTC").tz_convert(anchor["tz"])
+    return anchor, start.strftime("%Y-%m-%d")
+
+
+def _apply_tail(symbol: str, sync: dict, anchor: dict, tail: pd.DataFrame) -> bool:
+    """Store the bars of a top-up download; False if the series must be reloaded.
+
+    The older overlapping bar is final, so a changed close there means Yahoo
+    re-adjusted history (split or dividend).
+    """
+    if tail.empty:
+        database.set_bar_sync(symbol, _INTERVAL, sync["period"], time.time())
+        return True
+    rows = _to_rows(tail)
+    overlap = next((r for r in rows if r[0] == anchor["ts"]), None)
+    if overlap is not None and abs(overlap[5] - anchor["close"]) > 1e-6 * abs(anchor["close"]):
+        return False
+    database.upsert_bars(symbol, _INTERVAL, rows, sync["period"], time.time())
+    _write_columns(symbol)
+    return True
+
+
+def _top_up(symbol: str, sync: dict) -> None:
+    """Download the bars since the newest stored ones, or reload the series."""
+    start = _top_up_start(symbol)
+    if start is None:
+        _download_full(symbol, sync["period"])
+        return
+    anchor, start_date = start
+    tail = _yahoo_history(symbol, start=start_date, interval=_INTERVAL)
+    if not _apply_tail(symbol, sync, anchor, tail):
+        _download_full(symbol, sync["period"])
+
+
+def _read_stored(symbol: str, period: str) -> pd.DataFrame:
+    """`period` of daily bars as stored, without touching Yahoo."""
+    if period in _TRADING_DAYS:
+        return _from_rows(database.get_last_bars(symbol, _INTERVAL, _TRADING_DAYS[period]))
+    if period == "max":
+        return _from_rows(database.get_bars(symbol, _INTERVAL))
+    last = _from_rows(database.get_last_bars(symbol, _INTERVAL, 1))
+    if last.empty:
+        return last
+    start = _period_start(last.index[-1], period)
+    rows = database.get_bars(symbol, _INTERVAL, int(start.tz_convert("UTC").timestamp()) + 1)
+    return _from_rows(rows)
+
+
+def _stored_history(symbol: str, period: str) -> pd.DataFrame:
+    """Daily bars for `period` from the local store, topped up from Yahoo."""
+    sync = database.get_bar_sync(symbol, _INTERVAL)
+    if sync is None:
+        return _download_full(symbol, period)
+    if _period_rank(sync["period"]) < _period_rank(period):
+        try:
+            return _download_full(symbol, period)
+        except Exception:
+            # Yahoo unavailable — fall back to the narrower stored series
+            logger.warning("Could not widen stored bars for %s to %s", symbol, period, exc_info=True)
+
+    if refresh_policy.is_due("history", sync["synced_at"], symbol=symbol):
+        try:
+            _top_up(symbol, sync)
+        except Exception:
+            # Yahoo unavailable — serve what is stored
+            logger.warning("Could not top up stored bars for %s", symbol, exc_info=True)
+    return _read_stored(symbol, period)
+
+
+# ── Upstream fetches ────────────────────────────────────────────
+# Cached values are shared between callers — treat them as read-only.
+
+
+def fetch_history(symbol: str, period: str = BASE_PERIOD) -> pd.DataFrame:
+    if BAR_STORE and period in _PERIOD_ORDER:
+        fetch = lambda: _stored_history(symbol, period)
+    else:
+        fetch = lambda: _yahoo_history(symbol, period=period)
+    ttl = refresh_policy.ttl("history", symbol=symbol)
+    return _cache.get_or_fetch(("history", symbol.upper(), period), ttl, fetch)
+
+
+def get_history(symbol: str, period: str = "1mo") -> pd.DataFrame:
+    """Daily OHLCV for `period`, downloaded at the covering width and sliced."""
+    wide = covering_period(period)
+    hist = fetch_history(symbol, wide)
+    return hist if wide == period else slice_period(hist, period)
+
+
+def history_views(symbol: str, period: str = "1mo") -> tuple[pd.DataFrame, pd.DataFrame]:
+    """One download serving both the `period` price view and the BASE_PERIOD indicator view."""
+    wide = covering_period(period)
+    hist = fetch_history(symbol, wide)
+    price_hist = hist if wide == period else slice_period(hist, period)
+    ta_hist = hist if wide == BASE_PERIOD else slice_period(hist, BASE_PERIOD)
+    return price_hist, ta_hist
+
+
+# ── Batched history (screener) ──────────────────────────────────
+
+# Tickers per yf.download request when many histories are missing at once
+DOWNLOAD_CHUNK = int(os.environ.get("DOWNLOAD_CHUNK", "200"))
+
+
+def _split_download(frame: pd.DataFrame, symbols: list[str]) -> dict[str, pd.DataFrame]:
+    histories = {}
+    for sym in symbols:
+        try:
+            hist = frame[sym] if isinstance(frame.columns, pd.MultiIndex) else frame
+        except KeyError:
+            continue
+        hist = hist[_OHLCV].dropna(subset=["Close"])
+        if not hist.empty:
+            histories[sym] = hist
+    return histories
+
+
+def _download_many(symbols: list[str], period: str | None = None, start: str | None = None) -> dict[str, pd.DataFrame]:
+    """Daily bars for `period`, or from `start` (a date) onwards, in chunks of DOWNLOAD_CHUNK tickers."""
+    span = {"period": period} if start is None else {"start": start}
+    histories = {}
+    for first in range(0, len(symbols), DOWNLOAD_CHUNK):
+        chunk = symbols[first:first + DOWNLOAD_CHUNK]
+        with metrics.timer("yahoo.download"):
+            frame = _yf().download(
+                chunk,
+                **span,
+                interval=_INTERVAL,
+                group_by="ticker",
+                auto_adjust=True,  # like Ticker.history
+                ignore_tz=False,  # keep exchange-local bar timestamps, as stored
+                progress=False,
+                threads=True,
+                session=http_clients.yf_session(),
+            )
+        histories.update(_split_download(frame, chunk))
+    return histories
+
+
+def _top_up_many(syncs: dict[str, dict]) -> list[str]:
+    """Top up stored series with batched tail downloads; returns the symbols to reload in full.
+
+    Symbols are grouped by the date their top-up starts from (usually one
+    group), so each group is one chunked `yf.download` of the recent bars
+    only. A failed download leaves its symbols as stored.
+    """
+    groups: dict[str, list[str]] = {}
+    anchors = {}
+    reload = []
+    for sym in syncs:
+        start = _top_up_start(sym)
+        if start is None:
+            reload.append(sym)
+            continue
+        anchors[sym], start_date = start
+        groups.setdefault(start_date, []).append(sym)
+
+    for start_date, group in groups.items():
+        try:
+            tails = _download_many(group, start=start_date)
+        except Exception:
+            logger.warning("Batched top-up of %d symbols failed; serving stored bars", len(group), exc_info=True)
+            continue
+        for sym in group:
+            try:
+                if not _apply_tail(sym, syncs[sym], anchors[sym], tails.get(sym, pd.DataFrame())):
+                    reload.append(sym)
+            except Exception:
+                logger.warning("Could not top up stored bars for %s", sym, exc_info=True)
+    return reload
+
+
+def _sync_store(symbols: list[str], period: str, now: float) -> None:
+    """Bring many stored series up to date for `period`.
+
+    Series synced recently enough are left alone; stale ones are topped
+    up from their newest bars; only symbols with nothing stored, a
+    narrower stored period or re-adjusted history are downloaded in full.
+    """
+    stale = {}
+    full = []
+    for sym in symbols:
+        sync = database.get_bar_sync(sym, _INTERVAL)
+        if sync is None or _period_rank(sync["period"]) < _period_rank(period):
+            full.append(sym)
+        elif refresh_policy.is_due("history", sync["synced_at"], now, symbol=sym):
+            stale[sym] = sync
+    if stale:
+        full += _top_up_many(stale)
+    if full:
+        for sym, hist in _download_many(full, period).items():
+            try:
+                _store_full(sym, period, hist)
+            except Exception:
+                logger.warning("Could not store bars for %s", sym, exc_info=True)
+
+
+def get_histories(symbols: list[str], period: str = BASE_PERIOD) -> dict[str, pd.DataFrame]:
+    """Daily OHLCV for many symbols, keyed by upper-case symbol.
+
+    Fresh cache entries are used as they are. With the bar store, the
+    other symbols' stored series are brought up to date by `_sync_store`
+    (batched tail top-ups, full downloads only where needed) and read
+    back, or served as stored if a download fails; without it they come
+    from batched `yf.download` calls of DOWNLOAD_CHUNK tickers. Results
+    are written back to the cache.
+    Symbols Yahoo returns nothing for are left out of the result.
+    """
+    wide = covering_period(period)
+    store = BAR_STORE and wide in _PERIOD_ORDER
+    wanted = list(dict.fromkeys(sym.upper() for sym in symbols))
+    found = {}
+    missing = []
+    for sym in wanted:
+        hit, hist = _cache.get(("history", sym, wide))
+        if hit:
+            found[sym] = hist
+        else:
+            missing.append(sym)
+
+    if missing and store:
+        try:
+            _sync_store(missing, wide, time.time())
+        except Exception:
+            logger.warning("Batched history download failed; serving stored bars", exc_info=True)
+        for sym in missing:
+            hist = _read_stored(sym, wide)
+            if not hist.empty:
+                _cache.set(("history", sym, wide), hist, refresh_policy.ttl("history", symbol=sym))
+                found[sym] = hist
+    elif missing:
+        for sym, hist in _download_many(missing, wide).items():
+            _cache.set(("history", sym, wide), hist, refresh_policy.ttl("history", symbol=sym))
+            found[sym] = hist
+    return {
+        sym: found[sym] if wide == period else slice_period(found[sym], period)
+        for sym in wanted
+        if sym in found
+    }
+
+
+def _columns_for_period(columns: bar_columns.BarColumns, period: str) -> bar_columns.BarColumns:
+    if columns.empty or period == "max":
+        return columns
+    if period in _TRADING_DAYS:
+        return columns.tail(_TRADING_DAYS[period])
+    start = _period_start(columns.last_time(), period)
+    return columns.since(int(start.tz_convert("UTC").timestamp()))
+
+
+def get_bar_columns(symbols: list[str], period: str = BASE_PERIOD) -> dict:
+    """Daily bars for many symbols as memory-mapped columns, keyed by upper-case symbol.
+
+    For bulk scans (/screen, /backtest): the values are
+    bar_columns.BarColumns views rather than DataFrames and bypass the
+    in-memory cache. Stored series are first brought up to date by
+    `_sync_store`; if a download fails, what is stored is served. Without
+    the bar store (or with BAR_COLUMNS=0) this falls back to get_histories.
+    """
+    if not (BAR_STORE and bar_columns.BAR_COLUMNS) or period not in _PERIOD_ORDER:
+        return get_histories(symbols, period)
+    wide = covering_period(period)
+    wanted = list(dict.fromkeys(sym.upper() for sym in symbols))
+    try:
+        _sync_store(wanted, wide, time.time())
+    except Exception:
+        logger.warning("Batched history download failed; serving stored bars", exc_info=True)
+
+    found = {}
+    for sym in wanted:
+        columns = bar_columns.read(sym)
+        if columns is None and database.get_bar_sync(sym, _INTERVAL) is not None:
+            _write_columns(sym)  # bars stored before the columns existed
+            columns = bar_columns.read(sym)
+        if columns is not None and not columns.empty:
+            found[sym] = _columns_for_period(columns, period)
+    return found
+
+
+def get_info(symbol: str) -> dict:
+    return _cache.get_or_fetch(
+        ("info", symbol.upper()),
+        refresh_policy.ttl("info", symbol=symbol),
+        lambda: _yahoo_info(symbol),
+    )
+
+
+def get_news(symbol: str) -> list:
+    return _cache.get_or_fetch(
+        ("news", symbol.upper()),
+        refresh_policy.ttl("news", symbol=symbol),
+        lambda: _yahoo_news(symbol),
+    )
+
+
+def _quotes_from_download(frame: pd.DataFrame, symbols: list[str]) -> dict[str, dict]:
+    quotes = {}
+    for sym in symbols:
+        try:
+            if isinstance(frame.columns, pd.MultiIndex):
+                closes = frame[sym]["Close"].dropna()
+            else:
+                closes = frame["Close"].dropna()
+        except KeyError:
+            continue
+        if closes.empty:
+            continue
+        price = float(closes.iloc[-1])
+        prev = float(closes.iloc[-2]) if len(closes) > 1 else price
+        quotes[sym] = {"price": price, "previous_close": prev}
+    return quotes
+
+
+def get_quotes(symbols: list[str]) -> dict[str, dict]:
+    """Latest price and previous close for many symbols in one batched download.
+
+    Symbols are deduplicated and served from the quote cache where fresh;
+    the rest come from a single `yf.download` of the last few daily bars
+    (unadjusted, so the closes match the exchange). Symbols Yahoo returns
+    nothing for are left out of the result.
+    """
+    wanted = list(dict.fromkeys(sym.upper() for sym in symbols))
+    quotes = {}
+    missing = []
+    for sym in wanted:
+        hit, value = _cache.get(("quote", sym))
+        if hit:
+            quotes[sym] = value
+        else:
+            missing.append(sym)
+
+    if missing:
+        with metrics.timer("yahoo.download"):
+            frame = _yf().download(
+                missing,
+                period="5d",
+                interval="1d",
+                group_by="ticker",
+                auto_adjust=False,
+                progress=False,
+                threads=True,
+                session=http_clients.yf_session(),
+            )
+        fetched = _quotes_from_download(frame, missing)
+        for sym, quote in fetched.items():
+            _cache.set(("quote", sym), quote, refresh_policy.ttl("quote", symbol=sym))
+        quotes.update(fetched)
+    return quotes
@@ -0,0 +1,139 @@
+"""US equity exchange calendar (NYSE / Nasdaq regular sessions, New York time).
+
+Sessions run 9:30–16:00 on weekdays, except the NYSE holidays (with the
+Saturday/Sunday observance rules) and the 13:00 early closes on July 3,
+the day after Thanksgiving and December 24. One-off closures, such as a
+national day of mourning, can be added with MARKET_CLOSED_DAYS.
+"""
+
+import functools
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+EXCHANGE_TZ = ZoneInfo("America/New_York")
+SESSION_OPEN = time(9, 30)
+SESSION_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+# Extra full-day closures, comma-separated ISO dates
+MARKET_CLOSED_DAYS = frozenset(
+    date.fromisoformat(day.strip()) for day in os.environ.get("MARKET_CLOSED_DAYS", "").split(",") if day.strip()
+)
+
+
+# ── Calendar ────────────────────────────────────────────────────
+
+
+def _easter(year: int) -> date:
+    """Western Easter Sunday (anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    return date(year, month, (h + l - 7 * m + 33 * month + 19) % 32)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """The n-th `weekday` (Monday = 0) of a month; n = -1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> date:
+    """Saturday holidays are observed on Friday, Sunday ones on Monday."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@functools.lru_cache(maxsize=16)
+def holidays(year: int) -> frozenset[date]:
+    days = {
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _observed(date(year, 7, 4)),  # Independence Day
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(date(year, 12, 25)),  # Christmas
+    }
+    # No Friday closure when New Year's Day falls on a Saturday
+    if date(year, 1, 1).weekday() != 5:
+        days.add(_observed(date(year, 1, 1)))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # Juneteenth
+    return frozenset(days | {d for d in MARKET_CLOSED_DAYS if d.year == year})
+
+
+def is_trading_day(day: date) -> bool:
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+def _is_early_close(day: date) -> bool:
+    if day == _nth_weekday(day.year, 11, 3, 4) + timedelta(days=1):
+        return True
+    return (day.month, day.day) in ((7, 3), (12, 24))
+
+
+def session(day: date) -> tuple[datetime, datetime] | None:
+    """(open, close) of the regular session on `day`, or None if the market is shut."""
+    if not is_trading_day(day):
+        return None
+    close = EARLY_CLOSE if _is_early_close(day) else SESSION_CLOSE
+    return (
+        datetime.combine(day, SESSION_OPEN, tzinfo=EXCHANGE_TZ),
+        datetime.combine(day, close, tzinfo=EXCHANGE_TZ),
+    )
+
+
+# ── Current state ───────────────────────────────────────────────
+
+
+def _local(now: datetime | None) -> datetime:
+    return (now or datetime.now(timezone.utc)).astimezone(EXCHANGE_TZ)
+
+
+def is_open(now: datetime | None = None) -> bool:
+    """True during a regular session."""
+    local = _local(now)
+    hours = session(local.date())
+    return hours is not None and hours[0] <= local < hours[1]
+
+
+def last_close(now: datetime | None = None) -> datetime:
+    """End of the most recent session that has closed at or before `now`."""
+    local = _local(now)
+    day = local.date()
+    hours = session(day)
+    if hours is not None and local >= hours[1]:
+        return hours[1]
+    while True:
+        day -= timedelta(days=1)
+        hours = session(day)
+        if hours is not None:
+            return hours[1]
+
+
+def next_open(now: datetime | None = None) -> datetime:
+    """Start of the first session that begins after `now`."""
+    local = _local(now)
+    day = local.date()
+    hours = session(day)
+    if hours is not None and local < hours[0]:
+        return hours[0]
+    while True:
+        day += timedelta(days=1)
+        hours = session(day)
+        if hours is not None:
+            return hours[0]
@@ -0,0 +1,253 @@
+"""Stage timings, counters and the Prometheus text exposition.
+
+Code marks a stage with `with metrics.timer("yahoo.history"):` (or the
+`@metrics.timed(...)` decorator); each sample lands in the
+`stockbot_stage_seconds` histogram and, inside an HTTP request, in that
+request's `Server-Timing` header. Work pushed to the io/llm executors
+carries the request's context along, so stages run on pool threads are
+still attributed to the request. Each gunicorn worker keeps its own
+metrics, like /stats.
+"""
+
+import bisect
+import contextvars
+import os
+import threading
+import time
+from functools import wraps
+from typing import Callable, Iterable
+
+METRICS = os.environ.get("METRICS", "1") != "0"
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "1") != "0"
+
+# Upper bounds in seconds; a yfinance call is ~0.1–2 s, an LLM call 2–120 s
+_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# (stage, seconds) samples for the current request; None outside one
+_request_timings: contextvars.ContextVar[list | None] = contextvars.ContextVar("request_timings", default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reset_lock)
+
+    def _reset_lock(self):
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, labels: tuple = ()) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labelnames, k)} {_format(v)}" for k, v in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = _BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reset_lock)
+
+    def _reset_lock(self):
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 3)
+            series[slot] += 1  # slot len(buckets) is the +Inf overflow
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = _labels(self.labelnames, labels, f'le="{_format(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            base = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{base} {_format(series[-2])}")
+            lines.append(f"{self.name}_count{base} {series[-1]}")
+        return lines
+
+
+# ── Metric families ─────────────────────────────────────────────
+
+stage_seconds = Histogram(
+    "stockbot_stage_seconds", "Time spent in each instrumented stage.", ("stage",)
+)
+http_request_seconds = Histogram(
+    "stockbot_http_request_duration_seconds",
+    "HTTP request latency until the response starts.",
+    ("method", "route", "status"),
+)
+llm_tokens = Counter("stockbot_llm_tokens_total", "LLM tokens reported by the provider.", ("type",))
+
+_families: list = [stage_seconds, http_request_seconds, llm_tokens]
+
+# Callables returning (name, type, help, [(labels dict, value), ...]) read at scrape time
+_collectors: list[Callable[[], Iterable[tuple]]] = []
+
+
+def register_collector(fn: Callable[[], Iterable[tuple]]) -> None:
+    _collectors.append(fn)
+
+
+# ── Timing ──────────────────────────────────────────────────────
+
+
+def record(stage: str, seconds: float) -> None:
+    if not METRICS:
+        return
+    stage_seconds.observe(seconds, (stage,))
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))  # list.append is atomic; pool threads share the list
+
+
+class timer:
+    """Context manager timing one stage."""
+
+    __slots__ = ("stage", "_start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.stage, time.perf_counter() - self._start)
+        return False
+
+
+def timed(stage: str) -> Callable:
+    """Decorator form of `timer`."""
+    def decorate(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(stage, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def record_tokens(usage) -> None:
+    """Count prompt/completion tokens from a usage object or dict, if the provider sent one."""
+    if not METRICS or usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        value = usage.get(kind) if isinstance(usage, dict) else getattr(usage, kind, None)
+        if value:
+            llm_tokens.inc(value, (kind.removesuffix("_tokens"),))
+
+
+# ── Exposition ──────────────────────────────────────────────────
+
+
+def render() -> str:
+    lines = []
+    for family in _families:
+        lines += family.render()
+    for collect in _collectors:
+        try:
+            samples = list(collect())
+        except Exception:
+            continue
+        for name, kind, help, values in samples:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            for labels, value in values:
+                lines.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {_format(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def server_timing(timings: list, total: float) -> str:
+    """Server-Timing header value: one entry per stage (summed), then the app total."""
+    totals: dict[str, list] = {}
+    for stage, seconds in list(timings):
+        entry = totals.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+    parts = [
+        f'{stage};dur={seconds * 1000:.1f}' + (f';desc="x{count}"' if count > 1 else "")
+        for stage, (seconds, count) in totals.items()
+    ]
+    parts.append(f"app;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class TimingMiddleware:
+    """ASGI middleware: request latency histogram and the Server-Timing header.
+
+    Timings are taken when the response starts, so a streamed response
+    reports the stages that ran before its first byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        timings: list = []
+        token = _request_timings.set(timings)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - start
+                route = scope.get("route")
+                http_request_seconds.observe(
+                    elapsed,
+                    (scope["method"], getattr(route, "path", "unmatched"), str(message["status"])),
+                )
+                if SERVER_TIMING:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing(timings, elapsed).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_timings.reset(token)
@@ -30,6 +30,26 @@ class WatchlistModifyRequest(BaseModel):
     symbol: str
 
 
+class ScreenRequest(BaseModel):
+    rule: str = Field(min_length=1, max_length=1000)
+    # Universe to scan; empty means the watchlist
+    symbols: list[str] = []
+    sort_by: str = "score"
+    descending: bool = True
+    limit: int = Field(default=50, ge=1, le=1000)
+
+
+class BacktestRequest(BaseModel):
+    # Universe to replay; empty means the watchlist
+    symbols: list[str] = []
+    period: str = Field(default="10y", pattern=r"^(1y|2y|5y|10y|max)$")
+    # Subset of: rsi, macd, cross, bollinger
+    rules: list[str] = ["rsi", "macd", "cross", "bollinger"]
+    buy_at: int = 2
+    sell_at: int = -2
+    cost_bps: float = Field(default=5, ge=0, le=1000)
+
+
 # ── Response Models ─────────────────────────────────────────────
 
 
@@ -40,6 +60,8 @@ class SymbolData(BaseModel):
     technicals: dict[str, Any] = {}
     signal_summary: str = ""
     news: list[dict[str, Any]] = []
+    # When each field was fetched; set only when served from the watchlist snapshot
+    as_of: dict[str, datetime] = {}
 
 
 class BriefingResponse(BaseModel):
@@ -71,6 +93,43 @@ class AlertCheckResponse(BaseModel):
     message: str
 
 
+class ScreenResponse(BaseModel):
+    rule: str
+    scanned: int
+    matched: int
+    # Requested symbols Yahoo returned no bars for
+    missing: list[str]
+    matches: list[dict[str, Any]]
+    timestamp: datetime
+
+
+class BacktestResponse(BaseModel):
+    period: str
+    rules: list[str]
+    buy_at: int
+    sell_at: int
+    cost_bps: float
+    # Equal-weight book over all symbols; None when no symbol had bars
+    summary: dict[str, Any] | None
+    symbols: list[dict[str, Any]]
+    missing: list[str]
+    timestamp: datetime
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str
+    progress: str
+    merged: bool = False
+    params: dict[str, Any] = {}
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
 class HealthResponse(BaseModel):
     status: str
     llm_connected: bool
@@ -0,0 +1,226 @@
+"""Portfolio valuation over positions aggregated per symbol.
+
+Lots from the `portfolio` table are grouped by symbol into parallel NumPy
+arrays (shares, cost basis), so the whole book is valued with one
+vectorized multiply against a price vector. Price updates and lot changes
+recompute only the rows they touch and adjust the totals by the
+difference; each row's line of LLM context is likewise rebuilt only when
+that row changed. The book reloads from SQLite when the table's
+(MAX(id), lot count) version changes, e.g. after a write by another
+worker. /portfolio and PortfolioDataTool both value through `book`.
+"""
+
+import threading
+
+import numpy as np
+
+import database
+import market_data
+import metrics
+
+
+class PortfolioBook:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._reset([], np.empty(0), np.empty(0), np.empty(0, dtype=np.int64))
+
+    def _reset(self, symbols: list[str], shares: np.ndarray, cost: np.ndarray, lots: np.ndarray) -> None:
+        self.symbols = symbols
+        self._row = {sym: i for i, sym in enumerate(symbols)}
+        self._shares = shares
+        self._cost = cost  # total cost basis: sum of shares * avg_cost over the lots
+        self._lots = lots
+        self._price = np.zeros(len(symbols))
+        self._prev = np.zeros(len(symbols))
+        self._value = np.zeros(len(symbols))
+        self._daily = np.zeros(len(symbols))
+        self._lines: list[str | None] = [None] * len(symbols)
+        self._total_value = 0.0
+        self._total_daily = 0.0
+        self._total_cost = float(cost.sum())
+
+    # ── Holdings ───────────────────────────────────────────────
+
+    def load(self, holdings: list[dict]) -> None:
+        """Rebuild from lot rows (newest first); positions keep the order of their newest lot."""
+        if not holdings:
+            self._reset([], np.empty(0), np.empty(0), np.empty(0, dtype=np.int64))
+            return
+        lot_symbols = np.array([h["symbol"].upper() for h in holdings])
+        lot_shares = np.array([h["shares"] for h in holdings], dtype=float)
+        lot_cost = lot_shares * np.array([h["avg_cost"] for h in holdings], dtype=float)
+
+        unique, first, inverse = np.unique(lot_symbols, return_index=True, return_inverse=True)
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        rows = rank[inverse]
+        n = len(unique)
+        self._reset(
+            unique[order].tolist(),
+            np.bincount(rows, weights=lot_shares, minlength=n),
+            np.bincount(rows, weights=lot_cost, minlength=n),
+            np.bincount(rows, minlength=n),
+        )
+
+    def sync(self) -> None:
+        """Reload from SQLite if lots were added or removed elsewhere."""
+        version = database.get_portfolio_version()
+        with self._lock:
+            if version != self._version:
+                self.load(database.get_portfolio())
+                self._version = version
+
+    def add_lot(self, holding: dict) -> None:
+        """Apply a lot just inserted by this worker (a row from database.add_holding)."""
+        with self._lock:
+            if self._version is None:
+                return
+            sym = holding["symbol"].upper()
+            shares = float(holding["shares"])
+            cost = shares * float(holding["avg_cost"])
+            row = self._row.get(sym)
+            if row is None:
+                row = len(self.symbols)
+                self.symbols.append(sym)
+                self._row[sym] = row
+                self._shares = np.append(self._shares, 0.0)
+                self._cost = np.append(self._cost, 0.0)
+                self._lots = np.append(self._lots, 0)
+                self._price = np.append(self._price, 0.0)
+                self._prev = np.append(self._prev, 0.0)
+                self._value = np.append(self._value, 0.0)
+                self._daily = np.append(self._daily, 0.0)
+                self._lines.append(None)
+            self._shares[row] += shares
+            self._cost[row] += cost
+            self._lots[row] += 1
+            self._total_cost += cost
+            self._revalue(np.array([row]))
+            max_id, count = self._version
+            self._version = (max(max_id, holding["id"]), count + 1)
+
+    def remove(self, symbol: str, removed_lots: int) -> None:
+        """Apply the removal of every lot of `symbol` by this worker."""
+        with self._lock:
+            row = self._row.get(symbol.upper())
+            if self._version is None or row is None:
+                self._version = None  # out of step; reload on next sync
+                return
+            self._total_value -= self._value[row]
+            self._total_daily -= self._daily[row]
+            self._total_cost -= self._cost[row]
+            del self.symbols[row], self._lines[row]
+            self._row = {sym: i for i, sym in enumerate(self.symbols)}
+            for name in ("_shares", "_cost", "_lots", "_price", "_prev", "_value", "_daily"):
+                setattr(self, name, np.delete(getattr(self, name), row))
+            max_id, count = self._version
+            # A removed lot may have held MAX(id); the next sync then reloads
+            self._version = (max_id, count - removed_lots)
+
+    # ── Prices ─────────────────────────────────────────────────
+
+    def _revalue(self, rows: np.ndarray) -> None:
+        """Recompute `rows` and shift the totals by their change. Caller holds the lock."""
+        value = self._shares[rows] * self._price[rows]
+        daily = self._shares[rows] * (self._price[rows] - self._prev[rows])
+        self._total_value += float((value - self._value[rows]).sum())
+        self._total_daily += float((daily - self._daily[rows]).sum())
+        self._value[rows] = value
+        self._daily[rows] = daily
+        for row in rows.tolist():
+            self._lines[row] = None
+
+    def set_prices(self, quotes: dict[str, dict]) -> int:
+        """Apply {symbol: {"price", "previous_close"}}; symbols without a quote price at 0.
+
+        Returns how many positions changed.
+        """
+        with self._lock, metrics.timer("portfolio.revalue"):
+            missing = {"price": 0.0, "previous_close": 0.0}
+            picked = [quotes.get(sym, missing) for sym in self.symbols]
+            price = np.array([q["price"] for q in picked], dtype=float)
+            prev = np.array([q["previous_close"] for q in picked], dtype=float)
+            rows = np.flatnonzero((price != self._price) | (prev != self._prev))
+            if len(rows):
+                self._price[rows] = price[rows]
+                self._prev[rows] = prev[rows]
+                self._revalue(rows)
+            return len(rows)
+
+    def update_price(self, symbol: str, price: float, previous_close: float) -> None:
+        """Single-symbol tick."""
+        with self._lock:
+            row = self._row.get(symbol.upper())
+            if row is None:
+                return
+            self._price[row] = price
+            self._prev[row] = previous_close
+            self._revalue(np.array([row]))
+
+    # ── Views ──────────────────────────────────────────────────
+
+    @staticmethod
+    def _line(position: dict) -> str:
+        return (
+            f"- {position['symbol']}: {position['shares']} shares in {position['lots']} lot(s) "
+            f"@ avg ${position['avg_cost']}, now ${position['current_price']}, value ${position['value']}, "
+            f"daily P&L ${position['daily_pnl']}, unrealized ${position['unrealized_pnl']}"
+        )
+
+    def valuation(self) -> dict:
+        """Positions, totals and the reporter's context text."""
+        with self._lock:
+            shares = self._shares.tolist()
+            cost = self._cost.tolist()
+            price = self._price.round(2).tolist()
+            value = self._value.round(2).tolist()
+            daily = self._daily.round(2).tolist()
+            unrealized = (self._value - self._cost).round(2).tolist()
+            positions = [
+                {
+                    "symbol": sym,
+                    "lots": int(self._lots[i]),
+                    "shares": shares[i],
+                    "avg_cost": round(cost[i] / shares[i], 2) if shares[i] else 0.0,
+                    "current_price": price[i],
+                    "value": value[i],
+                    "cost": round(cost[i], 2),
+                    "daily_pnl": daily[i],
+                    "unrealized_pnl": unrealized[i],
+                }
+                for i, sym in enumerate(self.symbols)
+            ]
+            for i, position in enumerate(positions):
+                if self._lines[i] is None:
+                    self._lines[i] = self._line(position)
+            total_value = round(self._total_value, 2)
+            total_cost = round(self._total_cost, 2)
+            daily_pnl = round(self._total_daily, 2)
+            context = "\n".join(
+                ["Portfolio positions:", *self._lines, f"\nTotal Value: ${total_value}", f"Daily P&L: ${daily_pnl}"]
+            )
+        return {
+            "positions": positions,
+            "total_value": total_value,
+            "total_cost": total_cost,
+            "daily_pnl": daily_pnl,
+            "total_unrealized_pnl": round(total_value - total_cost, 2),
+            "context": context,
+        }
+
+
+book = PortfolioBook()
+
+
+def value_portfolio() -> dict:
+    """Sync the book, price it with one batched quote download and return its valuation. Blocking."""
+    book.sync()
+    if book.symbols:
+        try:
+            quotes = market_data.get_quotes(list(book.symbols))
+        except Exception:
+            quotes = {}
+        book.set_prices(quotes)
+    return book.valuation()
@@ -0,0 +1,137 @@
+"""How often each kind of market data is refetched, driven by the exchange calendar.
+
+Quotes, daily bars and fundamentals only change during a session and
+settle shortly after the close. While the market is open, or still
+settling, each kind is refetched on its session cadence (the CACHE_TTL_*
+settings). Once the close has settled they are frozen: a value fetched
+after the close stays valid until the next open, so nights, weekends and
+holidays cost no upstream calls. News keeps arriving off-hours and is
+refetched on the slower CACHE_TTL_NEWS_CLOSED cadence. The market-data
+cache, the bar store's top-ups and the watchlist snapshots all take their
+timing from here.
+
+Only US-listed equities follow the calendar. Symbols that trade on other
+hours — crypto pairs (BTC-USD), currencies and futures (EURUSD=X, CL=F),
+indices (^N225) and listings on other exchanges (7203.T, VOD.L) — keep
+their session cadences around the clock.
+"""
+
+import os
+import re
+import time
+from datetime import datetime, timezone
+
+import market_hours
+
+# 0 = use the session cadences around the clock
+REFRESH_SCHEDULE = os.environ.get("REFRESH_SCHEDULE", "1") != "0"
+
+# Seconds each kind stays fresh while the market is open (0 disables caching)
+SESSION_SECONDS = {
+    "quote": float(os.environ.get("CACHE_TTL_QUOTE", "30")),
+    "history": float(os.environ.get("CACHE_TTL_HISTORY", "300")),
+    "info": float(os.environ.get("CACHE_TTL_INFO", "21600")),
+    "news": float(os.environ.get("CACHE_TTL_NEWS", "600")),
+}
+
+# Cadence while the market is closed; kinds not listed are frozen until the next open
+CLOSED_SECONDS = {
+    "news": float(os.environ.get("CACHE_TTL_NEWS_CLOSED", "3600")),
+}
+
+# Yahoo's closing quotes and daily bars settle a few minutes after the close
+SETTLE_SECONDS = float(os.environ.get("MARKET_SETTLE_SECONDS", "900"))
+
+# US equity tickers, optionally with a share-class or unit suffix (BRK-B, AAC-UN);
+# Yahoo marks everything else with a suffix or a ^ / = sign
+_US_EQUITY = re.compile(r"[A-Z]{1,5}(-[A-Z]{1,2})?")
+
+
+def follows_calendar(symbol: str | None) -> bool:
+    """Whether `symbol` trades on the US exchange calendar (None: assume it does)."""
+    return symbol is None or _US_EQUITY.fullmatch(symbol.upper()) is not None
+
+
+def _clock(now: float | None) -> tuple[float, datetime]:
+    ts = time.time() if now is None else now
+    return ts, datetime.fromtimestamp(ts, timezone.utc)
+
+
+def _settled_at(moment: datetime) -> float:
+    """When the most recent close (at or before `moment`) settles."""
+    return market_hours.last_close(moment).timestamp() + SETTLE_SECONDS
+
+
+def phase(now: float | None = None) -> str:
+    """"open", "settling" (just after a close) or "closed"."""
+    ts, moment = _clock(now)
+    if market_hours.is_open(moment):
+        return "open"
+    return "settling" if ts < _settled_at(moment) else "closed"
+
+
+def cadence(
+    kind: str,
+    now: float | None = None,
+    session: float | None = None,
+    closed: float | None = None,
+    symbol: str | None = None,
+) -> float | None:
+    """Seconds between refreshes of `kind` at `now`, or None while it is frozen.
+
+    `session` / `closed` override the kind's configured cadences; a
+    `symbol` off the US calendar always gets the session cadence.
+    """
+    session = SESSION_SECONDS[kind] if session is None else session
+    if session <= 0 or not REFRESH_SCHEDULE or not follows_calendar(symbol) or phase(now) != "closed":
+        return session
+    return CLOSED_SECONDS.get(kind) if closed is None else closed
+
+
+def ttl(kind: str, now: float | None = None, symbol: str | None = None) -> float:
+    """How long a value of `kind` (for `symbol`) fetched at `now` stays fresh."""
+    step = cadence(kind, now, symbol=symbol)
+    if step is not None:
+        return max(step, 0.0)
+    ts, moment = _clock(now)
+    return max(market_hours.next_open(moment).timestamp() - ts, SESSION_SECONDS[kind])
+
+
+def is_due(kind: str, fetched_at: float | None, now: float | None = None, symbol: str | None = None, **overrides) -> bool:
+    """Whether a value fetched at `fetched_at` should be refetched at `now`."""
+    if fetched_at is None:
+        return True
+    ts, moment = _clock(now)
+    step = cadence(kind, ts, symbol=symbol, **overrides)
+    if step is not None:
+        return ts - fetched_at >= step
+    return fetched_at < _settled_at(moment)  # one refetch once the close has settled
+
+
+def is_fresh(
+    kind: str,
+    fetched_at: float | None,
+    now: float | None = None,
+    grace: float = 2.0,
+    symbol: str | None = None,
+    **overrides,
+) -> bool:
+    """Whether a value fetched at `fetched_at` may still be served, allowing `grace` missed refreshes."""
+    if fetched_at is None:
+        return False
+    ts, moment = _clock(now)
+    step = cadence(kind, ts, symbol=symbol, **overrides)
+    if step is not None:
+        return ts - fetched_at <= grace * step
+    return fetched_at >= market_hours.last_close(moment).timestamp()
+
+
+def stats() -> dict:
+    ts, moment = _clock(None)
+    return {
+        "enabled": REFRESH_SCHEDULE,
+        "phase": phase(ts),
+        "last_close": market_hours.last_close(moment).isoformat(),
+        "next_open": market_hours.next_open(moment).isoformat(),
+        "ttls": {kind: round(ttl(kind, ts), 1) for kind in SESSION_SECONDS},
+    }
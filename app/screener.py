@@ -0,0 +1,257 @@
+"""Indicator screens over many symbols in one vectorized pass.
+
+A rule compares the fields TechnicalAnalysisTool reports with each other
+or with numbers, joined by AND / OR / NOT and parentheses:
+
+    rsi_14 < 30 AND price < bollinger_lower AND sma_50 > sma_200
+
+Rules are parsed into a small expression tree (never eval'd). Indicators
+for every symbol come from one `indicators.compute_panel` call, and each
+comparison becomes a boolean mask over the symbols' latest bars. A symbol
+missing any field the rule uses (e.g. sma_200 on a short history) never
+matches.
+"""
+
+import os
+import re
+
+import numpy as np
+
+from indicators import INDICATOR_KEYS, build_panel, compute_panel
+from metrics import timer
+
+# Most symbols one /screen request may scan
+SCREEN_MAX_SYMBOLS = int(os.environ.get("SCREEN_MAX_SYMBOLS", "5000"))
+
+FIELDS = ["price", "change_pct", "volume", *INDICATOR_KEYS]
+SORT_KEYS = ["score", *FIELDS]
+
+_OPS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<num>-?\d+(?:\.\d*)?|-?\.\d+)|(?P<op><=|>=|==|!=|<|>)|(?P<paren>[()])|(?P<word>[A-Za-z_]\w*))"
+)
+
+
+class RuleError(ValueError):
+    """The rule text cannot be parsed."""
+
+
+# ── Parsing ─────────────────────────────────────────────────────
+# Tree nodes are tuples: ("or"|"and", left, right), ("not", node),
+# ("cmp", op, left, right); operands are ("field", name) or ("num", value).
+
+
+def _tokenize(rule: str) -> list[tuple[str, str]]:
+    tokens = []
+    pos = 0
+    rule = rule.rstrip()
+    while pos < len(rule):
+        match = _TOKEN.match(rule, pos)
+        if match is None or match.end() == pos:
+            raise RuleError(f"Unexpected character at position {pos}: {rule[pos:pos + 10]!r}")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == "word" and text.upper() in ("AND", "OR", "NOT"):
+            kind, text = "keyword", text.upper()
+        tokens.append((kind, text))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens: list[tuple[str, str]]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def _peek(self) -> tuple[str, str] | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _take(self) -> tuple[str, str]:
+        token = self._peek()
+        if token is None:
+            raise RuleError("Rule ends unexpectedly")
+        self.pos += 1
+        return token
+
+    def parse(self) -> tuple:
+        node = self._or()
+        if self._peek() is not None:
+            raise RuleError(f"Unexpected {self._peek()[1]!r}")
+        return node
+
+    def _or(self) -> tuple:
+        node = self._and()
+        while self._peek() == ("keyword", "OR"):
+            self._take()
+            node = ("or", node, self._and())
+        return node
+
+    def _and(self) -> tuple:
+        node = self._not()
+        while self._peek() == ("keyword", "AND"):
+            self._take()
+            node = ("and", node, self._not())
+        return node
+
+    def _not(self) -> tuple:
+        if self._peek() == ("keyword", "NOT"):
+            self._take()
+            return ("not", self._not())
+        if self._peek() == ("paren", "("):
+            self._take()
+            node = self._or()
+            if self._take() != ("paren", ")"):
+                raise RuleError("Missing ')'")
+            return node
+        left = self._operand()
+        kind, op = self._take()
+        if kind != "op":
+            raise RuleError(f"Expected a comparison operator, got {op!r}")
+        return ("cmp", op, left, self._operand())
+
+    def _operand(self) -> tuple:
+        kind, text = self._take()
+        if kind == "num":
+            return ("num", float(text))
+        if kind == "word":
+            name = text.lower()
+            if name not in FIELDS:
+                raise RuleError(f"Unknown field {text!r}; use one of: {', '.join(FIELDS)}")
+            return ("field", name)
+        raise RuleError(f"Expected a field or number, got {text!r}")
+
+
+def parse(rule: str) -> tuple:
+    """Parse rule text into an expression tree; raises RuleError."""
+    tokens = _tokenize(rule)
+    if not tokens:
+        raise RuleError("Rule is empty")
+    return _Parser(tokens).parse()
+
+
+def _walk(node: tuple):
+    yield node
+    if node[0] in ("and", "or"):
+        yield from _walk(node[1])
+        yield from _walk(node[2])
+    elif node[0] == "not":
+        yield from _walk(node[1])
+
+
+def rule_fields(tree: tuple) -> list[str]:
+    """Fields the rule reads, in first-use order."""
+    names = [n[1] for n in _walk(tree) if n[0] == "field"]
+    return list(dict.fromkeys(names))
+
+
+# ── Evaluation ──────────────────────────────────────────────────
+
+
+def _value(operand: tuple, fields: dict[str, np.ndarray]) -> np.ndarray | float:
+    return fields[operand[1]] if operand[0] == "field" else operand[1]
+
+
+def _mask(node: tuple, fields: dict[str, np.ndarray]) -> np.ndarray:
+    kind = node[0]
+    if kind == "and":
+        return _mask(node[1], fields) & _mask(node[2], fields)
+    if kind == "or":
+        return _mask(node[1], fields) | _mask(node[2], fields)
+    if kind == "not":
+        return ~_mask(node[1], fields)
+    _, op, left, right = node
+    with np.errstate(invalid="ignore"):
+        return _OPS[op](_value(left, fields), _value(right, fields))
+
+
+def _score(tree: tuple, fields: dict[str, np.ndarray], n: int) -> np.ndarray:
+    """Mean relative margin by which each inequality holds, in percent.
+
+    E.g. rsi_14 = 21 against `rsi_14 < 30` contributes (30 - 21) / 25.5;
+    larger means further past the thresholds.
+    """
+    margins = []
+    for node in _walk(tree):
+        if node[0] != "cmp" or node[1] in ("==", "!="):
+            continue
+        _, op, left, right = node
+        a = np.broadcast_to(_value(left, fields), (n,))
+        b = np.broadcast_to(_value(right, fields), (n,))
+        diff = b - a if op in ("<", "<=") else a - b
+        with np.errstate(divide="ignore", invalid="ignore"):
+            margins.append(np.where(diff == 0, 0.0, diff / ((np.abs(a) + np.abs(b)) / 2)))
+    if not margins:
+        return np.zeros(n)
+    return np.mean(margins, axis=0) * 100
+
+
+def _latest_fields(histories: dict) -> dict[str, np.ndarray]:
+    """Latest value of every field for each symbol, as (symbols,) arrays."""
+    with timer("indicator.panel"):
+        close, high, low, volume = (build_panel(histories, f) for f in ("Close", "High", "Low", "Volume"))
+    series = compute_panel(close, high, low)
+    fields = {key: series[key][-1] for key in INDICATOR_KEYS}
+    fields["price"] = close[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fields["change_pct"] = (close[-1] - close[-2]) / close[-2] * 100 if len(close) > 1 else np.full(close.shape[1], np.nan)
+    fields["volume"] = volume[-1]
+    return fields
+
+
+def _rounded(value: float) -> float | None:
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+def screen(
+    tree: tuple,
+    histories: dict,
+    sort_by: str = "score",
+    descending: bool = True,
+    limit: int = 50,
+) -> dict:
+    """Symbols whose latest bar satisfies the parsed rule, ranked by `sort_by`.
+
+    `histories` are DataFrames or bar_columns.BarColumns.
+    Returns {"scanned", "matched", "matches"}; each match carries price,
+    change_pct, score, the date of its last bar and every indicator.
+    """
+    if sort_by not in SORT_KEYS:
+        raise RuleError(f"Unknown sort key {sort_by!r}; use one of: {', '.join(SORT_KEYS)}")
+    usable = {sym: h for sym, h in histories.items() if not h.empty}
+    if not usable:
+        return {"scanned": 0, "matched": 0, "matches": []}
+
+    fields = _latest_fields(usable)
+    with timer("screen.evaluate"):
+        n = len(usable)
+        known = np.ones(n, dtype=bool)
+        for name in rule_fields(tree):
+            known &= ~np.isnan(fields[name])
+        hits = np.flatnonzero(_mask(tree, fields) & known)
+        fields["score"] = _score(tree, fields, n)
+
+        key = fields[sort_by][hits]
+        key = np.where(np.isnan(key), -np.inf if descending else np.inf, key)  # missing values rank last
+        ranked = hits[np.argsort(-key if descending else key, kind="stable")][:limit]
+
+    symbols = list(usable)
+    matches = [
+        {
+            "symbol": symbols[col],
+            "price": _rounded(fields["price"][col]),
+            "change_pct": _rounded(fields["change_pct"][col]),
+            "score": _rounded(fields["score"][col]),
+            "as_of": usable[symbols[col]].index[-1].strftime("%Y-%m-%d"),
+            "indicators": {key: _rounded(fields[key][col]) for key in INDICATOR_KEYS},
+        }
+        for col in ranked.tolist()
+    ]
+    return {"scanned": n, "matched": len(hits), "matches": matches}
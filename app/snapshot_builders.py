@@ -0,0 +1,139 @@
+"""Plain-dict views of market data, shared by the API and the CrewAI tools.
+
+Kept apart from tools.py so the API can build them without importing CrewAI.
+"""
+
+import pandas as pd
+
+import indicators as indicators_lib
+
+
+def price_snapshot(symbol: str, hist: pd.DataFrame, info: dict) -> dict:
+    """Price summary from an OHLCV history and an optional `.info` payload."""
+    if hist.empty:
+        return {"error": f"No data found for {symbol}"}
+
+    latest = hist.iloc[-1]
+    prev_close = hist["Close"].iloc[-2] if len(hist) > 1 else latest["Close"]
+    change_pct = ((latest["Close"] - prev_close) / prev_close) * 100
+
+    candles = []
+    for idx, row in hist.tail(10).iterrows():
+        candles.append({
+            "date": idx.strftime("%Y-%m-%d"),
+            "open": round(row["Open"], 2),
+            "high": round(row["High"], 2),
+            "low": round(row["Low"], 2),
+            "close": round(row["Close"], 2),
+            "volume": int(row["Volume"]),
+        })
+
+    return {
+        "symbol": symbol.upper(),
+        "current_price": round(latest["Close"], 2),
+        "change_pct": round(change_pct, 2),
+        "fifty_two_week_high": info.get("fiftyTwoWeekHigh"),
+        "fifty_two_week_low": info.get("fiftyTwoWeekLow"),
+        "volume": int(latest["Volume"]),
+        "market_cap": info.get("marketCap"),
+        "sector": info.get("sector", "N/A"),
+        "industry": info.get("industry", "N/A"),
+        "recent_candles": candles,
+    }
+
+
+def technical_snapshot(symbol: str, hist: pd.DataFrame) -> dict:
+    """Indicator values and signal summary from a (typically 1y) OHLCV history."""
+    from ta.momentum import RSIIndicator
+    from ta.trend import MACD, SMAIndicator
+    from ta.volatility import BollingerBands, AverageTrueRange
+
+    if hist.empty:
+        return {"error": f"No data found for {symbol}"}
+
+    close = hist["Close"]
+    high = hist["High"]
+    low = hist["Low"]
+
+    # RSI
+    rsi_ind = RSIIndicator(close, window=14)
+    rsi_val = round(rsi_ind.rsi().iloc[-1], 2)
+
+    # MACD
+    macd_ind = MACD(close, window_slow=26, window_fast=12, window_sign=9)
+    macd_val = round(macd_ind.macd().iloc[-1], 2)
+    macd_signal = round(macd_ind.macd_signal().iloc[-1], 2)
+    macd_hist = round(macd_ind.macd_diff().iloc[-1], 2)
+
+    # SMAs
+    sma20_val = round(SMAIndicator(close, window=20).sma_indicator().iloc[-1], 2)
+    sma50_val = round(SMAIndicator(close, window=50).sma_indicator().iloc[-1], 2)
+    sma200_s = SMAIndicator(close, window=200).sma_indicator()
+    sma200_val = round(sma200_s.iloc[-1], 2) if not sma200_s.isna().iloc[-1] else None
+
+    # Bollinger Bands
+    bb = BollingerBands(close, window=20, window_dev=2)
+    bb_upper = round(bb.bollinger_hband().iloc[-1], 2)
+    bb_middle = round(bb.bollinger_mavg().iloc[-1], 2)
+    bb_lower = round(bb.bollinger_lband().iloc[-1], 2)
+
+    # ATR
+    atr_ind = AverageTrueRange(high, low, close, window=14)
+    atr_val = round(atr_ind.average_true_range().iloc[-1], 2)
+
+    current_price = round(close.iloc[-1], 2)
+
+    indicators = {
+        "rsi_14": rsi_val,
+        "macd": macd_val,
+        "macd_signal": macd_signal,
+        "macd_histogram": macd_hist,
+        "sma_20": sma20_val,
+        "sma_50": sma50_val,
+        "sma_200": sma200_val,
+        "bollinger_upper": bb_upper,
+        "bollinger_middle": bb_middle,
+        "bollinger_lower": bb_lower,
+        "atr_14": atr_val,
+    }
+
+    return {
+        "symbol": symbol.upper(),
+        "current_price": current_price,
+        "indicators": indicators,
+        "signal_summary": indicators_lib.signal_summary(current_price, indicators),
+    }
+
+
+def news_snapshot(symbol: str, news: list) -> dict:
+    """Normalize raw yfinance news items into up to 10 articles."""
+    if not news:
+        return {"symbol": symbol.upper(), "articles": [], "message": "No recent news found"}
+
+    articles = []
+    for item in news[:10]:
+        # yfinance 1.1.0+ nests data under "content"
+        content = item.get("content", item)
+        title = content.get("title", "")
+        if not title:
+            continue
+
+        provider = content.get("provider", {})
+        publisher = provider.get("displayName", "") if isinstance(provider, dict) else str(provider)
+
+        link_obj = content.get("canonicalUrl") or content.get("clickThroughUrl") or {}
+        link = link_obj.get("url", "") if isinstance(link_obj, dict) else str(link_obj)
+
+        pub_date = content.get("pubDate") or content.get("displayTime")
+
+        articles.append({
+            "title": title,
+            "publisher": publisher,
+            "link": link,
+            "publish_time": pub_date,
+        })
+
+    if not articles:
+        return {"symbol": symbol.upper(), "articles": [], "message": "No recent news found"}
+
+    return {"symbol": symbol.upper(), "articles": articles}
@@ -0,0 +1,241 @@
+"""Precomputed SymbolData for every watchlist symbol, refreshed in the background.
+
+Each snapshot field has its own source and cadence: `price` (price and
+daily change) from one batched quote download, `technicals` (indicators
+and signal summary) from streaming indicator states advanced by the new
+bars in the cached daily history, and `news`. During the
+session each field is refetched on its cadence; once the market has
+closed, price and technicals are refetched once after the close settles
+and news only on a slow cadence; refresh_policy holds the calendar
+rules. A snapshot is served only while every field is fresh; otherwise
+callers fetch live as before. Each gunicorn worker keeps its own
+snapshots, like the alert engine.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+
+import database
+import market_data
+import refresh_policy
+from executors import ExecutorSaturated, io_executor
+from indicator_state import IndicatorStates
+from models import SymbolData
+from snapshot_builders import news_snapshot
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOTS = os.environ.get("SNAPSHOTS", "1") != "0"
+SNAPSHOT_TICK_SECONDS = float(os.environ.get("SNAPSHOT_TICK_SECONDS", "10"))
+
+# Seconds between refreshes of each field while the market is open
+SNAPSHOT_CADENCE = {
+    "price": float(os.environ.get("SNAPSHOT_PRICE_SECONDS", "30")),
+    "technicals": float(os.environ.get("SNAPSHOT_TECHNICALS_SECONDS", "300")),
+    "news": float(os.environ.get("SNAPSHOT_NEWS_SECONDS", "600")),
+}
+SNAPSHOT_NEWS_CLOSED_SECONDS = float(os.environ.get("SNAPSHOT_NEWS_CLOSED_SECONDS", "3600"))
+
+# refresh_policy kind behind each field, and the field's cadence overrides
+_POLICY = {
+    "price": ("quote", {"session": SNAPSHOT_CADENCE["price"]}),
+    "technicals": ("history", {"session": SNAPSHOT_CADENCE["technicals"]}),
+    "news": ("news", {"session": SNAPSHOT_CADENCE["news"], "closed": SNAPSHOT_NEWS_CLOSED_SECONDS}),
+}
+
+# History downloads in flight at once during a technicals refresh
+_CONCURRENCY = int(os.environ.get("FETCH_CONCURRENCY", "8"))
+
+
+class WatchlistSnapshots:
+    def __init__(self):
+        self._entries: dict[str, dict] = {}  # symbol -> field values + "as_of" / "tried" per field
+        self._indicators = IndicatorStates()
+        self._task: asyncio.Task | None = None
+        self._wake: asyncio.Event | None = None
+        self._refreshes = {field: 0 for field in SNAPSHOT_CADENCE}
+        self._served = 0
+        self._missed = 0
+        self._last_refresh = None
+
+    # ── Freshness ──────────────────────────────────────────────
+
+    def _is_fresh(self, symbol: str, field: str, as_of: float | None, now: float) -> bool:
+        # Allow one missed refresh before falling back to a live fetch
+        kind, overrides = _POLICY[field]
+        return refresh_policy.is_fresh(kind, as_of, now, symbol=symbol, **overrides)
+
+    def _is_due(self, symbol: str, field: str, tried: float | None, now: float) -> bool:
+        kind, overrides = _POLICY[field]
+        return refresh_policy.is_due(kind, tried, now, symbol=symbol, **overrides)
+
+    # ── Reads ──────────────────────────────────────────────────
+
+    def get(self, symbol: str) -> SymbolData | None:
+        """The symbol's snapshot if every field is fresh, else None."""
+        entry = self._entries.get(symbol.upper())
+        now = time.time()
+        if entry is None or not all(self._is_fresh(symbol, f, entry["as_of"].get(f), now) for f in SNAPSHOT_CADENCE):
+            self._missed += 1
+            return None
+        self._served += 1
+        return SymbolData(
+            symbol=symbol.upper(),
+            price=entry["price"],
+            change_pct=entry["change_pct"],
+            technicals=entry["technicals"],
+            signal_summary=entry["signal_summary"],
+            news=entry["news"],
+            as_of={f: datetime.fromtimestamp(ts, timezone.utc) for f, ts in entry["as_of"].items()},
+        )
+
+    def get_many(self, symbols: list[str]) -> dict[str, SymbolData]:
+        """Fresh snapshots among `symbols`, keyed by upper-case symbol."""
+        found = {}
+        for sym in symbols:
+            data = self.get(sym)
+            if data is not None:
+                found[data.symbol] = data
+        return found
+
+    def drop(self, symbol: str) -> None:
+        self._entries.pop(symbol.upper(), None)
+        self._indicators.drop(symbol)
+
+    # ── Refresh ────────────────────────────────────────────────
+
+    def _store(self, symbol: str, field: str, now: float, values: dict | None) -> None:
+        entry = self._entries.setdefault(symbol, {"as_of": {}, "tried": {}})
+        entry["tried"][field] = now
+        if values is not None:
+            entry.update(values)
+            entry["as_of"][field] = now
+
+    async def _refresh_prices(self, symbols: list[str], now: float) -> None:
+        try:
+            quotes = await io_executor.run(market_data.get_quotes, symbols)
+        except ExecutorSaturated:
+            raise
+        except Exception:
+            quotes = {}
+        for sym in symbols:
+            quote = quotes.get(sym)
+            values = None
+            if quote and quote["price"]:
+                prev = quote["previous_close"] or quote["price"]
+                values = {
+                    "price": round(quote["price"], 2),
+                    "change_pct": round((quote["price"] - prev) / prev * 100, 2),
+                }
+            self._store(sym, "price", now, values)
+
+    def _sync_indicators(self, histories: dict) -> dict[str, dict]:
+        """Advance each symbol's indicator state by the bars added since the last refresh."""
+        return {sym: self._indicators.sync(sym, hist) for sym, hist in histories.items()}
+
+    async def _refresh_technicals(self, symbols: list[str], now: float) -> None:
+        sem = asyncio.Semaphore(_CONCURRENCY)
+
+        async def history(sym: str):
+            async with sem:
+                try:
+                    return await io_executor.run(market_data.get_history, sym, market_data.BASE_PERIOD)
+                except Exception:
+                    return None
+
+        hists = await asyncio.gather(*(history(sym) for sym in symbols))
+        usable = {sym: h for sym, h in zip(symbols, hists) if h is not None}
+        results = await io_executor.run(self._sync_indicators, usable) if usable else {}
+        for sym in symbols:
+            ta_raw = results.get(sym)
+            values = None
+            if ta_raw and "error" not in ta_raw:
+                values = {"technicals": ta_raw["indicators"], "signal_summary": ta_raw["signal_summary"]}
+            self._store(sym, "technicals", now, values)
+
+    async def _refresh_news(self, symbols: list[str], now: float) -> None:
+        sem = asyncio.Semaphore(_CONCURRENCY)
+
+        async def news(sym: str):
+            async with sem:
+                try:
+                    return news_snapshot(sym, await io_executor.run(market_data.get_news, sym))
+                except Exception:
+                    return None
+
+        for sym, news_raw in zip(symbols, await asyncio.gather(*(news(sym) for sym in symbols))):
+            ok = news_raw is not None and "error" not in news_raw
+            self._store(sym, "news", now, {"news": news_raw["articles"]} if ok else None)
+
+    async def refresh(self) -> None:
+        """Refetch every field that is due, for every watchlist symbol."""
+        symbols = [sym.upper() for sym in database.get_watchlist()]
+        for sym in list(self._entries):
+            if sym not in symbols:
+                self.drop(sym)
+
+        now = time.time()
+        refreshers = {
+            "price": self._refresh_prices,
+            "technicals": self._refresh_technicals,
+            "news": self._refresh_news,
+        }
+        for field, refresh in refreshers.items():
+            due = [s for s in symbols if self._is_due(s, field, self._entries.get(s, {}).get("tried", {}).get(field), now)]
+            if due:
+                await refresh(due, now)
+                self._refreshes[field] += len(due)
+        self._last_refresh = now
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except ExecutorSaturated:
+                pass
+            except Exception:
+                logger.warning("Snapshot refresh failed; retrying next tick", exc_info=True)
+            try:
+                await asyncio.wait_for(self._wake.wait(), SNAPSHOT_TICK_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def wake(self) -> None:
+        """Refresh now instead of at the next tick (e.g. a symbol was added)."""
+        if self._wake is not None:
+            self._wake.set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "market_phase": refresh_policy.phase(),
+            "symbols": len(self._entries),
+            "served": self._served,
+            "missed": self._missed,
+            "refreshes": dict(self._refreshes),
+            "indicator_states": self._indicators.stats(),
+            "last_refresh": self._last_refresh,
+        }
+
+
+snapshots = WatchlistSnapshots()
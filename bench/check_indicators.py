@@ -0,0 +1,124 @@
+"""Check that streaming indicator states match the batch engine and `ta`.
+
+Replays seeded random-walk histories through IndicatorStates.sync the way
+the watchlist snapshots do: seeded from the first year of bars, then fed
+the rest a few bars at a time with the newest bar revised while it is
+"forming". After every step the state's unrounded values are compared
+with `indicators.compute_panel` over the same bars, and at the end with
+the `ta` indicators behind TechnicalAnalysisTool. Exits non-zero when any
+value differs by more than --tolerance (relative, or absolute below 1).
+
+    python bench/check_indicators.py
+    python bench/check_indicators.py --symbols 50 --bars 3000
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+import indicators  # noqa: E402
+from indicator_state import RESYNC_EVERY, IndicatorStates  # noqa: E402
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=8, help="random-walk histories to replay")
+    parser.add_argument("--bars", type=int, default=2 * RESYNC_EVERY + 300, help="bars per history")
+    parser.add_argument("--seed-bars", type=int, default=252, help="bars the states are seeded with")
+    parser.add_argument("--tolerance", type=float, default=1e-9)
+    parser.add_argument("--seed", type=int, default=7, help="random seed")
+    return parser.parse_args()
+
+
+def _history(rng: np.random.Generator, bars: int) -> pd.DataFrame:
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+    spread = close * rng.uniform(0, 0.03, bars)
+    low = close - spread * rng.uniform(0, 1, bars)
+    index = pd.bdate_range("2010-01-04", periods=bars, tz="America/New_York")
+    return pd.DataFrame({"Open": close, "High": low + spread, "Low": low, "Close": close}, index=index)
+
+
+def _error(got: float | None, want: float) -> float:
+    """Relative difference (absolute below 1); inf when only one side has a value."""
+    if got is None or np.isnan(want):
+        return 0.0 if got is None and np.isnan(want) else np.inf
+    return abs(got - want) / max(abs(want), 1.0)
+
+
+def _batch_values(hist: pd.DataFrame) -> dict[str, float]:
+    panel = {f: hist[f].to_numpy(dtype=float)[:, None] for f in ("Close", "High", "Low")}
+    series = indicators.compute_panel(panel["Close"], panel["High"], panel["Low"])
+    return {key: float(series[key][-1, 0]) for key in indicators.INDICATOR_KEYS}
+
+
+def _ta_values(hist: pd.DataFrame) -> dict[str, float]:
+    from ta.momentum import RSIIndicator
+    from ta.trend import MACD, SMAIndicator
+    from ta.volatility import AverageTrueRange, BollingerBands
+
+    close, high, low = hist["Close"], hist["High"], hist["Low"]
+    macd = MACD(close, window_slow=26, window_fast=12, window_sign=9)
+    bb = BollingerBands(close, window=20, window_dev=2)
+    series = {
+        "rsi_14": RSIIndicator(close, window=14).rsi(),
+        "macd": macd.macd(),
+        "macd_signal": macd.macd_signal(),
+        "macd_histogram": macd.macd_diff(),
+        "sma_20": SMAIndicator(close, window=20).sma_indicator(),
+        "sma_50": SMAIndicator(close, window=50).sma_indicator(),
+        "sma_200": SMAIndicator(close, window=200).sma_indicator(),
+        "bollinger_upper": bb.bollinger_hband(),
+        "bollinger_middle": bb.bollinger_mavg(),
+        "bollinger_lower": bb.bollinger_lband(),
+        "atr_14": AverageTrueRange(high, low, close, window=14).average_true_range(),
+    }
+    return {key: float(s.iloc[-1]) for key, s in series.items()}
+
+
+def main() -> int:
+    args = _parse_args()
+    rng = np.random.default_rng(args.seed)
+    states = IndicatorStates()
+    worst = dict.fromkeys(indicators.INDICATOR_KEYS, 0.0)
+    worst_ta = dict.fromkeys(indicators.INDICATOR_KEYS, 0.0)
+
+    for i in range(args.symbols):
+        sym = f"SYM{i}"
+        full = _history(rng, args.bars)
+        end = args.seed_bars
+        states.sync(sym, full.iloc[:end])
+        while end < len(full):
+            end = min(end + int(rng.integers(1, 4)), len(full))
+            hist = full.iloc[:end].copy()
+            # The newest bar is still forming: sync a provisional close first
+            forming = hist.copy()
+            forming.iloc[-1, forming.columns.get_loc("Close")] *= 1 + rng.normal(0, 0.01)
+            states.sync(sym, forming)
+            states.sync(sym, hist)
+            got = states.get(sym).values()
+            for key, want in _batch_values(hist).items():
+                worst[key] = max(worst[key], _error(got[key], want))
+        got = states.get(sym).values()
+        for key, want in _ta_values(full).items():
+            worst_ta[key] = max(worst_ta[key], _error(got[key], want))
+
+    stats = states.stats()
+    print(f"{args.symbols} histories x {args.bars} bars, {stats['seeds']} seeds, {stats['bars_applied']} bars applied")
+    print(f"{'indicator':18} {'vs batch':>12} {'vs ta':>12}")
+    for key in indicators.INDICATOR_KEYS:
+        print(f"{key:18} {worst[key]:12.2e} {worst_ta[key]:12.2e}")
+    failed = [k for k in indicators.INDICATOR_KEYS if max(worst[k], worst_ta[k]) > args.tolerance]
+    if failed:
+        print(f"FAIL: {', '.join(failed)} beyond {args.tolerance:g}")
+        return 1
+    print(f"OK: every value within {args.tolerance:g}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""Deterministic local stand-ins for Yahoo Finance and the LLM.
+
+`install()` patches `yfinance.Ticker`, `yfinance.download`,
+`crewai.Crew.kickoff` and `litellm.completion` in-process. Prices are a
+seeded random walk per symbol, fixed per calendar date, so repeated runs
+(and the bar store's tail downloads) see identical data. Every upstream
+call is counted in `CALLS` and sleeps for the configured latency.
+"""
+
+import threading
+import time
+import types
+import zlib
+
+import numpy as np
+import pandas as pd
+
+_TZ = "America/New_York"
+_ORIGIN = pd.Timestamp("2010-01-04", tz=_TZ)
+
+_PERIOD_BARS = {
+    "1d": 1, "5d": 5, "1mo": 21, "3mo": 63, "6mo": 126,
+    "1y": 252, "2y": 504, "5y": 1260, "10y": 2520,
+}
+
+CALLS = {"history": 0, "info": 0, "news": 0, "download": 0, "llm": 0}
+_calls_lock = threading.Lock()
+
+latency = {"yahoo": 0.05, "llm": 0.5}
+
+_series: dict[str, pd.DataFrame] = {}
+_series_lock = threading.Lock()
+
+
+def _count(name: str) -> None:
+    with _calls_lock:
+        CALLS[name] += 1
+
+
+def reset_calls() -> None:
+    with _calls_lock:
+        for key in CALLS:
+            CALLS[key] = 0
+
+
+def _full_history(symbol: str) -> pd.DataFrame:
+    """Daily OHLCV from _ORIGIN to today; stable for a given symbol and date."""
+    today = pd.Timestamp.now(tz=_TZ).normalize()
+    with _series_lock:
+        cached = _series.get(symbol)
+        if cached is not None and cached.index[-1] >= today - pd.offsets.BDay(1):
+            return cached
+    index = pd.bdate_range(_ORIGIN, today, tz=_TZ)
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    steps = rng.normal(0.0003, 0.015, len(index))
+    close = 20 + (zlib.crc32(symbol.encode()) % 300) * np.exp(np.cumsum(steps))
+    spread = np.abs(rng.normal(0, 0.01, len(index))) * close
+    frame = pd.DataFrame(
+        {
+            "Open": close * (1 + rng.normal(0, 0.003, len(index))),
+            "High": close + spread,
+            "Low": close - spread,
+            "Close": close,
+            "Volume": rng.integers(1_000_000, 50_000_000, len(index)).astype(float),
+        },
+        index=index,
+    )
+    with _series_lock:
+        _series[symbol] = frame
+    return frame
+
+
+class FakeTicker:
+    def __init__(self, symbol: str, session=None):
+        self.ticker = symbol.upper()
+
+    def history(self, period: str = "1mo", start=None, interval: str = "1d", **kwargs) -> pd.DataFrame:
+        _count("history")
+        time.sleep(latency["yahoo"])
+        hist = _full_history(self.ticker)
+        if start is not None:
+            return hist[hist.index >= pd.Timestamp(start, tz=_TZ)]
+        if period == "max":
+            return hist
+        if period == "ytd":
+            return hist[hist.index.year == hist.index[-1].year]
+        return hist.tail(_PERIOD_BARS.get(period, 21))
+
+    @property
+    def info(self) -> dict:
+        _count("info")
+        time.sleep(latency["yahoo"])
+        last = _full_history(self.ticker).iloc[-252:]
+        return {
+            "regularMarketPrice": float(last["Close"].iloc[-1]),
+            "previousClose": float(last["Close"].iloc[-2]),
+            "fiftyTwoWeekHigh": float(last["High"].max()),
+            "fiftyTwoWeekLow": float(last["Low"].min()),
+            "marketCap": 1_000_000_000,
+            "sector": "Technology",
+            "industry": "Software",
+        }
+
+    @property
+    def news(self) -> list:
+        _count("news")
+        time.sleep(latency["yahoo"])
+        return [
+            {
+                "content": {
+                    "title": f"{self.ticker} headline {i}",
+                    "provider": {"displayName": "Bench Wire"},
+                    "canonicalUrl": {"url": f"https://example.com/{self.ticker}/{i}"},
+                    "pubDate": "2026-01-02T14:30:00Z",
+                }
+            }
+            for i in range(5)
+        ]
+
+
+def fake_download(tickers, period: str = "5d", start=None, **kwargs) -> pd.DataFrame:
+    _count("download")
+    time.sleep(latency["yahoo"])
+    symbols = [tickers] if isinstance(tickers, str) else list(tickers)
+
+    def window(hist: pd.DataFrame) -> pd.DataFrame:
+        if start is not None:
+            return hist[hist.index >= pd.Timestamp(start, tz=_TZ)]
+        return hist if period == "max" else hist.tail(_PERIOD_BARS.get(period, 5))
+
+    return pd.concat({sym.upper(): window(_full_history(sym.upper())) for sym in symbols}, axis=1)
+
+
+_REPORT = (
+    "Prices and indicators are as given. Momentum is mixed; no news changes the picture.\n"
+    "RECOMMENDATION: HOLD because the signals do not agree."
+)
+
+
+def fake_kickoff(self, inputs=None):
+    _count("llm")
+    time.sleep(latency["llm"])
+    return _REPORT
+
+
+def fake_completion(*args, stream: bool = False, **kwargs):
+    _count("llm")
+    words = _REPORT.split(" ")
+
+    def chunks():
+        for word in words:
+            time.sleep(latency["llm"] / len(words))
+            yield types.SimpleNamespace(choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=word + " "))])
+
+    return chunks()
+
+
+def install(yahoo_latency: float = 0.05, llm_latency: float = 0.5) -> None:
+    """Patch the upstream libraries in this process. Call before importing main."""
+    import crewai
+    import litellm
+    import yfinance
+
+    latency["yahoo"] = yahoo_latency
+    latency["llm"] = llm_latency
+    yfinance.Ticker = FakeTicker
+    yfinance.download = fake_download
+    crewai.Crew.kickoff = fake_kickoff
+    litellm.completion = fake_completion
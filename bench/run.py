@@ -0,0 +1,201 @@
+"""Latency / throughput benchmark for the StockBot API.
+
+Runs the app in-process against the fake Yahoo and LLM backends in
+bench/fake_backends.py, so numbers are repeatable and need no network,
+API keys or Ollama. For every endpoint and concurrency level it reports
+p50/p95/p99 latency, throughput, error count and upstream calls per
+request.
+
+    python bench/run.py
+    python bench/run.py --endpoints quote,analyze --concurrency 1,16,64 --requests 200
+    python bench/run.py --cold --no-llm-cache --json results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ENDPOINTS = {
+    # name -> (method, path); {symbol} is rotated through --symbols
+    "quote": ("GET", "/quote/{symbol}"),
+    "analyze": ("GET", "/analyze/{symbol}"),
+    "briefing": ("POST", "/briefing"),
+    "portfolio": ("GET", "/portfolio"),
+    "check-alerts": ("POST", "/check-alerts"),
+}
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="comma-separated subset of: " + ", ".join(ENDPOINTS))
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=64, help="requests per endpoint and concurrency level")
+    parser.add_argument("--symbols", default="AAPL,MSFT,GOOGL,AMZN,NVDA,TSLA,META,AMD", help="watchlist / portfolio symbols")
+    parser.add_argument("--alerts", type=int, default=200, help="active alerts seeded before each check-alerts run")
+    parser.add_argument("--yahoo-latency", type=float, default=0.05, help="seconds per fake Yahoo call")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per fake LLM call")
+    parser.add_argument("--cold", action="store_true", help="clear the in-memory market data cache before each run")
+    parser.add_argument("--no-cache", action="store_true", help="disable the market data cache (all TTLs 0)")
+    parser.add_argument("--market-hours", action="store_true", help="time cache TTLs by the live exchange calendar instead of the session cadences")
+    parser.add_argument("--no-llm-cache", action="store_true", help="disable the reporter output cache")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    return parser.parse_args()
+
+
+def _configure_env(args: argparse.Namespace, db_dir: str) -> None:
+    """Settings that the app reads at import time."""
+    os.environ["STOCKBOT_DB_PATH"] = os.path.join(db_dir, "bench.db")
+    os.environ["ALERT_ENGINE"] = "0"  # /check-alerts is driven explicitly
+    os.environ.setdefault("LLM_PROVIDER", "ollama")
+    if not args.market_hours:
+        os.environ["REFRESH_SCHEDULE"] = "0"  # same TTLs whatever the time of day
+    if args.no_cache:
+        for kind in ("QUOTE", "HISTORY", "INFO", "NEWS"):
+            os.environ[f"CACHE_TTL_{kind}"] = "0"
+    if args.no_llm_cache:
+        os.environ["LLM_CACHE"] = "0"
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+async def _drive(client, method: str, path: str, symbols: list[str], total: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    issued = 0
+
+    async def worker():
+        nonlocal issued
+        while issued < total:
+            n = issued
+            issued += 1
+            url = path.format(symbol=symbols[n % len(symbols)])
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url)
+                status = response.status_code
+            except Exception:
+                status = 0
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "seconds": round(elapsed, 3),
+        "rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+        "errors": sum(n for code, n in statuses.items() if not 200 <= code < 300),
+        "statuses": statuses,
+    }
+
+
+def _seed(database, symbols: list[str]) -> None:
+    for sym in database.get_watchlist():
+        database.remove_from_watchlist(sym)
+    database.add_many_to_watchlist(symbols)
+    for holding in database.get_portfolio():
+        database.remove_holding(holding["symbol"])
+    database.add_holdings([(sym, 10.0 + i, 50.0 + 5 * i) for i, sym in enumerate(symbols)])
+
+
+def _seed_alerts(database, symbols: list[str], count: int) -> None:
+    """Replace the active alerts with `count` thresholds spread over 1–997."""
+    database.deactivate_alerts([alert["id"] for alert in database.get_alerts()])
+    for i in range(count):
+        sym = symbols[i % len(symbols)]
+        condition = "above" if i % 2 else "below"
+        database.add_alert(sym, condition, 1.0 + (i % 997))
+
+
+def _print_table(rows: list[dict]) -> None:
+    header = f"{'endpoint':<14}{'conc':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}{'err':>5}   upstream calls / request"
+    print(header)
+    print("─" * len(header))
+    for row in rows:
+        upstream = ", ".join(f"{k} {v:g}" for k, v in row["upstream_per_request"].items() if v) or "none"
+        print(
+            f"{row['endpoint']:<14}{row['concurrency']:>5}{row['p50_ms']:>10}{row['p95_ms']:>10}"
+            f"{row['p99_ms']:>10}{row['rps']:>9}{row['errors']:>5}   {upstream}"
+        )
+
+
+async def _main(args: argparse.Namespace) -> list[dict]:
+    import httpx
+
+    import fake_backends
+
+    fake_backends.install(args.yahoo_latency, args.llm_latency)
+
+    sys.path.insert(0, str(ROOT / "app"))
+    import database
+    import main
+    import market_data
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = [e for e in endpoints if e not in ENDPOINTS]
+    if unknown:
+        raise SystemExit(f"unknown endpoints: {', '.join(unknown)}")
+    levels = [int(c) for c in args.concurrency.split(",")]
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+
+    rows = []
+    async with main.lifespan(main.app):
+        _seed(database, symbols)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for name in endpoints:
+                method, path = ENDPOINTS[name]
+                for concurrency in levels:
+                    if args.cold:
+                        market_data._cache.clear()
+                    if name == "check-alerts":
+                        _seed_alerts(database, symbols, args.alerts)
+                    fake_backends.reset_calls()
+                    result = await _drive(client, method, path, symbols, args.requests, concurrency)
+                    calls = dict(fake_backends.CALLS)
+                    rows.append(
+                        {
+                            "endpoint": name,
+                            "concurrency": concurrency,
+                            **result,
+                            "upstream": calls,
+                            "upstream_per_request": {k: round(v / args.requests, 2) for k, v in calls.items()},
+                        }
+                    )
+                    print(f"{name} x{concurrency}: p50 {result['p50_ms']} ms, {result['rps']} req/s", file=sys.stderr)
+    return rows
+
+
+def main() -> None:
+    args = _parse_args()
+    with tempfile.TemporaryDirectory(prefix="stockbot-bench-") as db_dir:
+        _configure_env(args, db_dir)
+        sys.path.insert(0, str(Path(__file__).resolve().parent))
+        rows = asyncio.run(_main(args))
+
+    print()
+    _print_table(rows)
+    if args.json:
+        Path(args.json).write_text(json.dumps({"args": vars(args), "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
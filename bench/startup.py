@@ -0,0 +1,154 @@
+"""Start-up benchmark for the StockBot API.
+
+Measures, in a fresh interpreter per run, what a gunicorn worker pays
+before it can answer: the import time of `main` broken down by the
+modules it pulls in (from `python -X importtime`), then the lifespan
+start-up, the first GET /watchlist and the point where the reporter
+pool is warm. Modes:
+
+    eager      REPORTER_WARMUP=startup: the reporter pool (and CrewAI) is
+               built before the first request is served
+    lazy       REPORTER_WARMUP=background: CrewAI loads on a thread after
+               start-up (the default)
+    preloaded  the stack is imported before the clock starts, as in a
+               worker forked from a GUNICORN_PRELOAD=1 master
+
+    python bench/startup.py
+    python bench/startup.py --modes lazy,preloaded --top 15
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "app"
+
+MODES = {
+    # name -> (REPORTER_WARMUP, import the stack before timing)
+    "eager": ("startup", False),
+    "lazy": ("background", False),
+    "preloaded": ("background", True),
+}
+
+# Runs inside the child; prints one JSON line
+_PROBE = """
+import asyncio, json, resource, sys, threading, time
+if {preload!r}:
+    import agents
+    agents.load_stack()
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def run():
+    import httpx
+    async with main.lifespan(main.app):
+        started = time.perf_counter()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.get("/watchlist")
+        served = time.perf_counter()
+        crewai_at_first_request = "crewai" in sys.modules
+        for thread in threading.enumerate():
+            if thread.name == "reporter-warmup":
+                thread.join()
+        return started, served, time.perf_counter(), response.status_code, crewai_at_first_request
+
+started, served, warm, status, crewai_loaded = asyncio.run(run())
+print(json.dumps({{
+    "import_ms": round((imported - start) * 1000, 1),
+    "startup_ms": round((started - imported) * 1000, 1),
+    "first_request_ms": round((served - started) * 1000, 1),
+    "ready_ms": round((served - start) * 1000, 1),
+    "warm_ms": round((warm - start) * 1000, 1),
+    "status": status,
+    "crewai_loaded": crewai_loaded,
+    "rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+}}))
+"""
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default=",".join(MODES), help="comma-separated subset of: " + ", ".join(MODES))
+    parser.add_argument("--top", type=int, default=10, help="heaviest imports to list")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    return parser.parse_args()
+
+
+def _env(db_dir: str, warmup: str) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(APP)
+    env["STOCKBOT_DB_PATH"] = os.path.join(db_dir, "startup.db")
+    env["ALERT_ENGINE"] = "0"
+    env["SNAPSHOTS"] = "0"
+    env["REPORTER_WARMUP"] = warmup
+    env.setdefault("LLM_PROVIDER", "ollama")
+    return env
+
+
+def import_profile(db_dir: str, top: int) -> list[tuple[str, float]]:
+    """Cumulative import ms of the heaviest top-level packages under `import main`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=APP, env=_env(db_dir, "off"), capture_output=True, text=True, check=True,
+    )
+    totals: dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header row
+        package = name.strip().split(".")[0]
+        if name.strip() == package:  # a package's own line carries its whole subtree
+            totals[package] = max(totals.get(package, 0.0), int(cumulative) / 1000)
+    return sorted(totals.items(), key=lambda item: -item[1])[:top]
+
+
+def probe(db_dir: str, mode: str) -> dict:
+    warmup, preload = MODES[mode]
+    code = _PROBE.format(preload=preload)
+    proc = subprocess.run(
+        [sys.executable, "-c", code], cwd=APP, env=_env(db_dir, warmup), capture_output=True, text=True, check=True,
+    )
+    return {"mode": mode, **json.loads(proc.stdout.strip().splitlines()[-1])}
+
+
+def main() -> None:
+    args = _parse_args()
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        raise SystemExit(f"unknown modes: {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory(prefix="stockbot-startup-") as db_dir:
+        imports = import_profile(db_dir, args.top)
+        rows = [probe(db_dir, mode) for mode in modes]
+
+    print("import main — heaviest packages (cumulative ms)")
+    for name, ms in imports:
+        print(f"  {name:<24}{ms:>10.1f}")
+    print()
+    header = (
+        f"{'mode':<11}{'import ms':>11}{'startup ms':>12}{'1st req ms':>12}{'ready ms':>10}{'warm ms':>10}"
+        f"{'RSS MB':>9}  crewai at 1st req"
+    )
+    print(header)
+    print("─" * len(header))
+    for row in rows:
+        print(
+            f"{row['mode']:<11}{row['import_ms']:>11}{row['startup_ms']:>12}{row['first_request_ms']:>12}"
+            f"{row['ready_ms']:>10}{row['warm_ms']:>10}{row['rss_mb']:>9}  {'loaded' if row['crewai_loaded'] else 'not yet'}"
+        )
+    if args.json:
+        Path(args.json).write_text(json.dumps({"imports": imports, "runs": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
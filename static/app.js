@@ -17,6 +17,51 @@ async function api(path, opts = {}) {
   return resp.json();
 }
 
+// POST/GET a Server-Sent Events endpoint and call onEvent(name, data) per frame
+async function streamEvents(path, opts, onEvent) {
+  const resp = await fetch(`${API}${path}`, {
+    headers: { "Content-Type": "application/json" },
+    ...opts,
+  });
+  if (!resp.ok) {
+    const err = await resp.json().catch(() => ({ detail: resp.statusText }));
+    throw new Error(err.detail || resp.statusText);
+  }
+  const reader = resp.body.getReader();
+  const decoder = new TextDecoder();
+  let buf = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buf += decoder.decode(value, { stream: true });
+    let sep;
+    while ((sep = buf.indexOf("\n\n")) !== -1) {
+      const frame = buf.slice(0, sep);
+      buf = buf.slice(sep + 2);
+      let event = "message", data = "";
+      frame.split("\n").forEach((line) => {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      });
+      onEvent(event, data ? JSON.parse(data) : null);
+    }
+  }
+}
+
+// Re-render streamed markdown at most once per animation frame
+function mdRenderer(el) {
+  let text = "", pending = false;
+  return {
+    append(chunk) {
+      text += chunk;
+      if (pending) return;
+      pending = true;
+      requestAnimationFrame(() => { pending = false; el.innerHTML = renderMd(text); });
+    },
+    text: () => text,
+  };
+}
+
 function renderMd(text) {
   return marked.parse(text || "", { breaks: true });
 }
@@ -202,6 +247,36 @@ async function doQuote() {
 
 
 // ── Analysis ────────────────────────────────────────────────────
+function recommendationBadge(recommendation) {
+  const rec = (recommendation || "").toUpperCase();
+  if (rec.includes("BUY")) return '<span class="badge badge-green text-sm">BUY</span>';
+  if (rec.includes("SELL")) return '<span class="badge badge-red text-sm">SELL</span>';
+  if (rec.includes("HOLD")) return '<span class="badge badge-yellow text-sm">HOLD</span>';
+  return "";
+}
+
+function analysisHeader(d) {
+  const price = d.price !== null ? `$${d.price.toFixed(2)}` : "N/A";
+  let techHtml = "";
+  if (d.technicals) {
+    techHtml = Object.entries(d.technicals)
+      .filter(([, v]) => v !== null)
+      .map(([k, v]) => `<div class="bg-surface-700 rounded-lg p-3"><p class="text-xs text-gray-500">${k}</p><p class="text-white font-mono">${typeof v === "number" ? v.toFixed(2) : v}</p></div>`)
+      .join("");
+  }
+  return `
+      <div class="flex items-center justify-between mb-4">
+        <div>
+          <span class="text-white text-xl font-bold">${d.symbol}</span>
+          <span class="text-2xl font-bold text-white ml-3">${price}</span>
+          <span class="ml-2">${badgeFor(d.change_pct)}</span>
+        </div>
+        <span id="analysis-rec"></span>
+      </div>
+      <p class="text-gray-500 text-sm mb-3">${d.signal_summary || ""}</p>
+      <div class="grid grid-cols-2 sm:grid-cols-4 lg:grid-cols-6 gap-2">${techHtml}</div>`;
+}
+
 async function doAnalyze() {
   const sym = getSymbolInput();
   if (!sym) return;
@@ -215,43 +290,30 @@ async function doAnalyze() {
   $("#analysis-result").classList.add("hidden");
   $("#analysis-loading").classList.remove("hidden");
 
+  // Data renders as soon as it is fetched; the AI text fills in token by token
+  const ai = mdRenderer($("#analysis-ai"));
   try {
-    const d = await api(`/analyze/${sym}`);
-    const price = d.price !== null ? `$${d.price.toFixed(2)}` : "N/A";
-
-    let techHtml = "";
-    if (d.technicals) {
-      techHtml = Object.entries(d.technicals)
-        .filter(([, v]) => v !== null)
-        .map(([k, v]) => `<div class="bg-surface-700 rounded-lg p-3"><p class="text-xs text-gray-500">${k}</p><p class="text-white font-mono">${typeof v === "number" ? v.toFixed(2) : v}</p></div>`)
-        .join("");
-    }
-
-    // Extract recommendation badge
-    let recBadge = "";
-    const rec = (d.ai_recommendation || "").toUpperCase();
-    if (rec.includes("BUY")) recBadge = '<span class="badge badge-green text-sm">BUY</span>';
-    else if (rec.includes("SELL")) recBadge = '<span class="badge badge-red text-sm">SELL</span>';
-    else if (rec.includes("HOLD")) recBadge = '<span class="badge badge-yellow text-sm">HOLD</span>';
-
-    $("#analysis-data").innerHTML = `
-      <div class="flex items-center justify-between mb-4">
-        <div>
-          <span class="text-white text-xl font-bold">${d.symbol}</span>
-          <span class="text-2xl font-bold text-white ml-3">${price}</span>
-          <span class="ml-2">${badgeFor(d.change_pct)}</span>
-        </div>
-        ${recBadge}
-      </div>
-      <p class="text-gray-500 text-sm mb-3">${d.signal_summary || ""}</p>
-      <div class="grid grid-cols-2 sm:grid-cols-4 lg:grid-cols-6 gap-2">${techHtml}</div>`;
-
-    $("#analysis-ai").innerHTML = renderMd(d.ai_analysis);
-    $("#analysis-loading").classList.add("hidden");
-    $("#analysis-result").classList.remove("hidden");
+    await streamEvents(`/analyze/${sym}/stream`, {}, (event, d) => {
+      if (event === "symbol") {
+        $("#analysis-data").innerHTML = analysisHeader(d);
+        $("#analysis-ai").innerHTML = '<div class="spinner"></div>';
+        $("#analysis-loading").classList.add("hidden");
+        $("#analysis-result").classList.remove("hidden");
+      } else if (event === "token") {
+        ai.append(d.text);
+      } else if (event === "done") {
+        $("#analysis-ai").innerHTML = renderMd(ai.text());
+        $("#analysis-rec").innerHTML = recommendationBadge(d.ai_recommendation);
+      } else if (event === "error") {
+        throw new Error(d.detail);
+      }
+    });
   } catch (e) {
-    $("#analysis-loading").classList.add("hidden");
-    $("#analysis-placeholder").classList.remove("hidden");
+    if (!ai.text()) {
+      $("#analysis-loading").classList.add("hidden");
+      $("#analysis-result").classList.add("hidden");
+      $("#analysis-placeholder").classList.remove("hidden");
+    }
     toast(e.message, true);
   }
 }
@@ -385,20 +447,9 @@ async function checkAlerts() {
 
 
 // ── Briefing ────────────────────────────────────────────────────
-async function runBriefing() {
-  $("#briefing-placeholder").classList.add("hidden");
-  $("#briefing-result").classList.add("hidden");
-  $("#briefing-loading").classList.remove("hidden");
-  $("#briefing-btn").disabled = true;
-
-  try {
-    const d = await api("/briefing", { method: "POST" });
-    // Data cards
-    let cards = "";
-    if (d.watchlist_data) {
-      d.watchlist_data.forEach((s) => {
-        const price = s.price !== null ? `$${s.price.toFixed(2)}` : "N/A";
-        cards += `<div class="bg-surface-700 rounded-lg p-4">
+function briefingCard(s) {
+  const price = s.price !== null ? `$${s.price.toFixed(2)}` : "N/A";
+  return `<div class="bg-surface-700 rounded-lg p-4 fade-in">
           <div class="flex justify-between items-center">
             <span class="text-white font-semibold">${s.symbol}</span>
             ${badgeFor(s.change_pct)}
@@ -406,15 +457,39 @@ async function runBriefing() {
           <p class="text-white text-xl font-bold mt-2">${price}</p>
           <p class="text-gray-500 text-xs mt-1">${s.signal_summary || ""}</p>
         </div>`;
-      });
-    }
-    $("#briefing-cards").innerHTML = cards;
-    $("#briefing-ai").innerHTML = renderMd(d.ai_summary);
-    $("#briefing-loading").classList.add("hidden");
-    $("#briefing-result").classList.remove("hidden");
+}
+
+async function runBriefing() {
+  $("#briefing-placeholder").classList.add("hidden");
+  $("#briefing-result").classList.add("hidden");
+  $("#briefing-loading").classList.remove("hidden");
+  $("#briefing-btn").disabled = true;
+
+  // Cards appear as each symbol is fetched, then the summary streams in
+  const ai = mdRenderer($("#briefing-ai"));
+  try {
+    await streamEvents("/briefing/stream", { method: "POST" }, (event, d) => {
+      if (event === "start") {
+        $("#briefing-cards").innerHTML = "";
+        $("#briefing-ai").innerHTML = '<div class="spinner"></div>';
+        $("#briefing-loading").classList.add("hidden");
+        $("#briefing-result").classList.remove("hidden");
+      } else if (event === "symbol") {
+        $("#briefing-cards").insertAdjacentHTML("beforeend", briefingCard(d));
+      } else if (event === "token") {
+        ai.append(d.text);
+      } else if (event === "done") {
+        $("#briefing-ai").innerHTML = renderMd(ai.text());
+      } else if (event === "error") {
+        throw new Error(d.detail);
+      }
+    });
   } catch (e) {
-    $("#briefing-loading").classList.add("hidden");
-    $("#briefing-placeholder").classList.remove("hidden");
+    if (!ai.text()) {
+      $("#briefing-loading").classList.add("hidden");
+      $("#briefing-result").classList.add("hidden");
+      $("#briefing-placeholder").classList.remove("hidden");
+    }
     toast(e.message, true);
   }
   $("#briefing-btn").disabled = false;
@@ -0,0 +1,16 @@
+"""Test setup: import the app modules the way the server does (PYTHONPATH=app).
+
+Each test session gets its own SQLite database and bar-columns directory,
+so nothing touches a real deployment's data.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+_DATA = tempfile.mkdtemp(prefix="stockbot-tests-")
+os.environ.setdefault("STOCKBOT_DB_PATH", os.path.join(_DATA, "stockbot.db"))
+os.environ.setdefault("REFRESH_SCHEDULE", "0")  # fixed TTLs, whatever the time of day
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import bar_columns
+import database
+import market_data
+
+
+@pytest.fixture(autouse=True)
+def _db():
+    database.init_db()
+
+
+def _frame(closes, volumes) -> pd.DataFrame:
+    index = pd.bdate_range("2025-01-06", periods=len(closes), tz="America/New_York")
+    closes = np.asarray(closes, dtype=float)
+    return pd.DataFrame(
+        {"Open": closes, "High": closes + 1, "Low": closes - 1, "Close": closes, "Volume": volumes},
+        index=index,
+    )
+
+
+def test_store_full_skips_missing_closes_and_zero_fills_missing_volume():
+    hist = _frame([10.0, np.nan, 12.0, 13.0], [100.0, 200.0, np.nan, 400.0])
+    hist.iloc[3, hist.columns.get_loc("Open")] = np.nan
+
+    market_data._store_full("NANS", "1y", hist)
+
+    stored = market_data._read_stored("NANS", "max")
+    assert stored["Close"].tolist() == [10.0, 12.0, 13.0]
+    assert stored["Volume"].tolist() == [100.0, 0.0, 400.0]
+    assert stored["Open"].iloc[-1] == 13.0
+    assert database.get_bar_sync("NANS", "1d")["period"] == "1y"
+    columns = bar_columns.read("NANS")
+    assert len(columns) == 3 and not np.isnan(columns["Volume"]).any()
+
+
+def test_top_up_rows_with_nan_are_stored():
+    market_data._store_full("TAIL", "1y", _frame([10.0, 11.0], [1.0, 2.0]))
+    tail = _frame([10.0, 11.5, 12.0, np.nan], [1.0, 2.0, np.nan, 5.0])  # from the anchor bar onwards
+    anchor, _ = market_data._top_up_start("TAIL")
+
+    assert market_data._apply_tail("TAIL", {"period": "1y"}, anchor, tail)
+
+    stored = market_data._read_stored("TAIL", "max")
+    assert stored["Close"].tolist() == [10.0, 11.5, 12.0]
+    assert stored["Volume"].tolist() == [1.0, 2.0, 0.0]
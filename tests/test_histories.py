@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import database
+import market_data
+
+
+@pytest.fixture(autouse=True)
+def _db():
+    database.init_db()
+    market_data._cache.clear()
+
+
+def test_get_histories_serves_stored_bars_when_a_download_fails(monkeypatch):
+    index = pd.bdate_range("2025-01-06", periods=5, tz="America/New_York")
+    closes = np.arange(10.0, 15.0)
+    stored = pd.DataFrame(
+        {"Open": closes, "High": closes, "Low": closes, "Close": closes, "Volume": 1.0}, index=index
+    )
+    market_data._store_full("KEPT", "1y", stored)
+
+    def unreachable(*args, **kwargs):
+        raise ConnectionError("Yahoo Finance unreachable")
+
+    monkeypatch.setattr(market_data, "_download_many", unreachable)
+    histories = market_data.get_histories(["KEPT", "NEWSYM"], "1y")
+
+    assert list(histories) == ["KEPT"]
+    assert histories["KEPT"]["Close"].tolist() == closes.tolist()
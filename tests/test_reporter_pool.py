@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+import agents
+import metrics
+
+
+class _CumulativeCrew:
+    """Stands in for a pooled Crew: like CrewAI, token_usage is a running total over the crew's life."""
+
+    def __init__(self, per_run: dict):
+        self.per_run = per_run
+        self.total = dict.fromkeys(per_run, 0)
+
+    def kickoff(self, inputs=None):
+        for kind, value in self.per_run.items():
+            self.total[kind] += value
+        return SimpleNamespace(token_usage=dict(self.total))
+
+
+def _tokens() -> dict:
+    return {labels[0]: value for labels, value in metrics.llm_tokens._values.items()}
+
+
+def test_pooled_crew_counts_each_runs_tokens_once(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS", True)
+    crew = _CumulativeCrew({"prompt_tokens": 100, "completion_tokens": 40})
+    pool = agents.ReporterPool(1)
+    monkeypatch.setattr(pool, "_build", lambda: crew)
+    pool.warm()
+    before = _tokens()
+
+    pool.run("describe", "expect")
+    pool.run("describe", "expect")
+
+    after = _tokens()
+    assert pool.stats()["built"] == 0 and pool.stats()["checkouts"] == 2  # one crew, reused
+    assert after.get("prompt", 0) - before.get("prompt", 0) == 200
+    assert after.get("completion", 0) - before.get("completion", 0) == 80
+
+
+def test_discarded_crew_starts_a_fresh_baseline(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS", True)
+    pool = agents.ReporterPool(0)  # every crew is built on demand and dropped after its run
+    monkeypatch.setattr(pool, "_build", lambda: _CumulativeCrew({"prompt_tokens": 10, "completion_tokens": 5}))
+    before = _tokens()
+
+    pool.run("describe", "expect")
+    pool.run("describe", "expect")
+
+    assert _tokens().get("prompt", 0) - before.get("prompt", 0) == 20
+    assert not pool._token_totals